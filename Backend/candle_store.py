@@ -0,0 +1,127 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+import pandas as pd
+
+BAR_SECONDS = 300
+OVERLAP_BARS = 3
+STALE_SECONDS = 6 * 24 * 3600
+EXCHANGE_TZ = 'America/New_York'
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def normalize(raw):
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS, dtype=float)
+    df = raw.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+    df = df[PRICE_COLUMNS].dropna(subset=['Close'])
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize(EXCHANGE_TZ, ambiguous='infer', nonexistent='shift_forward')
+    df.index = (index.tz_convert('UTC').tz_localize(None) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df.astype(float)
+
+def to_exchange_frame(df):
+    out = df.copy()
+    out.index = pd.to_datetime(out.index, unit='s').tz_localize('UTC').tz_convert(EXCHANGE_TZ).tz_localize(None)
+    out.index.name = 'Datetime'
+    return out
+
+def last_sessions(df, days):
+    if df.empty:
+        return df
+    dates = pd.to_datetime(df.index, unit='s').tz_localize('UTC').tz_convert(EXCHANGE_TZ).date
+    keep = sorted(set(dates))[-days:]
+    return df[pd.Series(dates, index=df.index).isin(keep).to_numpy()]
+
+
+class CandleStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.frames = {}
+        self.stats_counters = {'requests': 0, 'tail_requests': 0, 'full_requests': 0, 'bars_from_store': 0, 'bars_downloaded': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS candles (
+                ticker TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, ts)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def load(self, ticker):
+        with self.lock:
+            frame = self.frames.get(ticker)
+            if frame is None:
+                rows = self.conn.execute(
+                    "SELECT ts, open, high, low, close, volume FROM candles WHERE ticker = ? ORDER BY ts", (ticker,)
+                ).fetchall()
+                frame = pd.DataFrame([row[1:] for row in rows], index=[row[0] for row in rows], columns=PRICE_COLUMNS, dtype=float)
+                self.frames[ticker] = frame
+            return frame
+
+    def tail_start(self, ticker, now=None):
+        now = now or time.time()
+        stored = self.load(ticker)
+        start = None
+        if not stored.empty and now - stored.index[-1] <= STALE_SECONDS:
+            start = datetime.fromtimestamp(int(stored.index[-1]) - OVERLAP_BARS * BAR_SECONDS, tz=timezone.utc)
+        with self.lock:
+            self.stats_counters['requests'] += 1
+            self.stats_counters['tail_requests' if start is not None else 'full_requests'] += 1
+        return start
+
+    def merge(self, ticker, raw, days=5, now=None):
+        now = now or time.time()
+        fetched = normalize(raw)
+        stored = self.load(ticker)
+        parts = [part for part in (stored[~stored.index.isin(fetched.index)], fetched) if not part.empty]
+        merged = pd.concat(parts).sort_index() if parts else fetched
+        merged = last_sessions(merged, days)
+        closed = merged[merged.index + BAR_SECONDS <= now]
+        with self.lock:
+            self.frames[ticker] = closed
+            self.stats_counters['bars_from_store'] += int(len(merged) - merged.index.isin(fetched.index).sum())
+            self.stats_counters['bars_downloaded'] += len(fetched)
+            try:
+                written = closed[closed.index.isin(fetched.index)]
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO candles (ticker, ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(ticker, int(ts), *values) for ts, values in zip(written.index, written.itertuples(index=False, name=None))]
+                )
+                if not closed.empty:
+                    self.conn.execute("DELETE FROM candles WHERE ticker = ? AND ts < ?", (ticker, int(closed.index[0])))
+                self.conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Error saving candles for {ticker}: {e}")
+        return to_exchange_frame(merged)
+
+    def discard(self, ticker):
+        # Candles stay in sqlite; only the in-memory frame of a ticker nobody watches is dropped
+        with self.lock:
+            self.frames.pop(ticker, None)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.stats_counters)
+        total = stats['bars_from_store'] + stats['bars_downloaded']
+        stats['hit_ratio'] = stats['bars_from_store'] / total if total else 0.0
+        stats['request_hit_ratio'] = stats['tail_requests'] / stats['requests'] if stats['requests'] else 0.0
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
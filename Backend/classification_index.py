@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+VERSION_POLL_INTERVAL = 2.0
+VERSION_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS classification_versions (
+        ticker VARCHAR(32) NOT NULL PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    )
+"""
+BUMP_VERSION_QUERY = """
+    INSERT INTO classification_versions (ticker, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+
+class ClassificationIndex:
+    def __init__(self, database, poll_interval=VERSION_POLL_INTERVAL):
+        self.database = database
+        self.poll_interval = poll_interval
+        self.labels = {}
+        self.versions = {}
+        self.loading = {}
+        self.poller = None
+        self.table_ready = False
+
+    def _query(self, conn, query, params=()):
+        cursor = conn.cursor()
+        try:
+            if not self.table_ready:
+                cursor.execute(VERSION_TABLE_QUERY)
+                self.table_ready = True
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _load(self, conn, ticker):
+        version = self._query(conn, "SELECT version FROM classification_versions WHERE ticker = %s", (ticker,))
+        rows = self._query(
+            conn, "SELECT datetimestamp, classification FROM classifications_tb WHERE ticker = %s ORDER BY cid", (ticker,)
+        )
+        return (version[0][0] if version else 0), {str(datetimestamp): int(classification) for datetimestamp, classification in rows}
+
+    async def load(self, ticker):
+        task = self.loading.get(ticker)
+        if task is None:
+            task = asyncio.ensure_future(self._reload(ticker))
+            self.loading[ticker] = task
+        return await asyncio.shield(task)
+
+    async def _reload(self, ticker):
+        try:
+            version, labels = await self.database.run(self._load, ticker)
+            self.labels[ticker] = labels
+            self.versions[ticker] = version
+            return labels
+        except Exception as e:
+            logging.error(f"Error loading classifications for {ticker}: {e}")
+            return self.labels.get(ticker, {})
+        finally:
+            self.loading.pop(ticker, None)
+
+    async def get(self, ticker):
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.create_task(self.poll())
+        labels = self.labels.get(ticker)
+        if labels is None:
+            labels = await self.load(ticker)
+        return labels
+
+    async def poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            tickers = list(self.versions)
+            if not tickers:
+                continue
+            try:
+                placeholders = ','.join(['%s'] * len(tickers))
+                rows = await self.database.run(
+                    self._query, f"SELECT ticker, version FROM classification_versions WHERE ticker IN ({placeholders})", tickers
+                )
+                current = {ticker: version for ticker, version in rows}
+                for ticker in tickers:
+                    if ticker in self.versions and current.get(ticker, 0) != self.versions[ticker]:
+                        await self.load(ticker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error polling classification versions: {e}")
+
+    def discard(self, ticker):
+        self.labels.pop(ticker, None)
+        self.versions.pop(ticker, None)
+
+    async def shutdown(self):
+        if self.poller:
+            self.poller.cancel()
+            self.poller = None
+        self.labels.clear()
+        self.versions.clear()
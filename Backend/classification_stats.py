@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import time
+
+STATS_RECONCILE_INTERVAL = 600.0
+STATS_RECONCILE_TIMEOUT = 300.0
+STATS_RETRY_INTERVAL = 60.0
+TICKER_PAGE_SIZE = 100
+TICKER_MAX_PAGE_SIZE = 500
+STATS_SIZE_TABLES = ('classifications_tb', 'patterns_tb', 'pattern_blobs')
+CLASSIFICATIONS = ('1', '2', '3')
+STATS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS classification_stats (
+        name VARCHAR(32) NOT NULL PRIMARY KEY,
+        value BIGINT NOT NULL DEFAULT 0
+    )
+"""
+TICKER_STATS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS classification_ticker_stats (
+        ticker VARCHAR(32) NOT NULL PRIMARY KEY,
+        total BIGINT NOT NULL DEFAULT 0
+    )
+"""
+DAY_STATS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS classification_day_stats (
+        ticker VARCHAR(32) NOT NULL,
+        day DATE NOT NULL,
+        total BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (ticker, day)
+    )
+"""
+ADD_STATS_QUERY = """
+    INSERT INTO classification_stats (name, value) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+"""
+ADD_TICKER_STATS_QUERY = """
+    INSERT INTO classification_ticker_stats (ticker, total) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+"""
+ADD_DAY_STATS_QUERY = """
+    INSERT INTO classification_day_stats (ticker, day, total) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+"""
+SET_STATS_QUERY = """
+    INSERT INTO classification_stats (name, value) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE value = VALUES(value)
+"""
+
+
+def ensure_stats_tables(cursor):
+    cursor.execute(STATS_TABLE_QUERY)
+    cursor.execute(TICKER_STATS_TABLE_QUERY)
+    cursor.execute(DAY_STATS_TABLE_QUERY)
+
+def stats_deltas(changes):
+    # changes: [(previous classification or None for a new row, new classification, datetimestamp)]
+    deltas = {}
+    for previous, classification, datetimestamp in changes:
+        if previous == classification:
+            continue
+        if previous is None:
+            deltas['total'] = deltas.get('total', 0) + 1
+        else:
+            deltas[f"class_{previous}"] = deltas.get(f"class_{previous}", 0) - 1
+        deltas[f"class_{classification}"] = deltas.get(f"class_{classification}", 0) + 1
+    return {name: value for name, value in deltas.items() if value}
+
+def apply_stats_deltas(cursor, ticker, changes):
+    # Runs inside the caller's label-write transaction
+    deltas = stats_deltas(changes)
+    added = deltas.get('total', 0)
+    if added:
+        cursor.execute("SELECT total FROM classification_ticker_stats WHERE ticker = %s FOR UPDATE", (ticker,))
+        row = cursor.fetchone()
+        if not row or not row[0]:
+            deltas['tickers'] = 1
+        cursor.execute(ADD_TICKER_STATS_QUERY, (ticker, added))
+        days = {}
+        for previous, classification, datetimestamp in changes:
+            if previous is None:
+                days[datetimestamp.date()] = days.get(datetimestamp.date(), 0) + 1
+        cursor.executemany(ADD_DAY_STATS_QUERY, [(ticker, day, total) for day, total in days.items()])
+    if deltas:
+        cursor.executemany(ADD_STATS_QUERY, list(deltas.items()))
+
+def stats_corrections(actual, recorded):
+    return {key: actual.get(key, 0) - recorded.get(key, 0) for key in set(actual) | set(recorded) if actual.get(key, 0) != recorded.get(key, 0)}
+
+def reconcile_stats(conn, schema):
+    # The recount and the stored stats are read from one consistent snapshot, which takes no locks on
+    # classifications_tb. The differences are then added like save_chunk's deltas: a save committed in
+    # between moves both sides of the difference equally, so it is neither lost nor counted twice
+    cursor = conn.cursor()
+    try:
+        ensure_stats_tables(cursor)
+        conn.commit()
+        conn.start_transaction(consistent_snapshot=True, readonly=True)
+        cursor.execute("SELECT ticker, COUNT(*) FROM classifications_tb GROUP BY ticker")
+        tickers = {ticker: int(total) for ticker, total in cursor.fetchall()}
+        cursor.execute("SELECT ticker, DATE(datetimestamp), COUNT(*) FROM classifications_tb GROUP BY ticker, DATE(datetimestamp)")
+        days = {(ticker, day): int(total) for ticker, day, total in cursor.fetchall()}
+        cursor.execute("SELECT classification, COUNT(*) FROM classifications_tb GROUP BY classification")
+        totals = {f"class_{classification}": int(total) for classification, total in cursor.fetchall()}
+        totals['total'] = sum(tickers.values())
+        totals['tickers'] = len(tickers)
+        cursor.execute("SELECT ticker, total FROM classification_ticker_stats")
+        recorded_tickers = {ticker: int(total) for ticker, total in cursor.fetchall()}
+        cursor.execute("SELECT ticker, day, total FROM classification_day_stats")
+        recorded_days = {(ticker, day): int(total) for ticker, day, total in cursor.fetchall()}
+        cursor.execute("SELECT name, value FROM classification_stats")
+        recorded_totals = {name: int(value) for name, value in cursor.fetchall() if name in ('total', 'tickers') or name.startswith('class_')}
+        conn.commit()
+        ticker_fixes = stats_corrections(tickers, recorded_tickers)
+        day_fixes = stats_corrections(days, recorded_days)
+        total_fixes = stats_corrections(totals, recorded_totals)
+        if ticker_fixes:
+            cursor.executemany(ADD_TICKER_STATS_QUERY, list(ticker_fixes.items()))
+            cursor.executemany("DELETE FROM classification_ticker_stats WHERE ticker = %s AND total = 0",
+                               [(ticker,) for ticker in ticker_fixes if ticker not in tickers])
+        if day_fixes:
+            cursor.executemany(ADD_DAY_STATS_QUERY, [(ticker, day, total) for (ticker, day), total in day_fixes.items()])
+            cursor.executemany("DELETE FROM classification_day_stats WHERE ticker = %s AND day = %s AND total = 0",
+                               [key for key in day_fixes if key not in days])
+        if total_fixes:
+            cursor.executemany(ADD_STATS_QUERY, list(total_fixes.items()))
+        cursor.execute(f"""
+            SELECT COALESCE(SUM(data_length + index_length), 0) FROM information_schema.TABLES
+            WHERE table_schema = %s AND table_name IN ({','.join(['%s'] * len(STATS_SIZE_TABLES))})
+        """, (schema,) + STATS_SIZE_TABLES)
+        cursor.execute(SET_STATS_QUERY, ('size_bytes', int(cursor.fetchone()[0])))
+        cursor.execute(SET_STATS_QUERY, ('reconciled_at', int(time.time())))
+        if ticker_fixes or day_fixes or total_fixes:
+            logging.info(f"Corrected classification stats: {len(ticker_fixes)} tickers, {len(day_fixes)} days, {len(total_fixes)} totals")
+    finally:
+        cursor.close()
+
+def like_prefix(prefix):
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def ticker_page(conn, prefix='', after=None, limit=TICKER_PAGE_SIZE):
+    # Keyset page over the ticker index, then the per-day counts of just those tickers
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT ticker FROM classification_ticker_stats
+            WHERE total > 0 AND ticker LIKE %s AND ticker > %s
+            ORDER BY ticker LIMIT %s
+        """, (like_prefix(prefix), after or '', limit + 1))
+        tickers = [row[0] for row in cursor.fetchall()]
+        more = len(tickers) > limit
+        tickers = tickers[:limit]
+        dates = {ticker: [] for ticker in tickers}
+        if tickers:
+            cursor.execute(f"""
+                SELECT ticker, day, total FROM classification_day_stats
+                WHERE ticker IN ({','.join(['%s'] * len(tickers))}) AND total > 0
+                ORDER BY ticker, day DESC
+            """, tickers)
+            for ticker, day, total in cursor.fetchall():
+                if ticker in dates:
+                    dates[ticker].append({'date': day.strftime('%Y-%m-%d'), 'count': int(total)})
+    finally:
+        cursor.close()
+    return [{'ticker': ticker, 'dates': dates[ticker]} for ticker in tickers], (tickers[-1] if more else None)
+
+def format_size(size_kb):
+    if size_kb < 1024:
+        return f"{size_kb:.2f} KB"
+    elif size_kb < 1024 * 1024:
+        return f"{size_kb / 1024:.2f} MB"
+    elif size_kb < 1024 * 1024 * 1024:
+        return f"{size_kb / (1024 * 1024):.2f} GB"
+    return f"{size_kb / (1024 * 1024 * 1024):.2f} TB"
+
+def read_stats(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT name, value FROM classification_stats")
+        stats = {name: int(value) for name, value in cursor.fetchall()}
+        cursor.execute("""
+            SELECT training_datetime, accuracy, training_duration_seconds, classification_report
+            FROM training_reports
+            ORDER BY training_datetime DESC
+            LIMIT 1
+        """)
+        training_row = cursor.fetchone()
+    finally:
+        cursor.close()
+    total = stats.get('total', 0)
+    class_counts = {cls: stats.get(f"class_{cls}", 0) for cls in CLASSIFICATIONS}
+    training_report = None
+    if training_row:
+        training_datetime, accuracy, duration, classification_report = training_row
+        training_report = {
+            'training_datetime': training_datetime.isoformat(),
+            'accuracy': accuracy,
+            'training_duration_seconds': duration,
+            'classification_report': json.loads(classification_report) if classification_report else None
+        }
+    return {
+        'total_classifications': total,
+        'total_size': format_size(stats.get('size_bytes', 0) / 1024),
+        'unique_tickers': stats.get('tickers', 0),
+        'class_counts': class_counts,
+        'class_percentages': {cls: round((count / total * 100) if total > 0 else 0.0, 2) for cls, count in class_counts.items()},
+        'training_report': training_report
+    }, stats.get('reconciled_at', 0)
+
+
+class ClassificationStats:
+    # Serves the misc report from classification_stats; the full recount runs in the background once per interval
+    def __init__(self, database, schema, reconcile_interval=STATS_RECONCILE_INTERVAL, reconcile_timeout=STATS_RECONCILE_TIMEOUT):
+        self.database = database
+        self.schema = schema
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_timeout = reconcile_timeout
+        self.reconciler = None
+        self.attempted_at = 0.0
+        self.table_ready = False
+
+    def ensure(self, conn):
+        if not self.table_ready:
+            cursor = conn.cursor()
+            try:
+                ensure_stats_tables(cursor)
+            finally:
+                cursor.close()
+            self.table_ready = True
+
+    def read(self, conn):
+        self.ensure(conn)
+        return read_stats(conn)
+
+    def page(self, conn, prefix, after, limit):
+        self.ensure(conn)
+        return ticker_page(conn, prefix, after, limit)
+
+    async def reconcile(self):
+        try:
+            await self.database.run(reconcile_stats, self.schema, timeout=self.reconcile_timeout)
+        except Exception as e:
+            logging.error(f"Error reconciling classification stats: {e!r}")
+
+    async def report(self):
+        try:
+            report, reconciled_at = await self.database.run(self.read)
+        except Exception as e:
+            logging.error(f"Error fetching classification report: {e!r}")
+            return None
+        now = time.time()
+        if now - reconciled_at >= self.reconcile_interval and now - self.attempted_at >= STATS_RETRY_INTERVAL:
+            if self.reconciler is None or self.reconciler.done():
+                self.attempted_at = now
+                self.reconciler = asyncio.create_task(self.reconcile())
+        return report
+
+    async def tickers(self, prefix='', after=None, limit=TICKER_PAGE_SIZE):
+        return await self.database.run(self.page, prefix, after, max(1, min(int(limit), TICKER_MAX_PAGE_SIZE)))
+
+    def shutdown(self):
+        if self.reconciler:
+            self.reconciler.cancel()
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import as_strided, sliding_window_view
+import pytz
+from indicators import IndicatorEngine
+from market_calendar import session_labels
+from wire import build_frame, encode_frame
+
+COMPUTE_WORKERS = 4
+COMPUTE_START_METHOD = 'forkserver'
+PATTERN_LENGTH = 5
+ALLOWED_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume', 'volume_adi', 'volume_obv', 'volume_cmf', 'volume_fi',
+    'volume_em', 'volume_sma_em', 'volume_vpt', 'volume_vwap', 'volume_mfi', 'volume_nvi',
+    'volatility_bbm', 'volatility_bbh', 'volatility_bbl', 'volatility_bbw', 'volatility_bbp',
+    'volatility_bbhi', 'volatility_bbli', 'volatility_kcc', 'volatility_kch', 'volatility_kcl',
+    'volatility_kcw', 'volatility_kcp', 'volatility_kchi', 'volatility_kcli', 'volatility_dcl',
+    'volatility_dch', 'volatility_dcm', 'volatility_dcw', 'volatility_dcp', 'volatility_atr',
+    'volatility_ui', 'trend_macd', 'trend_macd_signal', 'trend_macd_diff', 'trend_sma_fast',
+    'trend_sma_slow', 'trend_ema_fast', 'trend_ema_slow', 'trend_vortex_ind_pos',
+    'trend_vortex_ind_neg', 'trend_vortex_ind_diff', 'trend_trix', 'trend_mass_index',
+    'trend_dpo', 'trend_kst', 'trend_kst_sig', 'trend_kst_diff', 'trend_ichimoku_conv',
+    'trend_ichimoku_base', 'trend_ichimoku_a', 'trend_ichimoku_b', 'trend_stc', 'trend_adx',
+    'trend_adx_pos', 'trend_adx_neg', 'trend_cci', 'trend_visual_ichimoku_a',
+    'trend_visual_ichimoku_b', 'trend_aroon_up', 'trend_aroon_down', 'trend_aroon_ind',
+    'trend_psar_up', 'trend_psar_down', 'trend_psar_up_indicator', 'trend_psar_down_indicator',
+    'momentum_rsi', 'momentum_stoch_rsi', 'momentum_stoch_rsi_k', 'momentum_stoch_rsi_d',
+    'momentum_tsi', 'momentum_uo', 'momentum_stoch', 'momentum_stoch_signal', 'momentum_wr',
+    'momentum_ao', 'momentum_roc', 'momentum_ppo', 'momentum_ppo_signal', 'momentum_ppo_hist',
+    'momentum_pvo', 'momentum_pvo_signal', 'momentum_pvo_hist', 'momentum_kama', 'others_dr',
+    'others_dlr', 'others_cr', 'momentum_ppo_sm', 'momentum_ppo_deg'
+]
+indicator_engine = None
+prediction_cache = {}
+pending = {}
+
+def check_existing_candlesticks(labels, df):
+    if not labels:
+        df['classified'] = 0
+        df['classification'] = 0
+        return df
+    df['date'] = df['date'].astype(str)
+    classification = df['date'].map(labels)
+    df['classified'] = classification.notna().astype(int)
+    df['classification'] = classification.fillna(0).astype(int)
+    return df
+
+def pattern_windows(df):
+    features = np.ascontiguousarray(df[ALLOWED_COLUMNS].to_numpy(dtype=float))
+    features = np.clip(np.nan_to_num(features, nan=0.0, posinf=1e6, neginf=-1e6), -1e6, 1e6)
+    rows, cols = features.shape
+    count = max(rows - PATTERN_LENGTH + 1, 0)
+    X = as_strided(features, shape=(count, PATTERN_LENGTH * cols), strides=(features.strides[0], features.strides[1]), writeable=False)
+    sessions = session_labels(df['date'])[PATTERN_LENGTH - 1:] if count else np.array([], dtype=object)
+    return features, X, sessions
+
+def reusable_windows(ticker, dates, features, current):
+    cached = prediction_cache.get(ticker)
+    count = len(current)
+    if cached is None or count == 0:
+        return np.zeros(count, dtype=bool), None
+    positions = pd.Index(cached['dates']).get_indexer(dates)
+    matched = positions >= 0
+    same = np.zeros(len(dates), dtype=bool)
+    same[matched] = (cached['features'][positions[matched]] == features[matched]).all(axis=1)
+    consecutive = np.concatenate(([True], np.diff(positions) == 1))
+    rows_ok = sliding_window_view(same, PATTERN_LENGTH).all(axis=1) & sliding_window_view(consecutive, PATTERN_LENGTH)[:, 1:].all(axis=1)
+    ends = positions[PATTERN_LENGTH - 1:] - (PATTERN_LENGTH - 1)
+    fresh = rows_ok & (ends >= 0)
+    fresh[fresh] = (cached['versions'][ends[fresh]] == current[fresh]).astype(bool)
+    return fresh, ends
+
+def prepare_ticker(ticker, df, labels, versions):
+    pending.pop(ticker, None)
+    df = prepare_frame(df)
+    if df.empty:
+        return None
+    df = indicator_engine.update(ticker, df)
+    df = check_existing_candlesticks(labels, df)
+    features, X, sessions = pattern_windows(df)
+    dates = df['date'].to_numpy()
+    current = np.array([versions.get(session) for session in sessions], dtype=object)
+    prediction = np.zeros(len(X), dtype=int)
+    prediction_values = np.zeros(len(X), dtype=float)
+    used = np.full(len(X), None, dtype=object)
+    fresh, ends = reusable_windows(ticker, dates, features, current)
+    if fresh.any():
+        cached = prediction_cache[ticker]
+        prediction[fresh] = cached['prediction'][ends[fresh]]
+        prediction_values[fresh] = cached['prediction_values'][ends[fresh]]
+        used[fresh] = cached['versions'][ends[fresh]]
+    stale = np.flatnonzero(~fresh & np.array([version is not None for version in current], dtype=bool))
+    pending[ticker] = {
+        'df': df,
+        'dates': dates,
+        'features': features,
+        'sessions': sessions,
+        'prediction': prediction,
+        'prediction_values': prediction_values,
+        'versions': used,
+        'stale': stale
+    }
+    return X[stale], sessions[stale]
+
+def generate_signals(df, peek_mode=False, prob_threshold=0.7):
+    df = df.assign(signals=0, signal_change_percentage=0.0, safe_buy=0)
+    if 'prediction' not in df.columns or 'date' not in df.columns or 'close' not in df.columns:
+        return df
+    if df['close'].isna().any() or not df['close'].apply(lambda x: isinstance(x, (int, float))).all() or (df['close'] <= 0).any():
+        df['close'] = df['close'].fillna(method='ffill').fillna(method='bfill').astype(float)
+        valid_mean = df['close'][df['close'] > 0].mean() if (df['close'] > 0).any() else 1.0
+        df['close'] = df['close'].clip(lower=valid_mean or 1.0)
+        df.loc[df['close'] <= 0, 'signals'] = 0
+    end_idx = len(df) - 1 if peek_mode else len(df) - 2
+    last = len(df) - 1
+    if end_idx == last and end_idx >= 1:
+        prediction_prob = float(df['prediction_values'].iloc[last]) if 'prediction_values' in df.columns else 0.0
+        is_incomplete = (datetime.now() - pd.to_datetime(df['date'].iloc[last])) < timedelta(minutes=5)
+        if (is_incomplete and not peek_mode) or (peek_mode and prediction_prob < prob_threshold):
+            end_idx -= 1
+    if end_idx < 1:
+        return df
+    close = df['close'].to_numpy(dtype=float)
+    buying = df['prediction'].to_numpy()[1:end_idx + 1].astype(int) == 1
+    holding = np.concatenate(([False], buying[:-1]))
+    buys = np.flatnonzero(buying & ~holding) + 1
+    sells = np.flatnonzero(~buying & holding) + 1
+    signals = np.zeros(len(df), dtype=int)
+    signals[buys] = 1
+    signals[sells] = 2
+    signal_change_percentage = np.zeros(len(df), dtype=float)
+    signal_change_percentage[sells] = [
+        max(round(((close_price - last_buy_price) / last_buy_price) * 100, 4), 0.01)
+        for close_price, last_buy_price in zip(close[sells].tolist(), close[buys[:len(sells)]].tolist())
+    ]
+    df['signals'] = signals
+    df['signal_change_percentage'] = signal_change_percentage
+    if 'cpp' in df.columns:
+        df['safe_buy'] = ((signals == 1) & (df['cpp'].to_numpy() > 50)).astype(int)
+    return df
+
+def prepare_frame(df):
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+    df = df.reset_index().rename(columns={
+        'Datetime': 'date',
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume'
+    })
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    if df['date'].isna().any():
+        df = df.dropna(subset=['date'])
+    if df.empty:
+        return df
+    tz = pytz.timezone('America/New_York')
+    df['date'] = df['date'].dt.tz_localize(tz, ambiguous='infer').dt.tz_convert('UTC').dt.tz_localize(None)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+def finish_ticker(ticker, prediction, prediction_values, versions, formats=()):
+    state = pending.pop(ticker)
+    stale = state['stale']
+    state['prediction'][stale] = prediction
+    state['prediction_values'][stale] = prediction_values
+    state['versions'][stale] = versions
+    prediction_cache[ticker] = {
+        'dates': state['dates'],
+        'features': state['features'],
+        'prediction': state['prediction'],
+        'prediction_values': state['prediction_values'],
+        'versions': state['versions']
+    }
+    df = state['df']
+    rows = len(df)
+    df['prediction'] = 0
+    df['prediction_values'] = 0.0
+    if rows >= PATTERN_LENGTH:
+        df['prediction'] = np.concatenate((np.zeros(PATTERN_LENGTH - 1, dtype=int), state['prediction']))
+        df['prediction_values'] = np.concatenate((np.zeros(PATTERN_LENGTH - 1), state['prediction_values']))
+    model_versions = {session: version for session, version in zip(state['sessions'], state['versions']) if version is not None}
+    df = generate_signals(df)
+    trading_days = pd.to_datetime(df['date']).dt.date.unique()
+    last_three_days = trading_days[-3:] if len(trading_days) >= 3 else trading_days
+    df = df[pd.to_datetime(df['date']).dt.date.isin(last_three_days)]
+    if 'signal_change_percentage' not in df.columns:
+        df['signal_change_percentage'] = 0.0
+    df['signal_change_percentage'] = df['signal_change_percentage'].astype(float)
+    frame = build_frame(df, ALLOWED_COLUMNS)
+    return frame, model_versions, {fmt: encode_frame(frame, fmt) for fmt in formats}
+
+def discard_ticker(ticker):
+    indicator_engine.discard(ticker)
+    prediction_cache.pop(ticker, None)
+    pending.pop(ticker, None)
+
+def init_worker():
+    global indicator_engine
+    indicator_engine = IndicatorEngine()
+    prediction_cache.clear()
+    pending.clear()
+
+
+class ComputePool:
+    # Shards start lazily off the event loop; forkserver keeps both first start and restarts away from
+    # forking the threaded server process, and preloading this module keeps each worker cheap to fork
+    def __init__(self, workers=COMPUTE_WORKERS, start_method=COMPUTE_START_METHOD):
+        self.context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            self.context.set_forkserver_preload([__name__])
+        self.shards = [None] * workers
+        self.starting = {}
+
+    def start(self):
+        pool = ProcessPoolExecutor(max_workers=1, mp_context=self.context, initializer=init_worker)
+        pool.submit(int)
+        return pool
+
+    async def launch(self, index):
+        try:
+            loop = asyncio.get_running_loop()
+            self.shards[index] = await loop.run_in_executor(None, self.start)
+        except Exception as e:
+            logging.error(f"Error starting compute worker {index}: {e}")
+        finally:
+            del self.starting[index]
+
+    def warm(self):
+        for index, pool in enumerate(self.shards):
+            if pool is None and index not in self.starting:
+                self.starting[index] = asyncio.create_task(self.launch(index))
+
+    async def pool(self, index):
+        if self.shards[index] is None:
+            if index not in self.starting:
+                self.starting[index] = asyncio.create_task(self.launch(index))
+            await asyncio.shield(self.starting[index])
+            if self.shards[index] is None:
+                raise RuntimeError(f"Compute worker {index} is not available")
+        return self.shards[index]
+
+    def shard(self, ticker):
+        return zlib.crc32(ticker.encode()) % len(self.shards)
+
+    async def run(self, ticker, fn, *args):
+        index = self.shard(ticker)
+        pool = await self.pool(index)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            logging.error(f"Compute worker {index} died while handling {ticker}, restarting it")
+            if self.shards[index] is pool:
+                self.shards[index] = None
+                pool.shutdown(wait=False)
+                self.warm()
+            raise
+
+    async def prepare(self, ticker, df, labels, versions):
+        return await self.run(ticker, prepare_ticker, ticker, df, labels, versions)
+
+    async def finish(self, ticker, prediction, prediction_values, versions, formats=()):
+        return await self.run(ticker, finish_ticker, ticker, prediction, prediction_values, versions, tuple(formats))
+
+    async def discard(self, ticker):
+        try:
+            await self.run(ticker, discard_ticker, ticker)
+        except Exception as e:
+            logging.error(f"Error discarding {ticker} from compute worker: {e}")
+
+    def shutdown(self):
+        for task in list(self.starting.values()):
+            task.cancel()
+        for pool in self.shards:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
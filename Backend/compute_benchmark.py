@@ -0,0 +1,70 @@
+import asyncio
+import sys
+import time
+import numpy as np
+import pandas as pd
+from compute import ComputePool, finish_ticker, init_worker, prepare_ticker
+from inference import InferenceService
+from loop_monitor import LoopLagMonitor
+from model_registry import ModelRegistry
+
+TICKERS = 8
+ROUNDS = 5
+BARS = 900
+MODEL_DIR = "/home/bias76/delphi/models"
+
+
+def sample_download(seed, bars=BARS):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2025-01-06 04:00', periods=bars, freq='5min', name='Datetime')
+    close = 100 + np.cumsum(rng.normal(0, 0.3, bars))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.1, bars),
+        'High': close + np.abs(rng.normal(0, 0.3, bars)),
+        'Low': close - np.abs(rng.normal(0, 0.3, bars)),
+        'Close': close,
+        'Volume': rng.integers(1000, 500000, bars).astype(float)
+    }, index=index)
+
+class InlineStages:
+    async def prepare(self, ticker, df, labels, versions):
+        return prepare_ticker(ticker, df, labels, versions)
+
+    async def finish(self, ticker, prediction, prediction_values, versions, formats=()):
+        return finish_ticker(ticker, prediction, prediction_values, versions, formats)
+
+    def shutdown(self):
+        pass
+
+async def step(stages, service, ticker, df):
+    windows = await stages.prepare(ticker, df, {}, service.versions())
+    prediction, prediction_values, versions = await service.predict(*windows)
+    return await stages.finish(ticker, prediction, prediction_values, versions, ('columns',))
+
+async def run(mode, tickers=TICKERS, rounds=ROUNDS, model_dir=MODEL_DIR, fallback_paths=()):
+    frames = {f"T{i}": sample_download(i) for i in range(tickers)}
+    service = InferenceService(ModelRegistry(model_dir, fallback_paths))
+    if mode == 'pool':
+        stages = ComputePool()
+        await asyncio.gather(*(stages.pool(index) for index in range(len(stages.shards))))
+    else:
+        init_worker()
+        stages = InlineStages()
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(step(stages, service, ticker, df.copy()) for ticker, df in frames.items()))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    stats = monitor.stats()
+    await monitor.shutdown()
+    stages.shutdown()
+    inference = service.stats()
+    print(f"{mode:6s} tickers={tickers} rounds={rounds} elapsed={elapsed:.2f}s lag p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms "
+          f"inference batches={inference['batches']} mean_batch={inference['mean_batch_size']} latency={inference['mean_latency_ms']}ms")
+
+if __name__ == "__main__":
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else TICKERS
+    asyncio.run(run('loop', tickers))
+    asyncio.run(run('pool', tickers))
@@ -0,0 +1,175 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool
+
+DB_QUERY_TIMEOUT = 10.0
+DB_KILL_TIMEOUT = 5
+DB_POOL_KEYS = ('pool_name', 'pool_size', 'pool_reset_session')
+DB_ENV_KEYS = {
+    'host': 'DELPHI_DB_HOST',
+    'port': 'DELPHI_DB_PORT',
+    'user': 'DELPHI_DB_USER',
+    'password': 'DELPHI_DB_PASSWORD',
+    'database': 'DELPHI_DB_NAME'
+}
+
+
+def db_config(defaults):
+    config = dict(defaults)
+    for key, env in DB_ENV_KEYS.items():
+        if os.environ.get(env):
+            config[key] = int(os.environ[env]) if key == 'port' else os.environ[env]
+    return config
+
+
+class Database:
+    def __init__(self, config, timeout=DB_QUERY_TIMEOUT, name='db'):
+        self.config = db_config(config)
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=self.config.get('pool_size', 5), thread_name_prefix=name)
+        try:
+            self.pool = MySQLConnectionPool(pool_name=name, **self.config)
+        except Error as e:
+            logging.error(f"Error creating {name} connection pool: {e}")
+            self.pool = None
+
+    def connection(self):
+        if self.pool is None:
+            return None
+        try:
+            return self.pool.get_connection()
+        except Error as e:
+            logging.error(f"Error getting database connection: {e}")
+            return None
+
+    def run_sync(self, fn, *args, running=None):
+        conn = self.connection()
+        if conn is None:
+            raise RuntimeError("no database connection")
+        try:
+            if running is not None:
+                running['id'] = conn.connection_id
+                if running.get('timed_out'):
+                    raise asyncio.TimeoutError()
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+        except Exception:
+            try:
+                conn.rollback()
+            except Error as e:
+                logging.error(f"Error rolling back: {e}")
+            raise
+        finally:
+            if running is not None:
+                # Once the session goes back to the pool its id may belong to another caller's query
+                with running['lock']:
+                    running['done'] = True
+            try:
+                conn.close()
+            except Error as e:
+                logging.error(f"Error returning connection to the pool: {e}")
+
+    def kill(self, connection_id):
+        # Own short-lived connection: the pool and its executor may be exhausted by the very query being killed
+        config = {key: value for key, value in self.config.items() if key not in DB_POOL_KEYS}
+        conn = mysql.connector.connect(connection_timeout=DB_KILL_TIMEOUT, **config)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"KILL {int(connection_id)}")
+            cursor.close()
+        finally:
+            conn.close()
+
+    def kill_running(self, running):
+        # Holding the lock keeps run_sync from releasing the session until the KILL has landed
+        with running['lock']:
+            if not running.get('done'):
+                self.kill(running['id'])
+
+    async def run(self, fn, *args, timeout=None):
+        # fn(conn, *args) runs in one transaction on the bounded DB pool. On timeout the session is killed on
+        # the server, which aborts the transaction unless it already committed, and the caller gets that outcome
+        loop = asyncio.get_running_loop()
+        running = {'lock': threading.Lock()}
+        future = loop.run_in_executor(self.executor, functools.partial(self.run_sync, fn, *args, running=running))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            running['timed_out'] = True
+            if 'id' not in running and future.cancel():
+                raise
+        if 'id' in running:
+            try:
+                await loop.run_in_executor(None, self.kill_running, running)
+            except Exception as e:
+                logging.error(f"Error killing timed out query on connection {running['id']}: {e}")
+        try:
+            return await future
+        except Exception as e:
+            raise asyncio.TimeoutError(f"query timed out after {timeout or self.timeout}s") from e
+
+    async def fetchall(self, query, params=(), dictionary=False, timeout=None):
+        def fetch(conn):
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        return await self.run(fetch, timeout=timeout)
+
+    async def fetchone(self, query, params=(), dictionary=False, timeout=None):
+        rows = await self.fetchall(query, params, dictionary, timeout)
+        return rows[0] if rows else None
+
+    async def execute(self, query, params=(), timeout=None):
+        def execute(conn):
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+        return await self.run(execute, timeout=timeout)
+
+    async def executemany(self, query, rows, timeout=None):
+        def execute(conn):
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(query, rows)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+        return await self.run(execute, timeout=timeout)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.pool:
+            try:
+                self.pool._remove_connections()
+            except Exception as e:
+                logging.error(f"Error closing database connections: {e}")
+
+
+async def check(config):
+    database = Database(config, timeout=5.0)
+    try:
+        print("SELECT 1 ->", await database.fetchone("SELECT 1"))
+        print("tables ->", [row[0] for row in await database.fetchall("SHOW TABLES")])
+        try:
+            await database.fetchone("SELECT SLEEP(2)", timeout=0.5)
+        except asyncio.TimeoutError:
+            print("timeout -> ok")
+    finally:
+        database.close()
+
+if __name__ == "__main__":
+    # Smoke test against a local MySQL/MariaDB: DELPHI_DB_HOST=127.0.0.1 DELPHI_DB_USER=... python db.py
+    asyncio.run(check({"host": "localhost", "user": "bias76sql", "password": "TestPassword123", "database": "stocksocket", "pool_size": 2}))
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import pandas as pd
+
+DOWNLOAD_BATCH_SIZE = 50
+DOWNLOAD_BATCH_WINDOW = 0.1
+
+
+def split_download(raw, ticker):
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return raw
+    for level in range(raw.columns.nlevels):
+        if ticker in raw.columns.get_level_values(level):
+            return raw.xs(ticker, axis=1, level=level).dropna(how='all')
+    return pd.DataFrame()
+
+
+class DownloadBatcher:
+    def __init__(self, download, executor=None, batch_size=DOWNLOAD_BATCH_SIZE, window=DOWNLOAD_BATCH_WINDOW):
+        self.download = download
+        self.executor = executor
+        self.batch_size = batch_size
+        self.window = window
+        self.pending = {}
+        self.flusher = None
+
+    async def fetch(self, ticker, start=None):
+        loop = asyncio.get_running_loop()
+        request = self.pending.get(ticker)
+        if request is None:
+            request = self.pending[ticker] = {'start': start, 'futures': []}
+        elif start is None or (request['start'] is not None and start < request['start']):
+            request['start'] = start
+        future = loop.create_future()
+        request['futures'].append(future)
+        if self.flusher is None:
+            self.flusher = asyncio.create_task(self.flush())
+        return await future
+
+    async def flush(self):
+        pending = {}
+        try:
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                pending, self.pending = self.pending, {}
+                self.flusher = None
+            full = [ticker for ticker, request in pending.items() if request['start'] is None]
+            tail = sorted((ticker for ticker, request in pending.items() if request['start'] is not None), key=lambda ticker: pending[ticker]['start'])
+            chunks = []
+            for group in (full, tail):
+                for i in range(0, len(group), self.batch_size):
+                    chunks.append(group[i:i + self.batch_size])
+            await asyncio.gather(*(self.run(chunk, pending) for chunk in chunks))
+        finally:
+            # Whatever went wrong above, no caller may be left waiting on its future
+            for ticker, request in pending.items():
+                for future in request['futures']:
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"Download for {ticker} did not complete"))
+
+    async def run(self, tickers, pending):
+        start = pending[tickers[0]]['start']
+        raw = None
+        try:
+            loop = asyncio.get_running_loop()
+            raw = await loop.run_in_executor(self.executor, self.download, tickers, start)
+        except Exception as e:
+            logging.error(f"Error downloading batch {tickers}: {e}")
+        for ticker in tickers:
+            try:
+                frame = split_download(raw, ticker)
+            except Exception as e:
+                logging.error(f"Error splitting download for {ticker}: {e}")
+                frame = pd.DataFrame()
+            for future in pending[ticker]['futures']:
+                if not future.done():
+                    future.set_result(frame)
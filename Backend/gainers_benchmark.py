@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+from tradingview_scraper import lxml_html, parse_gainers_fragment, parse_gainers_lxml, parse_gainers_soup
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'gainers')
+MODES = ('normal', 'premarket', 'aftermarket')
+REPEATS = 10
+
+
+def timed(parser, html, mode, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        gainers = parser(html, mode)
+    return gainers, (time.perf_counter() - start) / repeats * 1000
+
+def run(fixtures_dir=FIXTURES_DIR, repeats=REPEATS):
+    parsers = [('soup_fragment', parse_gainers_fragment)]
+    if lxml_html is not None:
+        parsers.append(('lxml', parse_gainers_lxml))
+    for mode in MODES:
+        with open(os.path.join(fixtures_dir, f"{mode}.html"), encoding='utf-8') as f:
+            html = f.read()
+        expected, soup_ms = timed(parse_gainers_soup, html, mode, repeats)
+        print(f"{mode:12s} size={len(html) / 1024:7.1f}KiB rows={len(expected):4d} soup_page={soup_ms:8.2f}ms")
+        for name, parser in parsers:
+            ms = timed(parser, html, mode, repeats)[1]
+            print(f"{'':12s} {name:14s} {ms:8.2f}ms  x{soup_ms / ms:5.1f}")
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else FIXTURES_DIR)
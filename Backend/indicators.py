@@ -0,0 +1,734 @@
+import math
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from ta import add_all_ta_features
+from scipy.signal import savgol_filter
+
+# Incremental replacement for the add_all_ta_features + smoothing + cpp pipeline.
+# Every column is rebuilt from per-bar state, so a tick only recomputes the bars
+# that changed (normally just the forming one). The formulas mirror ta 0.11 with
+# fillna=True on pandas 2.x, including its quirks: the whole-series mean used to
+# pad shifted series (vortex, trix, dpo, kst, visual ichimoku) and the np.roll
+# wrap-around in KAMA, which are refreshed on every update.
+
+INPUT_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+DERIVED_COLUMNS = ['momentum_ppo_sm', 'momentum_ppo_deg', 'avg_volume', 'volume_ratio', 'ppo_positive', 'cpp', 'cpp_smoothed']
+MIN_BARS = 64
+HEAD_ROWS = 53
+BFILL = 'bfill'
+NOFILL = None
+
+OUTPUT_COLUMNS = [
+    'volume_adi', 'volume_obv', 'volume_cmf', 'volume_fi', 'volume_em', 'volume_sma_em', 'volume_vpt',
+    'volume_vwap', 'volume_mfi', 'volume_nvi', 'volatility_bbm', 'volatility_bbh', 'volatility_bbl',
+    'volatility_bbw', 'volatility_bbp', 'volatility_bbhi', 'volatility_bbli', 'volatility_kcc',
+    'volatility_kch', 'volatility_kcl', 'volatility_kcw', 'volatility_kcp', 'volatility_kchi',
+    'volatility_kcli', 'volatility_dcl', 'volatility_dch', 'volatility_dcm', 'volatility_dcw',
+    'volatility_dcp', 'volatility_atr', 'volatility_ui', 'trend_macd', 'trend_macd_signal',
+    'trend_macd_diff', 'trend_sma_fast', 'trend_sma_slow', 'trend_ema_fast', 'trend_ema_slow',
+    'trend_vortex_ind_pos', 'trend_vortex_ind_neg', 'trend_vortex_ind_diff', 'trend_trix',
+    'trend_mass_index', 'trend_dpo', 'trend_kst', 'trend_kst_sig', 'trend_kst_diff',
+    'trend_ichimoku_conv', 'trend_ichimoku_base', 'trend_ichimoku_a', 'trend_ichimoku_b', 'trend_stc',
+    'trend_adx', 'trend_adx_pos', 'trend_adx_neg', 'trend_cci', 'trend_visual_ichimoku_a',
+    'trend_visual_ichimoku_b', 'trend_aroon_up', 'trend_aroon_down', 'trend_aroon_ind', 'trend_psar_up',
+    'trend_psar_down', 'trend_psar_up_indicator', 'trend_psar_down_indicator', 'momentum_rsi',
+    'momentum_stoch_rsi', 'momentum_stoch_rsi_k', 'momentum_stoch_rsi_d', 'momentum_tsi', 'momentum_uo',
+    'momentum_stoch', 'momentum_stoch_signal', 'momentum_wr', 'momentum_ao', 'momentum_roc',
+    'momentum_ppo', 'momentum_ppo_signal', 'momentum_ppo_hist', 'momentum_pvo', 'momentum_pvo_signal',
+    'momentum_pvo_hist', 'momentum_kama', 'others_dr', 'others_dlr', 'others_cr'
+] + DERIVED_COLUMNS
+
+
+def smooth_out_curve(df, column, window, poly):
+    if window <= poly:
+        window = poly + 1
+    if window % 2 == 0:
+        window += 1
+    if df[column].isna().sum() > 0 or np.isinf(df[column]).sum() > 0:
+        df = df.dropna(subset=[column])
+        df = df[np.isfinite(df[column])]
+    if len(df[column]) < window:
+        return df
+    df[column + '_sm'] = savgol_filter(df[column], window_length=window, polyorder=poly)
+    return df
+
+def calculate_momentum_ppo_deg(df):
+    df['momentum_ppo_diff'] = df['momentum_ppo_sm'].diff()
+    df['momentum_ppo_deg'] = np.degrees(np.arctan(df['momentum_ppo_diff']))
+    df['momentum_ppo_deg'] = df['momentum_ppo_deg'] * (50 / 45)
+    df.drop(columns=['momentum_ppo_diff'], inplace=True)
+    return df
+
+def add_indicators(df):
+    df = add_all_ta_features(df, open="open", high="high", low="low", close="close", volume="volume", fillna=True)
+    df = smooth_out_curve(df, 'momentum_ppo', window=1, poly=1)
+    df = calculate_momentum_ppo_deg(df)
+    df['avg_volume'] = df['volume'].rolling(window=20, min_periods=1).mean()
+    df['volume_ratio'] = df['volume'] / df['avg_volume'].replace(0, np.nan)
+    df['volume_ratio'] = df['volume_ratio'].fillna(1.0).clip(0, 10)
+    df['ppo_positive'] = np.where(df['momentum_ppo_sm'] > 0, df['momentum_ppo_sm'], 0).clip(0, 5)
+    df['cpp'] = (df['volume_cmf'] * 10) + (df['volume_ratio'] * 10) + (df['ppo_positive'] * 10)
+    df['cpp'] = df['cpp'].fillna(0).clip(0, 100)
+    df['cpp_smoothed'] = df['cpp'].ewm(span=3, adjust=False).mean()
+    return df
+
+
+def _windows(x, k, n, w):
+    lo = k - w + 1
+    if lo >= 0:
+        seg = x[lo:n]
+    else:
+        seg = np.concatenate([np.full(-lo, np.nan), x[:n]])
+    seg = np.where(np.isinf(seg), np.nan, seg)
+    return sliding_window_view(seg, w)
+
+def _lag(x, k, n, d, fill=np.nan):
+    out = np.full(n - k, fill, dtype=float)
+    lo = max(k, d)
+    if lo < n:
+        out[lo - k:] = x[lo - d:n - d]
+    return out
+
+
+class TickerIndicators:
+    def __init__(self):
+        self.n = 0
+        self.capacity = 0
+        self.dates = np.empty(0, dtype=object)
+        self.arrays = {}
+        self.settled = -1
+
+    def arr(self, name):
+        a = self.arrays.get(name)
+        if a is None:
+            a = np.full(self.capacity, np.nan)
+            self.arrays[name] = a
+        return a
+
+    def _reserve(self, n):
+        if n <= self.capacity:
+            return
+        capacity = max(n + 256, self.capacity * 2)
+        for name, a in self.arrays.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self.capacity] = a
+            self.arrays[name] = grown
+        dates = np.empty(capacity, dtype=object)
+        dates[:self.capacity] = self.dates
+        self.dates = dates
+        self.capacity = capacity
+
+    def update(self, dates, ohlcv):
+        n = len(dates)
+        m = min(self.n, n)
+        if m == 0 or dates[0] != self.dates[0]:
+            k = 0
+        else:
+            same = (dates[:m] == self.dates[:m]) & (ohlcv[:m] == self.inputs(m)).all(axis=1)
+            k = m if same.all() else int(np.argmin(same))
+        if k == n and n == self.n:
+            return False
+        if k < HEAD_ROWS or k <= self.settled:
+            k = 0
+            self.settled = -1
+        self._reserve(n)
+        self.dates[k:n] = dates[k:n]
+        for j, name in enumerate(INPUT_COLUMNS):
+            self.arr(name)[k:n] = ohlcv[k:n, j]
+        self.n = n
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            if k < n:
+                self._compute(k, n)
+            self._derived(max(min(k, n) - 1, 0), n)
+            self._refresh_head(n)
+        return True
+
+    def inputs(self, m):
+        return np.column_stack([self.arrays[name][:m] for name in INPUT_COLUMNS])
+
+    def frame(self):
+        n = self.n
+        return pd.DataFrame({name: self.arrays[name][:n] for name in OUTPUT_COLUMNS})
+
+    # helpers
+
+    def _put(self, name, k, n, values):
+        self.arr(name)[k:n] = values
+        return self.arrays[name][k:n]
+
+    def _emit(self, name, k, n, raw, fill=0):
+        if fill is NOFILL:
+            self.arr(name)[k:n] = raw
+            return
+        self.arr(name + '~')[k:n] = raw
+        self._fill(name, k, n, fill)
+
+    def _fill(self, name, k, n, fill):
+        raw = self.arrays[name + '~'][k:n]
+        out = self.arr(name)
+        valid = np.isfinite(raw)
+        if valid.all():
+            out[k:n] = raw
+            return
+        pos = np.where(valid, np.arange(n - k), -1)
+        np.maximum.accumulate(pos, out=pos)
+        if k > 0:
+            carry = out[k - 1]
+        else:
+            carry = np.nan if fill == BFILL else fill
+        out[k:n] = np.where(pos >= 0, raw[np.maximum(pos, 0)], carry)
+        if fill == BFILL and np.isnan(carry) and valid.any():
+            first = k + int(np.argmax(valid))
+            out[:first] = raw[first - k]
+            self.settled = max(self.settled, first)
+
+    def _settle(self, name, m, n, fill=0):
+        raw = self.arrays[name + '~']
+        end = m
+        while end < n and not np.isfinite(raw[end]):
+            end += 1
+        self._fill(name, 0, end, fill)
+
+    def _rsum(self, name, k, n, w, min_periods):
+        win = _windows(self.arrays[name], k, n, w)
+        count = np.count_nonzero(~np.isnan(win), axis=1)
+        total = np.nansum(win, axis=1)
+        return np.where(count < min_periods, np.nan, total)
+
+    def _rmean(self, name, k, n, w, min_periods):
+        win = _windows(self.arrays[name], k, n, w)
+        count = np.count_nonzero(~np.isnan(win), axis=1)
+        hi = np.fmax.reduce(win, axis=1)
+        lo = np.fmin.reduce(win, axis=1)
+        mean = np.where(hi == lo, hi, np.nansum(win, axis=1) / count)
+        return np.where((count < max(min_periods, 1)), np.nan, mean)
+
+    def _rstd(self, name, k, n, w, min_periods):
+        # pandas' running variance over the whole series: flat windows then carry the same residue as the batch path
+        std = pd.Series(self.arrays[name][:n]).rolling(w, min_periods=min_periods).std(ddof=0)
+        return std.to_numpy()[k:n]
+
+    def _rmax(self, name, k, n, w, min_periods):
+        win = _windows(self.arrays[name], k, n, w)
+        count = np.count_nonzero(~np.isnan(win), axis=1)
+        return np.where(count < max(min_periods, 1), np.nan, np.fmax.reduce(win, axis=1))
+
+    def _rmin(self, name, k, n, w, min_periods):
+        win = _windows(self.arrays[name], k, n, w)
+        count = np.count_nonzero(~np.isnan(win), axis=1)
+        return np.where(count < max(min_periods, 1), np.nan, np.fmin.reduce(win, axis=1))
+
+    def _ewm(self, src, dst, k, n, alpha):
+        x = self.arrays[src][k:n].tolist()
+        y = self.arr(dst)
+        wt = self.arr(dst + '.wt')
+        if k == 0:
+            w, old = np.nan, 1.0
+        else:
+            w, old = float(y[k - 1]), float(wt[k - 1])
+        decay = 1.0 - alpha
+        ys = []
+        wts = []
+        for i, cur in enumerate(x):
+            if math.isinf(cur):
+                cur = math.nan
+            if k + i == 0:
+                w = cur
+            elif w == w:
+                if cur == cur:
+                    old *= decay
+                    if w != cur:
+                        w = (old * w + alpha * cur) / (old + alpha)
+                    old = 1.0
+                else:
+                    old *= decay
+            elif cur == cur:
+                w = cur
+            ys.append(w)
+            wts.append(old)
+        y[k:n] = ys
+        wt[k:n] = wts
+        return y[k:n]
+
+    def _cumsum(self, name, k, n, terms):
+        total = 0.0 if k == 0 else float(self.arrays['_' + name + '.sum'][k - 1])
+        steps = np.where(np.isnan(terms), 0.0, terms)
+        sums = total + np.cumsum(steps)
+        self._put('_' + name + '.sum', k, n, sums)
+        return np.where(np.isnan(terms), np.nan, sums)
+
+    # indicator groups
+
+    def _compute(self, k, n):
+        a = self.arrays
+        h, l, c, v = a['high'][k:n], a['low'][k:n], a['close'][k:n], a['volume'][k:n]
+        cp = _lag(a['close'], k, n, 1)
+        hp = _lag(a['high'], k, n, 1)
+        lp = _lag(a['low'], k, n, 1)
+
+        # volume
+        clv = ((c - l) - (h - c)) / (h - l)
+        clv = np.where(np.isnan(clv), 0.0, clv)
+        self._emit('volume_adi', k, n, self._cumsum('adi', k, n, clv * v))
+        self._emit('volume_obv', k, n, self._cumsum('obv', k, n, np.where(c < cp, -v, v)))
+        self._put('_mfv', k, n, clv * v)
+        cmf = self._rsum('_mfv', k, n, 20, 0) / self._rsum('volume', k, n, 20, 0)
+        self._emit('volume_cmf', k, n, cmf)
+        self._put('_fi', k, n, (c - cp) * v)
+        self._emit('volume_fi', k, n, self._ewm('_fi', '_fi.ema', k, n, 2 / 14))
+        emv = self._put('_emv', k, n, ((h - hp) + (l - lp)) * (h - l) / (2 * v) * 100000000)
+        self._emit('volume_em', k, n, emv)
+        self._emit('volume_sma_em', k, n, self._rmean('_emv', k, n, 14, 0))
+        self._emit('volume_vpt', k, n, self._cumsum('vpt', k, n, (c / cp - 1) * v))
+        tp = self._put('_tp', k, n, (h + l + c) / 3.0)
+        self._put('_tpv', k, n, tp * v)
+        self._emit('volume_vwap', k, n, self._rsum('_tpv', k, n, 14, 0) / self._rsum('volume', k, n, 14, 0))
+        tpp = _lag(a['_tp'], k, n, 1)
+        up_down = np.where(tp > tpp, 1, np.where(tp < tpp, -1, 0))
+        self._put('_mfr', k, n, tp * v * up_down)
+        win = _windows(a['_mfr'], k, n, 14)
+        positive = np.sum(np.where(win >= 0.0, win, 0.0), axis=1)
+        negative = np.abs(np.sum(np.where(win < 0.0, win, 0.0), axis=1))
+        self._emit('volume_mfi', k, n, 100 - 100 / (1 + positive / negative), 50)
+        self._nvi(k, n)
+
+        # volatility
+        mavg = self._rmean('close', k, n, 20, 0)
+        mstd = self._rstd('close', k, n, 20, 0)
+        hband = mavg + 2 * mstd
+        lband = mavg - 2 * mstd
+        self._emit('volatility_bbm', k, n, mavg, BFILL)
+        self._emit('volatility_bbh', k, n, hband, BFILL)
+        self._emit('volatility_bbl', k, n, lband, BFILL)
+        self._emit('volatility_bbw', k, n, (hband - lband) / mavg * 100)
+        self._emit('volatility_bbp', k, n, (c - lband) / np.where(hband != lband, hband - lband, np.nan))
+        self._emit('volatility_bbhi', k, n, np.where(c > hband, 1.0, 0.0))
+        self._emit('volatility_bbli', k, n, np.where(c < lband, 1.0, 0.0))
+        self._put('_kch', k, n, (4 * h - 2 * l + c) / 3.0)
+        self._put('_kcl', k, n, (-2 * h + 4 * l + c) / 3.0)
+        kc_mid = self._rmean('_tp', k, n, 10, 1)
+        kc_high = self._rmean('_kch', k, n, 10, 0)
+        kc_low = self._rmean('_kcl', k, n, 10, 0)
+        self._emit('volatility_kcc', k, n, kc_mid, BFILL)
+        self._emit('volatility_kch', k, n, kc_high, BFILL)
+        self._emit('volatility_kcl', k, n, kc_low, BFILL)
+        self._emit('volatility_kcw', k, n, (kc_high - kc_low) / kc_mid * 100)
+        self._emit('volatility_kcp', k, n, (c - kc_low) / (kc_high - kc_low))
+        self._emit('volatility_kchi', k, n, np.where(c > kc_high, 1.0, 0.0))
+        self._emit('volatility_kcli', k, n, np.where(c < kc_low, 1.0, 0.0))
+        dc_high = self._rmax('high', k, n, 20, 1)
+        dc_low = self._rmin('low', k, n, 20, 1)
+        self._emit('volatility_dcl', k, n, dc_low, BFILL)
+        self._emit('volatility_dch', k, n, dc_high, BFILL)
+        self._emit('volatility_dcm', k, n, (dc_high - dc_low) / 2.0 + dc_low, BFILL)
+        self._emit('volatility_dcw', k, n, (dc_high - dc_low) / self._rmean('close', k, n, 20, 1) * 100)
+        self._emit('volatility_dcp', k, n, (c - dc_low) / (dc_high - dc_low))
+        self._put('_tr', k, n, np.fmax(np.fmax(h - l, np.abs(h - cp)), np.abs(l - cp)))
+        self._atr(k, n)
+        ui_max = self._rmax('close', k, n, 14, 1)
+        self._put('_ui', k, n, 100 * (c - ui_max) / ui_max)
+        win = _windows(a['_ui'], k, n, 14)
+        self._emit('volatility_ui', k, n, np.sqrt(np.sum(win ** 2 / 14, axis=1)))
+
+        # trend
+        ema_fast = self._ewm('close', '_ema12', k, n, 2 / 13)
+        ema_slow = self._ewm('close', '_ema26', k, n, 2 / 27)
+        macd = self._put('_macd', k, n, ema_fast - ema_slow)
+        macd_signal = self._ewm('_macd', '_macd.sig', k, n, 2 / 10)
+        self._emit('trend_macd', k, n, macd)
+        self._emit('trend_macd_signal', k, n, macd_signal)
+        self._emit('trend_macd_diff', k, n, macd - macd_signal)
+        self._emit('trend_sma_fast', k, n, self._rmean('close', k, n, 12, 0), NOFILL)
+        self._emit('trend_sma_slow', k, n, self._rmean('close', k, n, 26, 0), NOFILL)
+        self._emit('trend_ema_fast', k, n, ema_fast, NOFILL)
+        self._emit('trend_ema_slow', k, n, ema_slow, NOFILL)
+        self._put('_vmp', k, n, np.abs(h - lp))
+        self._put('_vmm', k, n, np.abs(l - hp))
+        self._vortex(k, n)
+        self._ewm('close', '_trix1', k, n, 2 / 16)
+        self._ewm('_trix1', '_trix2', k, n, 2 / 16)
+        self._ewm('_trix2', '_trix3', k, n, 2 / 16)
+        self._trix(k, n)
+        self._put('_amp', k, n, h - l)
+        m1 = self._ewm('_amp', '_mass1', k, n, 2 / 10)
+        m2 = self._ewm('_mass1', '_mass2', k, n, 2 / 10)
+        self._put('_mass', k, n, m1 / m2)
+        self._emit('trend_mass_index', k, n, self._rsum('_mass', k, n, 25, 0))
+        self._dpo(k, n)
+        self._kst(k, n)
+        conv = 0.5 * (self._rmax('high', k, n, 9, 0) + self._rmin('low', k, n, 9, 0))
+        base = 0.5 * (self._rmax('high', k, n, 26, 0) + self._rmin('low', k, n, 26, 0))
+        span_a = self._put('_span_a', k, n, 0.5 * (conv + base))
+        span_b = self._put('_span_b', k, n, 0.5 * (self._rmax('high', k, n, 52, 0) + self._rmin('low', k, n, 52, 0)))
+        self._emit('trend_ichimoku_conv', k, n, conv, BFILL)
+        self._emit('trend_ichimoku_base', k, n, base, BFILL)
+        self._emit('trend_ichimoku_a', k, n, span_a, BFILL)
+        self._emit('trend_ichimoku_b', k, n, span_b, BFILL)
+        stc_fast = self._ewm('close', '_ema23', k, n, 2 / 24)
+        stc_slow = self._ewm('close', '_ema50', k, n, 2 / 51)
+        self._put('_stc_macd', k, n, stc_fast - stc_slow)
+        macd_min = self._rmin('_stc_macd', k, n, 10, 10)
+        macd_max = self._rmax('_stc_macd', k, n, 10, 10)
+        self._put('_stc_k', k, n, 100 * (a['_stc_macd'][k:n] - macd_min) / (macd_max - macd_min))
+        stoch_d = self._ewm('_stc_k', '_stc_d', k, n, 2 / 4)
+        d_min = self._rmin('_stc_d', k, n, 10, 10)
+        d_max = self._rmax('_stc_d', k, n, 10, 10)
+        self._put('_stc_kd', k, n, 100 * (stoch_d - d_min) / (d_max - d_min))
+        self._emit('trend_stc', k, n, self._ewm('_stc_kd', '_stc', k, n, 2 / 4))
+        self._adx(k, n)
+        cci_win = _windows(a['_tp'], k, n, 20)
+        mad = np.nanmean(np.abs(cci_win - np.nanmean(cci_win, axis=1)[:, None]), axis=1)
+        self._emit('trend_cci', k, n, (tp - self._rmean('_tp', k, n, 20, 0)) / (0.015 * mad))
+        self._visual_ichimoku(k, n)
+        self._aroon(k, n)
+        self._psar(k, n)
+
+        # momentum
+        diff = c - cp
+        self._put('_rsi_up', k, n, np.where(diff > 0, diff, 0.0))
+        self._put('_rsi_dn', k, n, -np.where(diff < 0, diff, 0.0))
+        ema_up = self._ewm('_rsi_up', '_rsi_up.ema', k, n, 1 / 14)
+        ema_dn = self._ewm('_rsi_dn', '_rsi_dn.ema', k, n, 1 / 14)
+        self._emit('momentum_rsi', k, n, np.where(ema_dn == 0, 100, 100 - 100 / (1 + ema_up / ema_dn)), 50)
+        rsi = a['momentum_rsi'][k:n]
+        rsi_low = self._rmin('momentum_rsi', k, n, 14, 14)
+        rsi_high = self._rmax('momentum_rsi', k, n, 14, 14)
+        self._emit('momentum_stoch_rsi', k, n, (rsi - rsi_low) / (rsi_high - rsi_low))
+        self._emit('momentum_stoch_rsi_k', k, n, self._rmean('momentum_stoch_rsi~', k, n, 3, 3))
+        self._emit('momentum_stoch_rsi_d', k, n, self._rmean('momentum_stoch_rsi_k~', k, n, 3, 3))
+        self._put('_tsi', k, n, diff)
+        self._put('_tsi_abs', k, n, np.abs(diff))
+        self._ewm('_tsi', '_tsi1', k, n, 2 / 26)
+        smoothed = self._ewm('_tsi1', '_tsi2', k, n, 2 / 14)
+        self._ewm('_tsi_abs', '_tsi_abs1', k, n, 2 / 26)
+        smoothed_abs = self._ewm('_tsi_abs1', '_tsi_abs2', k, n, 2 / 14)
+        self._emit('momentum_tsi', k, n, smoothed / smoothed_abs * 100)
+        self._put('_bp', k, n, c - np.minimum(l, cp))
+        avg_s = self._rsum('_bp', k, n, 7, 0) / self._rsum('_tr', k, n, 7, 0)
+        avg_m = self._rsum('_bp', k, n, 14, 0) / self._rsum('_tr', k, n, 14, 0)
+        avg_l = self._rsum('_bp', k, n, 28, 0) / self._rsum('_tr', k, n, 28, 0)
+        self._emit('momentum_uo', k, n, 100.0 * (4.0 * avg_s + 2.0 * avg_m + 1.0 * avg_l) / 7.0, 50)
+        smin = self._rmin('low', k, n, 14, 0)
+        smax = self._rmax('high', k, n, 14, 0)
+        self._emit('momentum_stoch', k, n, 100 * (c - smin) / (smax - smin), 50)
+        self._emit('momentum_stoch_signal', k, n, self._rmean('momentum_stoch~', k, n, 3, 0), 50)
+        self._emit('momentum_wr', k, n, -100 * (smax - c) / (smax - smin), -50)
+        self._put('_median', k, n, 0.5 * (h + l))
+        self._emit('momentum_ao', k, n, self._rmean('_median', k, n, 5, 0) - self._rmean('_median', k, n, 34, 0))
+        c12 = _lag(a['close'], k, n, 12)
+        self._emit('momentum_roc', k, n, (c - c12) / c12 * 100)
+        ppo = self._put('_ppo', k, n, (ema_fast - ema_slow) / ema_slow * 100)
+        ppo_signal = self._ewm('_ppo', '_ppo.sig', k, n, 2 / 10)
+        self._emit('momentum_ppo', k, n, ppo)
+        self._emit('momentum_ppo_signal', k, n, ppo_signal)
+        self._emit('momentum_ppo_hist', k, n, ppo - ppo_signal)
+        vol_fast = self._ewm('volume', '_vema12', k, n, 2 / 13)
+        vol_slow = self._ewm('volume', '_vema26', k, n, 2 / 27)
+        pvo = self._put('_pvo', k, n, (vol_fast - vol_slow) / vol_slow * 100)
+        pvo_signal = self._ewm('_pvo', '_pvo.sig', k, n, 2 / 10)
+        self._emit('momentum_pvo', k, n, pvo)
+        self._emit('momentum_pvo_signal', k, n, pvo_signal)
+        self._emit('momentum_pvo_hist', k, n, pvo - pvo_signal)
+        self._kama_tail(k, n)
+
+        # others
+        self._emit('others_dr', k, n, (c / cp - 1) * 100)
+        self._emit('others_dlr', k, n, (np.log(c) - np.log(cp)) * 100)
+        self._emit('others_cr', k, n, (c / a['close'][0] - 1) * 100, BFILL)
+
+    def _nvi(self, k, n):
+        c = self.arrays['close'][:n].tolist()
+        v = self.arrays['volume'][:n].tolist()
+        nvi = self.arr('volume_nvi~')
+        prev = 1000.0 if k == 0 else float(nvi[k - 1])
+        values = []
+        for i in range(k, n):
+            if i == 0:
+                prev = 1000.0
+            elif v[i - 1] > v[i]:
+                prev = prev * (1.0 + (c[i] / c[i - 1] - 1))
+            values.append(prev)
+        nvi[k:n] = values
+        self._fill('volume_nvi', k, n, 1000)
+
+    def _atr(self, k, n):
+        tr = self.arrays['_tr']
+        atr = self.arr('volatility_atr~')
+        values = atr[:k].tolist()
+        trs = tr[:n].tolist()
+        for i in range(k, n):
+            if i < 9:
+                values.append(0.0)
+            elif i == 9:
+                values.append(float(np.nanmean(tr[0:10])))
+            else:
+                values.append((values[i - 1] * 9 + trs[i]) / 10.0)
+        atr[k:n] = values[k:n]
+        self._fill('volatility_atr', k, n, 0)
+
+    def _vortex(self, k, n):
+        a = self.arrays
+        h, l = a['high'][k:n], a['low'][k:n]
+        cp = _lag(a['close'], k, n, 1, fill=a['close'][:self.n].mean())
+        self._put('_trv', k, n, np.fmax(np.fmax(h - l, np.abs(h - cp)), np.abs(l - cp)))
+        trn = self._rsum('_trv', k, n, 14, 0)
+        vip = self._rsum('_vmp', k, n, 14, 0) / trn
+        vin = self._rsum('_vmm', k, n, 14, 0) / trn
+        self._emit('trend_vortex_ind_pos', k, n, vip, 1)
+        self._emit('trend_vortex_ind_neg', k, n, vin, 1)
+        self._emit('trend_vortex_ind_diff', k, n, vip - vin)
+
+    def _trix(self, k, n):
+        e3 = self.arrays['_trix3']
+        prev = _lag(e3, k, n, 1, fill=np.nanmean(e3[:self.n]))
+        self._emit('trend_trix', k, n, (e3[k:n] - prev) / prev * 100)
+
+    def _dpo(self, k, n):
+        close = self.arrays['close']
+        shifted = _lag(close, k, n, 11, fill=close[:self.n].mean())
+        self._emit('trend_dpo', k, n, shifted - self._rmean('close', k, n, 20, 0))
+
+    def _kst(self, k, n):
+        close = self.arrays['close']
+        mean = close[:self.n].mean()
+        lo = max(k - 14, 0)
+        kst = 0
+        for weight, (roc, window) in enumerate(((10, 10), (15, 10), (20, 10), (30, 15)), start=1):
+            shifted = _lag(close, lo, n, roc, fill=mean)
+            self._put('_roc%d' % roc, lo, n, (close[lo:n] - shifted) / shifted)
+            kst = kst + weight * self._rmean('_roc%d' % roc, k, n, window, 0)
+        kst = self._put('_kst', k, n, 100 * kst)
+        kst_sig = self._rmean('_kst', k, n, 9, 0)
+        self._emit('trend_kst', k, n, kst)
+        self._emit('trend_kst_sig', k, n, kst_sig)
+        self._emit('trend_kst_diff', k, n, kst - kst_sig)
+
+    def _visual_ichimoku(self, k, n):
+        span_a = self.arrays['_span_a']
+        span_b = self.arrays['_span_b']
+        self._emit('trend_visual_ichimoku_a', k, n, _lag(span_a, k, n, 26, fill=np.nanmean(span_a[:self.n])), BFILL)
+        self._emit('trend_visual_ichimoku_b', k, n, _lag(span_b, k, n, 26, fill=np.nanmean(span_b[:self.n])), BFILL)
+
+    def _adx(self, k, n):
+        a = self.arrays
+        h, l = a['high'][k:n], a['low'][k:n]
+        cp = _lag(a['close'], k, n, 1)
+        self._put('_ddm', k, n, np.maximum(h, cp) - np.minimum(l, cp))
+        diff_up = h - _lag(a['high'], k, n, 1)
+        diff_down = _lag(a['low'], k, n, 1) - l
+        self._put('_dmp', k, n, np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up))
+        self._put('_dmn', k, n, np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down))
+        smoothed = {}
+        for src in ('_ddm', '_dmp', '_dmn'):
+            x = a[src]
+            out = self.arr(src + '.s')
+            values = out[:k].tolist() if k > 0 else [np.nan] * 14
+            xs = x[:n].tolist()
+            for i in range(max(k, 14), n):
+                if i == 14:
+                    seed = x[:n][~np.isnan(x[:n])][:14]
+                    values.append(float(seed.sum()))
+                else:
+                    values.append(values[i - 1] - values[i - 1] / 14.0 + xs[i])
+            out[k:n] = values[k:n]
+            smoothed[src] = out[k:n]
+        trs = smoothed['_ddm']
+        dip = np.where(trs != 0, 100 * (smoothed['_dmp'] / trs), 0)
+        din = np.where(trs != 0, 100 * (smoothed['_dmn'] / trs), 0)
+        rows = np.arange(k, n)
+        self._put('_di', k, n, np.where(dip + din != 0, 100 * np.abs((dip - din) / (dip + din)), 0))
+        adx = self.arr('trend_adx~')
+        values = adx[:k].tolist()
+        dis = a['_di'][:n].tolist()
+        for i in range(k, n):
+            if i < 27:
+                values.append(0.0)
+            elif i == 27:
+                values.append(float(np.mean(a['_di'][14:28])))
+            else:
+                values.append((values[i - 1] * 13 + dis[i]) / 14.0)
+        adx[k:n] = values[k:n]
+        self._fill('trend_adx', k, n, 20)
+        self._emit('trend_adx_pos', k, n, np.where(rows >= 15, dip, 0.0), 20)
+        self._emit('trend_adx_neg', k, n, np.where(rows >= 15, din, 0.0), 20)
+
+    def _aroon(self, k, n):
+        a = self.arrays
+        rows = np.arange(k, n)
+        pad = np.maximum(25 - rows, 0)
+        high = _windows(a['high'], k, n, 26)
+        low = _windows(a['low'], k, n, 26)
+        up = (np.argmax(np.where(np.isnan(high), -np.inf, high), axis=1) - pad) / 25 * 100
+        down = (np.argmin(np.where(np.isnan(low), np.inf, low), axis=1) - pad) / 25 * 100
+        self._emit('trend_aroon_up', k, n, up.astype(float))
+        self._emit('trend_aroon_down', k, n, down.astype(float))
+        self._emit('trend_aroon_ind', k, n, (up - down).astype(float))
+
+    def _psar(self, k, n):
+        a = self.arrays
+        high = a['high'][:n].tolist()
+        low = a['low'][:n].tolist()
+        psar = a['close'][:n].tolist()
+        state = [self.arr(name) for name in ('_psar', '_psar.up', '_psar.af', '_psar.high', '_psar.low')]
+        if k < 2:
+            k = 0
+            up_trend, af, trend_high, trend_low = True, 0.02, high[0], low[0]
+        else:
+            psar[:k] = state[0][:k].tolist()
+            up_trend, af, trend_high, trend_low = bool(state[1][k - 1]), float(state[2][k - 1]), float(state[3][k - 1]), float(state[4][k - 1])
+        up_raw = self.arr('trend_psar_up~')
+        down_raw = self.arr('trend_psar_down~')
+        for i in range(k, n):
+            if i >= 2:
+                reversal = False
+                max_high = high[i]
+                min_low = low[i]
+                if up_trend:
+                    psar[i] = psar[i - 1] + af * (trend_high - psar[i - 1])
+                    if min_low < psar[i]:
+                        reversal = True
+                        psar[i] = trend_high
+                        trend_low = min_low
+                        af = 0.02
+                    else:
+                        if max_high > trend_high:
+                            trend_high = max_high
+                            af = min(af + 0.02, 0.2)
+                        if low[i - 2] < psar[i]:
+                            psar[i] = low[i - 2]
+                        elif low[i - 1] < psar[i]:
+                            psar[i] = low[i - 1]
+                else:
+                    psar[i] = psar[i - 1] - af * (psar[i - 1] - trend_low)
+                    if max_high > psar[i]:
+                        reversal = True
+                        psar[i] = trend_low
+                        trend_high = max_high
+                        af = 0.02
+                    else:
+                        if min_low < trend_low:
+                            trend_low = min_low
+                            af = min(af + 0.02, 0.2)
+                        if high[i - 2] > psar[i]:
+                            psar[i] = high[i - 2]
+                        elif high[i - 1] > psar[i]:
+                            psar[i] = high[i - 1]
+                up_trend = up_trend != reversal
+                up_raw[i] = psar[i] if up_trend else np.nan
+                down_raw[i] = np.nan if up_trend else psar[i]
+            else:
+                up_raw[i] = np.nan
+                down_raw[i] = np.nan
+            state[0][i] = psar[i]
+            state[1][i] = up_trend
+            state[2][i] = af
+            state[3][i] = trend_high
+            state[4][i] = trend_low
+        self._fill('trend_psar_up', k, n, BFILL)
+        self._fill('trend_psar_down', k, n, BFILL)
+        up, up_prev = up_raw[k:n], _lag(up_raw, k, n, 1)
+        down, down_prev = down_raw[k:n], _lag(down_raw, k, n, 1)
+        self._emit('trend_psar_up_indicator', k, n, np.where(~np.isnan(up) & np.isnan(up_prev) & (up != 0), 1.0, 0.0), NOFILL)
+        self._emit('trend_psar_down_indicator', k, n, np.where(~np.isnan(down) & np.isnan(down_prev), 1.0, 0.0), NOFILL)
+
+    def _kama_tail(self, k, n):
+        a = self.arrays
+        lo = max(k, 1)
+        close = a['close']
+        self._put('_kama_vol', lo, n, np.abs(close[lo:n] - close[lo - 1:n - 1]))
+        lo = max(k, 10)
+        if lo >= n:
+            return
+        er_num = np.abs(close[lo:n] - close[lo - 10:n - 10])
+        er_den = self._rsum('_kama_vol', lo, n, 10, 0)
+        er = np.divide(er_num, er_den, out=np.zeros_like(er_num), where=er_den != 0)
+        sc = (er * (2.0 / 3 - 2.0 / 31.0) + 2 / 31.0) ** 2.0
+        closes = close[lo:n].tolist()
+        scale = self.arr('_kama.a')
+        shift = self.arr('_kama.b')
+        if lo == 10:
+            s, b = 1.0, 0.0
+        else:
+            s, b = float(scale[lo - 1]), float(shift[lo - 1])
+        scales = []
+        shifts = []
+        for x, f in zip(closes, sc.tolist()):
+            s = s * (1 - f)
+            b = b + f * (x - b)
+            scales.append(s)
+            shifts.append(b)
+        scale[lo:n] = scales
+        shift[lo:n] = shifts
+
+    def _kama_head(self, n):
+        close = self.arrays['close'][:n]
+        rolled = np.roll(close, 10)[:10]
+        vol = np.abs(close[:10] - np.roll(close, 1)[:10])
+        er_den = np.cumsum(vol)
+        er_num = np.abs(close[:10] - rolled)
+        er = np.divide(er_num, er_den, out=np.zeros_like(er_num), where=er_den != 0)
+        sc = (er * (2.0 / 3 - 2.0 / 31.0) + 2 / 31.0) ** 2.0
+        kama = self.arr('momentum_kama')
+        value = close[0]
+        kama[0] = value
+        for i in range(1, 10):
+            value = value + sc[i] * (close[i] - value)
+            kama[i] = value
+        kama[10:n] = self.arrays['_kama.a'][10:n] * value + self.arrays['_kama.b'][10:n]
+
+    def _derived(self, k, n):
+        a = self.arrays
+        ppo = a['momentum_ppo']
+        rows = np.arange(k, n)
+        prev = ppo[np.maximum(rows - 1, 0)]
+        nxt = ppo[np.minimum(rows + 1, n - 1)]
+        sm = (prev + ppo[k:n] + nxt) / 3
+        if k == 0:
+            sm[0] = (5 * ppo[0] + 2 * ppo[1] - ppo[2]) / 6
+        sm[-1] = (5 * ppo[n - 1] + 2 * ppo[n - 2] - ppo[n - 3]) / 6
+        sm = self._put('momentum_ppo_sm', k, n, sm)
+        sm_prev = _lag(a['momentum_ppo_sm'], k, n, 1)
+        self._put('momentum_ppo_deg', k, n, np.degrees(np.arctan(sm - sm_prev)) * (50 / 45))
+        avg_volume = self._put('avg_volume', k, n, self._rmean('volume', k, n, 20, 1))
+        volume_ratio = a['volume'][k:n] / np.where(avg_volume == 0, np.nan, avg_volume)
+        volume_ratio = self._put('volume_ratio', k, n, np.clip(np.where(np.isnan(volume_ratio), 1.0, volume_ratio), 0, 10))
+        ppo_positive = self._put('ppo_positive', k, n, np.clip(np.where(sm > 0, sm, 0), 0, 5))
+        cpp = (a['volume_cmf'][k:n] * 10) + (volume_ratio * 10) + (ppo_positive * 10)
+        self._put('cpp', k, n, np.clip(np.where(np.isnan(cpp), 0, cpp), 0, 100))
+        self._ewm('cpp', 'cpp_smoothed', k, n, 2 / 4)
+
+    def _refresh_head(self, n):
+        m = min(HEAD_ROWS, n)
+        self._vortex(0, min(14, n))
+        self._trix(0, 1)
+        self._dpo(0, min(11, n))
+        self._kst(0, m)
+        self._visual_ichimoku(0, min(26, n))
+        self._kama_head(n)
+        for name in ('trend_vortex_ind_pos', 'trend_vortex_ind_neg'):
+            self._settle(name, min(14, n), n, 1)
+        self._settle('trend_vortex_ind_diff', min(14, n), n)
+        self._settle('trend_trix', 1, n)
+        self._settle('trend_dpo', min(11, n), n)
+        for name in ('trend_kst', 'trend_kst_sig', 'trend_kst_diff'):
+            self._settle(name, m, n)
+
+
+class IndicatorEngine:
+    def __init__(self):
+        self.states = {}
+
+    def update(self, ticker, df):
+        df = df.reset_index(drop=True)
+        if len(df) < MIN_BARS:
+            self.states.pop(ticker, None)
+            return add_indicators(df)
+        state = self.states.get(ticker)
+        if state is None:
+            state = self.states[ticker] = TickerIndicators()
+        state.update(df['date'].to_numpy(dtype=object), df[INPUT_COLUMNS].to_numpy(dtype=float))
+        return pd.concat([df, state.frame()], axis=1)
+
+    def discard(self, ticker):
+        self.states.pop(ticker, None)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import numpy as np
+from model_registry import MODEL_SESSIONS
+
+INFERENCE_BATCH_WINDOW = 0.05
+INFERENCE_STATS_WINDOW = 500
+INFERENCE_ROUTES = MODEL_SESSIONS + ('closed',)
+
+
+class InferenceService:
+    def __init__(self, registry, executor=None, window=INFERENCE_BATCH_WINDOW, stats_window=INFERENCE_STATS_WINDOW):
+        self.registry = registry
+        self.executor = executor
+        self.window = window
+        self.pending = []
+        self.flusher = None
+        self.flushes = set()
+        self.batches = deque(maxlen=stats_window)
+
+    def versions(self):
+        versions = {}
+        for session in INFERENCE_ROUTES:
+            entry = self.registry.get(session)
+            if entry is not None:
+                versions[session] = entry['version']
+        return versions
+
+    async def predict(self, X, sessions):
+        if len(X) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=float), np.full(0, None, dtype=object)
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((X, sessions, future))
+        if self.flusher is None:
+            self.flusher = asyncio.create_task(self.flush())
+            self.flushes.add(self.flusher)
+            self.flusher.add_done_callback(self.flushes.discard)
+        return await future
+
+    async def flush(self):
+        pending = []
+        try:
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                pending, self.pending = self.pending, []
+                self.flusher = None
+            X = np.concatenate([request[0] for request in pending])
+            sessions = np.concatenate([request[1] for request in pending])
+            start = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                prediction, prediction_values, versions = await loop.run_in_executor(self.executor, self.run, X, sessions)
+            except Exception as e:
+                logging.error(f"Error running batched inference: {e}")
+                prediction = np.zeros(len(X), dtype=int)
+                prediction_values = np.zeros(len(X), dtype=float)
+                versions = np.full(len(X), None, dtype=object)
+            self.batches.append((len(pending), len(X), time.perf_counter() - start))
+            offset = 0
+            for request_X, request_sessions, future in pending:
+                end = offset + len(request_X)
+                if not future.done():
+                    future.set_result((prediction[offset:end], prediction_values[offset:end], versions[offset:end]))
+                offset = end
+        finally:
+            # Covers shutdown cancelling a batch that is already in the executor
+            for request in pending:
+                if not request[2].done():
+                    request[2].cancel()
+
+    def run(self, X, sessions):
+        prediction = np.zeros(len(X), dtype=int)
+        prediction_values = np.zeros(len(X), dtype=float)
+        versions = np.full(len(X), None, dtype=object)
+        for session in dict.fromkeys(sessions):
+            entry = self.registry.get(session)
+            if entry is None:
+                continue
+            mask = sessions == session
+            try:
+                probabilities = entry['model'].predict_proba(entry['scaler'].transform(X[mask]))
+                best = np.argmax(probabilities, axis=1)
+                prediction[mask] = np.asarray(entry['model'].classes_)[best].astype(int)
+                prediction_values[mask] = probabilities[np.arange(len(best)), best]
+                versions[mask] = entry['version']
+            except Exception as e:
+                logging.error(f"Error predicting {session} patterns with {entry['version']}: {e}")
+        return prediction, prediction_values, versions
+
+    def stats(self):
+        if not self.batches:
+            return {'batches': 0, 'windows': 0, 'mean_batch_size': 0.0, 'max_batch_size': 0, 'mean_tickers': 0.0, 'mean_latency_ms': 0.0, 'p99_latency_ms': 0.0}
+        sizes = [windows for tickers, windows, latency in self.batches]
+        latencies = sorted(latency for tickers, windows, latency in self.batches)
+        return {
+            'batches': len(self.batches),
+            'windows': sum(sizes),
+            'mean_batch_size': round(sum(sizes) / len(sizes), 2),
+            'max_batch_size': max(sizes),
+            'mean_tickers': round(sum(tickers for tickers, windows, latency in self.batches) / len(self.batches), 2),
+            'mean_latency_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p99_latency_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3)
+        }
+
+    async def shutdown(self):
+        for task in self.flushes:
+            task.cancel()
+        self.flushes.clear()
+        self.flusher = None
+        for request in self.pending:
+            if not request[2].done():
+                request[2].cancel()
+        self.pending.clear()
+        self.batches.clear()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+# group: (keys, ttl seconds, source). Only expired groups are refreshed, each from its own source, so the
+# cheap quote fields never drag a full .info request along with them
+INFO_FIELD_GROUPS = {
+    'static': (['sector', 'industry', 'country', 'exchange', 'quoteType', 'currency', 'beta', 'longName', 'shortName'], 86400, 'info'),
+    'session': (['previousClose', 'open', 'averageVolume'], 900, 'info'),
+    'book': (['bidSize', 'askSize', 'bid', 'ask'], 60, 'info'),
+    'quote': (['dayHigh', 'dayLow'], 5, 'fast_info')
+}
+INFO_CACHE_SIZE = 256
+INFO_RETRY_SECONDS = 30
+
+
+class TickerInfoCache:
+    def __init__(self, fetchers, groups=INFO_FIELD_GROUPS, max_size=INFO_CACHE_SIZE, retry_seconds=INFO_RETRY_SECONDS, executor=None):
+        self.fetchers = fetchers
+        self.groups = groups
+        self.max_size = max_size
+        self.retry_seconds = retry_seconds
+        self.executor = executor
+        self.entries = OrderedDict()
+        self.inflight = {}
+
+    def expired(self, entry, now):
+        return [group for group, (keys, ttl, source) in self.groups.items() if now - entry['fetched'].get(group, 0) >= ttl]
+
+    def get(self, ticker):
+        now = time.time()
+        entry = self.entries.get(ticker)
+        if entry is None:
+            entry = {'values': {}, 'fetched': {}, 'failed': 0.0}
+            self.entries[ticker] = entry
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(ticker)
+        if self.expired(entry, now) and now - entry['failed'] >= self.retry_seconds:
+            self.refresh(ticker)
+        return dict(entry['values'])
+
+    def refresh(self, ticker):
+        task = self.inflight.get(ticker)
+        if task is None:
+            task = asyncio.create_task(self._refresh(ticker))
+            self.inflight[ticker] = task
+        return task
+
+    async def _refresh(self, ticker):
+        try:
+            loop = asyncio.get_running_loop()
+            entry = self.entries.get(ticker)
+            if entry is None:
+                return
+            sources = {}
+            for group in self.expired(entry, time.time()):
+                sources.setdefault(self.groups[group][2], []).append(group)
+            for source, groups in sources.items():
+                keys = [key for group in groups for key in self.groups[group][0]]
+                values = await loop.run_in_executor(self.executor, self.fetchers[source], ticker, keys)
+                entry = self.entries.get(ticker)
+                if entry is None:
+                    return
+                now = time.time()
+                for group in groups:
+                    for key in self.groups[group][0]:
+                        if key in values:
+                            entry['values'][key] = values.get(key)
+                        else:
+                            entry['values'].pop(key, None)
+                    entry['fetched'][group] = now
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching detailed info for {ticker}: {e}")
+            entry = self.entries.get(ticker)
+            if entry is not None:
+                entry['failed'] = time.time()
+        finally:
+            if self.inflight.get(ticker) is asyncio.current_task():
+                del self.inflight[ticker]
+
+    async def shutdown(self):
+        for task in self.inflight.values():
+            task.cancel()
+        self.inflight.clear()
+        self.entries.clear()
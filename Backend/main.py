@@ -6,19 +6,20 @@ from contextlib import asynccontextmanager
 import asyncio
 import yfinance as yf
 import pandas as pd
-import numpy as np
-from ta import add_all_ta_features
-from scipy.signal import savgol_filter
-import mysql.connector
-from mysql.connector import Error
-from mysql.connector.pooling import MySQLConnectionPool
-import joblib
-from datetime import datetime, timedelta
-import pytz
 from concurrent.futures import ThreadPoolExecutor
+from candle_store import CandleStore
+from db import Database
+from download_batcher import DownloadBatcher
+from info_cache import TickerInfoCache
+from classification_index import ClassificationIndex
+from market_calendar import FetchScheduler
+from compute import ComputePool
+from model_registry import ModelRegistry
+from inference import InferenceService
+from loop_monitor import LoopLagMonitor
+from wire import FORMATS, encode_frame, diff_frames
 
 # Configuration
-FETCH_INTERVAL = 1.0
 DB_CONFIG = {
     "host": "localhost",
     "user": "bias76sql",
@@ -26,364 +27,320 @@ DB_CONFIG = {
     "database": "stocksocket",
     "pool_size": 5
 }
+MODEL_DIR = "/home/bias76/delphi/models"
 MODEL_PATH = "/home/bias76/delphi/models/delphi_stock_model.pkl"
 FALLBACK_MODEL_PATH = "/home/bias76/delphi/models/delphi_stock_model.pkl"
-PATTERN_LENGTH = 5
+MAX_WATCHLIST_SIZE = 25
+WATCHLIST_BATCH_WINDOW = 0.2
+DOWNLOAD_BATCH_SIZE = 50
+DOWNLOAD_BATCH_WINDOW = 0.1
+CANDLE_STORE_PATH = "/home/bias76/delphi/data/candles.sqlite"
+compute_pool = ComputePool()
 executor = ThreadPoolExecutor(max_workers=10)
-try:
-    db_pool = MySQLConnectionPool(**DB_CONFIG)
-except Error as e:
-    db_pool = None
-
-MODEL = None
-SCALER = None
-try:
-    model_data = joblib.load(MODEL_PATH)
-    MODEL = model_data['model']
-    SCALER = model_data['scaler']
-except Exception as e:
-    try:
-        model_data = joblib.load(FALLBACK_MODEL_PATH)
-        MODEL = model_data['model']
-        SCALER = model_data['scaler']
-    except Exception as fallback_e:
-        MODEL = None
-        SCALER = None
-
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["https://aktier.ddns.net"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+loop_monitor = LoopLagMonitor()
+candle_store = CandleStore(CANDLE_STORE_PATH)
+download_batcher = DownloadBatcher(lambda tickers, start: yf_download(tickers, start=start), executor=executor, batch_size=DOWNLOAD_BATCH_SIZE, window=DOWNLOAD_BATCH_WINDOW)
+info_cache = TickerInfoCache({'info': lambda ticker, keys: yf.Ticker(ticker).info, 'fast_info': lambda ticker, keys: yf_fast_info(ticker, keys)}, executor=executor)
+fetch_scheduler = FetchScheduler()
+database = Database(DB_CONFIG, name='data_db')
+classification_index = ClassificationIndex(database)
+model_registry = ModelRegistry(MODEL_DIR, [MODEL_PATH, FALLBACK_MODEL_PATH])
+inference_service = InferenceService(model_registry, executor=executor)
+
 sio = socketio.AsyncServer(
     async_mode='asgi',
     cors_allowed_origins=["https://aktier.ddns.net"],
     logger=False,
     engineio_logger=False
 )
-sio_app = socketio.ASGIApp(sio, app)
-client_tasks = {}
 client_tickers = {}
-ALLOWED_COLUMNS = [
-    'open', 'high', 'low', 'close', 'volume', 'volume_adi', 'volume_obv', 'volume_cmf', 'volume_fi',
-    'volume_em', 'volume_sma_em', 'volume_vpt', 'volume_vwap', 'volume_mfi', 'volume_nvi',
-    'volatility_bbm', 'volatility_bbh', 'volatility_bbl', 'volatility_bbw', 'volatility_bbp',
-    'volatility_bbhi', 'volatility_bbli', 'volatility_kcc', 'volatility_kch', 'volatility_kcl',
-    'volatility_kcw', 'volatility_kcp', 'volatility_kchi', 'volatility_kcli', 'volatility_dcl',
-    'volatility_dch', 'volatility_dcm', 'volatility_dcw', 'volatility_dcp', 'volatility_atr',
-    'volatility_ui', 'trend_macd', 'trend_macd_signal', 'trend_macd_diff', 'trend_sma_fast',
-    'trend_sma_slow', 'trend_ema_fast', 'trend_ema_slow', 'trend_vortex_ind_pos',
-    'trend_vortex_ind_neg', 'trend_vortex_ind_diff', 'trend_trix', 'trend_mass_index',
-    'trend_dpo', 'trend_kst', 'trend_kst_sig', 'trend_kst_diff', 'trend_ichimoku_conv',
-    'trend_ichimoku_base', 'trend_ichimoku_a', 'trend_ichimoku_b', 'trend_stc', 'trend_adx',
-    'trend_adx_pos', 'trend_adx_neg', 'trend_cci', 'trend_visual_ichimoku_a',
-    'trend_visual_ichimoku_b', 'trend_aroon_up', 'trend_aroon_down', 'trend_aroon_ind',
-    'trend_psar_up', 'trend_psar_down', 'trend_psar_up_indicator', 'trend_psar_down_indicator',
-    'momentum_rsi', 'momentum_stoch_rsi', 'momentum_stoch_rsi_k', 'momentum_stoch_rsi_d',
-    'momentum_tsi', 'momentum_uo', 'momentum_stoch', 'momentum_stoch_signal', 'momentum_wr',
-    'momentum_ao', 'momentum_roc', 'momentum_ppo', 'momentum_ppo_signal', 'momentum_ppo_hist',
-    'momentum_pvo', 'momentum_pvo_signal', 'momentum_pvo_hist', 'momentum_kama', 'others_dr',
-    'others_dlr', 'others_cr', 'momentum_ppo_sm', 'momentum_ppo_deg'
-]
-
-def get_db_connection():
-    if db_pool is None:
-        return None
-    try:
-        conn = db_pool.get_connection()
-        return conn
-    except Error as e:
-        return None
-
-def smooth_out_curve(df, column, window, poly):
-    if window <= poly:
-        window = poly + 1
-    if window % 2 == 0:
-        window += 1
-    if df[column].isna().sum() > 0 or np.isinf(df[column]).sum() > 0:
-        df = df.dropna(subset=[column])
-        df = df[np.isfinite(df[column])]
-    if len(df[column]) < window:
-        return df
-    df[column + '_sm'] = savgol_filter(df[column], window_length=window, polyorder=poly)
-    return df
-
-def calculate_momentum_ppo_deg(df):
-    df['momentum_ppo_diff'] = df['momentum_ppo_sm'].diff()
-    df['momentum_ppo_deg'] = np.degrees(np.arctan(df['momentum_ppo_diff']))
-    df['momentum_ppo_deg'] = df['momentum_ppo_deg'] * (50 / 45)
-    df.drop(columns=['momentum_ppo_diff'], inplace=True)
-    return df
-
-def check_existing_candlesticks(symbol, df):
-    conn = get_db_connection()
-    if not conn:
-        df['classified'] = 0
-        df['classification'] = 0
-        return df
-    try:
-        cursor = conn.cursor(dictionary=True)
-        timestamps = df['date'].tolist()
-        if not timestamps:
-            df['classified'] = 0
-            df['classification'] = 0
-            cursor.close()
-            conn.close()
-            return df
-        placeholders = ','.join(['%s'] * len(timestamps))
-        query = f"""
-            SELECT datetimestamp, classification
-            FROM classifications_tb
-            WHERE ticker = %s AND datetimestamp IN ({placeholders})
-        """
-        cursor.execute(query, [symbol] + timestamps)
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        classifications_df = pd.DataFrame(results)
-        if classifications_df.empty:
-            df['classified'] = 0
-            df['classification'] = 0
-            return df
-        classifications_df['datetimestamp'] = classifications_df['datetimestamp'].astype(str)
-        df['date'] = df['date'].astype(str)
-        df = df.merge(
-            classifications_df[['datetimestamp', 'classification']],
-            how='left',
-            left_on='date',
-            right_on='datetimestamp'
-        )
-        df['classified'] = df['classification'].notna().astype(int)
-        df['classification'] = df['classification'].fillna(0).astype(int)
-        df = df.drop(columns=['datetimestamp'], errors='ignore')
-        return df
-    except Exception as e:
-        df['classified'] = 0
-        df['classification'] = 0
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
-        return df
-
-def predict_patterns(df):
-    if MODEL is None or SCALER is None:
-        df['prediction'] = 0
-        df['prediction_values'] = 0.0
-        return df
-    if len(df) < PATTERN_LENGTH:
-        df['prediction'] = 0
-        df['prediction_values'] = 0.0
-        return df
-    df['prediction'] = 0
-    df['prediction_values'] = 0.0
-    patterns = []
-    valid_indices = []
-    for i in range(PATTERN_LENGTH - 1, len(df)):
-        pattern = df.iloc[i - PATTERN_LENGTH + 1:i + 1][ALLOWED_COLUMNS].values
-        if pattern.shape == (PATTERN_LENGTH, len(ALLOWED_COLUMNS)):
-            patterns.append(pattern.flatten())
-            valid_indices.append(i)
-    if not patterns:
-        return df
-    X = np.array(patterns, dtype=float)
-    X = np.nan_to_num(X, nan=0.0, posinf=1e6, neginf=-1e6)
-    X = np.clip(X, -1e6, 1e6)
-    X_scaled = SCALER.transform(X)
-    try:
-        predictions = MODEL.predict(X_scaled)
-        probabilities = MODEL.predict_proba(X_scaled)
-        max_probs = np.max(probabilities, axis=1)
-        for idx, pred, prob in zip(valid_indices, predictions, max_probs):
-            df.loc[df.index[idx], 'prediction'] = int(pred)
-            df.loc[df.index[idx], 'prediction_values'] = float(prob)
-    except Exception as e:
-        df['prediction'] = 0
-        df['prediction_values'] = 0.0
-    return df
-
-def generate_signals(df, peek_mode=False, prob_threshold=0.7):
-    df = df.assign(signals=0, signal_change_percentage=0.0, safe_buy=0)
-    if 'prediction' not in df.columns or 'date' not in df.columns or 'close' not in df.columns:
-        return df
-    if df['close'].isna().any() or not df['close'].apply(lambda x: isinstance(x, (int, float))).all() or (df['close'] <= 0).any():
-        df['close'] = df['close'].fillna(method='ffill').fillna(method='bfill').astype(float)
-        valid_mean = df['close'][df['close'] > 0].mean() if (df['close'] > 0).any() else 1.0
-        df['close'] = df['close'].clip(lower=valid_mean or 1.0)
-        df.loc[df['close'] <= 0, 'signals'] = 0
-    holding = False
-    last_buy_price = None
-    current_time = datetime.now()
-    end_idx = len(df) - 1 if peek_mode else len(df) - 2
-    for i in range(1, end_idx + 1):
-        current_pred = int(df.iloc[i]['prediction'])
-        current_date = pd.to_datetime(df.iloc[i]['date'])
-        close_price = float(df.iloc[i]['close'])
-        prediction_prob = float(df.iloc[i]['prediction_values']) if 'prediction_values' in df.columns else 0.0
-        cpp_value = float(df.iloc[i]['cpp']) if 'cpp' in df.columns else 0.0
-        momentum_ppo_deg = float(df.iloc[i]['momentum_ppo_deg'])
-        is_last_candlestick = i == len(df) - 1
-        is_incomplete = is_last_candlestick and (current_time - current_date) < timedelta(minutes=5)
-        if is_incomplete and not peek_mode:
-            df.loc[df.index[i], 'signals'] = 0
-            continue
-        if peek_mode and is_last_candlestick and prediction_prob < prob_threshold:
-            df.loc[df.index[i], 'signals'] = 0
-            continue
-        if current_pred == 1 and not holding and close_price > 0:
-            df.loc[df.index[i], 'signals'] = 1
-            holding = True
-            last_buy_price = close_price
-            df.loc[df.index[i], 'signal_change_percentage'] = 0.0
-        elif holding and current_pred != 1 and close_price > 0 and last_buy_price is not None:
-            df.loc[df.index[i], 'signals'] = 2
-            signal_change_percentage = ((close_price - last_buy_price) / last_buy_price) * 100
-            signal_change_percentage = max(round(signal_change_percentage, 4), 0.01)
-            df.loc[df.index[i], 'signal_change_percentage'] = float(signal_change_percentage)
-            holding = False
-            last_buy_price = None
-        elif close_price <= 0:
-            df.loc[df.index[i], 'signals'] = 0
-        buy_mask = df['signals'] == 1
-        df.loc[buy_mask & (df['cpp'] > 50), 'safe_buy'] = 1
-    return df
-
-def download_ticker_data(ticker, period="5d"):
-    return yf.download(ticker, period=period, interval="5m", progress=False, timeout=10, prepost=True, ignore_tz=True, keepna=False, auto_adjust=True)
-
-async def fetch_ticker_data(ticker, period="5d"):
+client_watchlists = {}
+
+def yf_fast_info(ticker, keys):
+    # fast_info loads lazily per key, so read only the requested ones here, off the event loop
+    fast_info = yf.Ticker(ticker).fast_info
+    return {key: fast_info[key] for key in keys}
+
+def yf_download(tickers, period="5d", start=None):
+    if start is None:
+        return yf.download(tickers, period=period, interval="5m", progress=False, timeout=10, prepost=True, ignore_tz=True, keepna=False, auto_adjust=True, group_by='ticker')
+    return yf.download(tickers, start=start, interval="5m", progress=False, timeout=10, prepost=True, ignore_tz=True, keepna=False, auto_adjust=True, group_by='ticker')
+
+async def fetch_ticker_data(ticker, period="5d", formats=()):
     try:
         loop = asyncio.get_running_loop()
-        df = await loop.run_in_executor(executor, download_ticker_data, ticker, period)
+        start = await loop.run_in_executor(executor, candle_store.tail_start, ticker)
+        raw = await download_batcher.fetch(ticker, start)
+        df = await loop.run_in_executor(executor, candle_store.merge, ticker, raw, int(period.rstrip('d')))
         if df.empty:
-            return []
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
-        df = df.reset_index().rename(columns={
-            'Datetime': 'date',
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        })
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        if df['date'].isna().any():
-            df = df.dropna(subset=['date'])
-        if df.empty:
-            return []
-        tz = pytz.timezone('America/New_York')
-        df['date'] = df['date'].dt.tz_localize(tz, ambiguous='infer').dt.tz_convert('UTC').dt.tz_localize(None)
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        df = add_all_ta_features(df, open="open", high="high", low="low", close="close", volume="volume", fillna=True)
-        df = smooth_out_curve(df, 'momentum_ppo', window=1, poly=1)
-        df = calculate_momentum_ppo_deg(df)
-        df['avg_volume'] = df['volume'].rolling(window=20, min_periods=1).mean()
-        df['volume_ratio'] = df['volume'] / df['avg_volume'].replace(0, np.nan)
-        df['volume_ratio'] = df['volume_ratio'].fillna(1.0).clip(0, 10)
-        df['ppo_positive'] = np.where(df['momentum_ppo_sm'] > 0, df['momentum_ppo_sm'], 0).clip(0, 5)
-        df['cpp'] = (df['volume_cmf'] * 10) + (df['volume_ratio'] * 10) + (df['ppo_positive'] * 10)
-        df['cpp'] = df['cpp'].fillna(0).clip(0, 100)
-        df['cpp_smoothed'] = df['cpp'].ewm(span=3, adjust=False).mean()  # New: Smooth CCP for chain
-        df = check_existing_candlesticks(ticker, df)
-        df = predict_patterns(df)
-        df = generate_signals(df)
-        trading_days = pd.to_datetime(df['date']).dt.date.unique()
-        last_three_days = trading_days[-3:] if len(trading_days) >= 3 else trading_days
-        df = df[pd.to_datetime(df['date']).dt.date.isin(last_three_days)]
-        if 'signal_change_percentage' not in df.columns:
-            df['signal_change_percentage'] = 0.0
-        df['signal_change_percentage'] = df['signal_change_percentage'].astype(float)
-        data = []
-        for index, row in df.iterrows():
-            signal_change_percentage = float(row['signal_change_percentage']) if pd.notnull(row['signal_change_percentage']) else 0.0
-            row_dict = {
-                "timestamp": int(pd.to_datetime(row["date"]).timestamp() * 1000),
-                "Date": row["date"],
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-                "volume": int(row["volume"]),
-                "classified": int(row["classified"]),
-                "classification": int(row["classification"]),
-                "prediction": int(row["prediction"]),
-                "prediction_values": float(row["prediction_values"]),
-                "signals": int(row["signals"]),
-                "signal_change_percentage": signal_change_percentage,
-                "safe_buy": int(row["safe_buy"]),
-                "cpp_smoothed": float(row["cpp_smoothed"])  # New: Include smoothed CCP
-            }
-            for col in ALLOWED_COLUMNS:
-                row_dict[col] = float(row[col]) if pd.notnull(row[col]) else 0.0
-            data.append(row_dict)
-        info = {}
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            full_info = ticker_obj.info
-            relevant_keys = [
-                'sector', 'industry', 'country', 'exchange', 'quoteType', 'currency',
-                'previousClose', 'open', 'dayHigh', 'dayLow', 'averageVolume',
-                'bidSize', 'askSize', 'beta', 'bid', 'ask', 'longName', 'shortName'
-            ]
-            info = {key: full_info.get(key) for key in relevant_keys if key in full_info}
-        except Exception as e:
-            logging.error(f"Error fetching detailed info for {ticker}: {e}")
-        return data, info
+            return pd.DataFrame(), {}, {}, {}
+        labels = await classification_index.get(ticker)
+        windows = await compute_pool.prepare(ticker, df, labels, inference_service.versions())
+        if windows is None:
+            return pd.DataFrame(), {}, {}, {}
+        prediction, prediction_values, versions = await inference_service.predict(*windows)
+        frame, model_versions, encoded = await compute_pool.finish(ticker, prediction, prediction_values, versions, formats)
+        info = info_cache.get(ticker)
+        return frame, info, model_versions, encoded
     except Exception as e:
         logging.error(f"Error in fetch_ticker_data for {ticker}: {e}")
-        return [], {}
+        return pd.DataFrame(), {}, {}, {}
 
-async def background_fetch(sid, ticker):
-    try:
-        while sid in client_tickers and client_tickers[sid] == ticker:
-            data, info = await fetch_ticker_data(ticker)
-            if sid in client_tickers and client_tickers[sid] == ticker:
-                await sio.emit('ticker_data', {
-                    'tickers': [ticker],
-                    'data': data,
-                    'ticker_info': {ticker: info}
-                }, namespace='/data', to=sid)
-            await asyncio.sleep(FETCH_INTERVAL)
-    except asyncio.CancelledError:
-        raise
-    except Exception as e:
-        pass
-    finally:
-        pass
+class TickerHub:
+    def __init__(self, sio, namespace='/data', max_tickers=MAX_WATCHLIST_SIZE, batch_window=WATCHLIST_BATCH_WINDOW):
+        self.sio = sio
+        self.namespace = namespace
+        self.max_tickers = max_tickers
+        self.batch_window = batch_window
+        self.subscribers = {}
+        self.producers = {}
+        self.snapshots = {}
+        self.modes = {}
+        self.watchlists = {}
+        self.outbox = {}
+        self.flushers = {}
+        self.frames = {}
+        self.infos = {}
+        self.seqs = {}
+
+    @staticmethod
+    def room(ticker, mode='full', fmt='rows'):
+        if mode == 'full' and fmt == 'rows':
+            return f"ticker:{ticker}"
+        return f"ticker:{ticker}:{mode}:{fmt}"
+
+    def groups(self, ticker, mode):
+        return {self.modes[(sid, ticker)][1] for sid in self.subscribers.get(ticker, ()) if self.modes[(sid, ticker)][0] == mode}
+
+    def encoded(self, ticker, frame, fmt):
+        snapshot = self.snapshots.get(ticker)
+        if snapshot is None or snapshot[0] is not frame:
+            return encode_frame(frame, fmt)
+        if fmt not in snapshot[3]:
+            snapshot[3][fmt] = encode_frame(frame, fmt)
+        return snapshot[3][fmt]
+
+    def full_payload(self, ticker, fmt):
+        frame, info, model_versions, encoded = self.snapshots[ticker]
+        payload = {
+            'tickers': [ticker],
+            'data': self.encoded(ticker, frame, fmt),
+            'ticker_info': {ticker: info},
+            'model_versions': model_versions
+        }
+        if fmt != 'rows':
+            payload['format'] = fmt
+        return payload
+
+    def delta_snapshot(self, ticker, fmt):
+        return {
+            'ticker': ticker,
+            'seq': self.seqs.get(ticker, 0),
+            'format': fmt,
+            'data': self.encoded(ticker, self.frames[ticker], fmt),
+            'ticker_info': self.infos.get(ticker, {}),
+            'model_versions': self.snapshots[ticker][2]
+        }
+
+    async def send(self, sid, ticker, event, payload):
+        if self.modes[(sid, ticker)][2]:
+            self.outbox.setdefault(sid, []).append({'event': event, 'data': payload})
+            if sid not in self.flushers:
+                self.flushers[sid] = asyncio.create_task(self.flush(sid))
+        else:
+            await self.sio.emit(event, payload, namespace=self.namespace, to=sid)
+
+    async def deliver(self, ticker, mode, fmt, event, payload):
+        direct = False
+        for sid in list(self.subscribers.get(ticker, ())):
+            sub_mode, sub_fmt, batched = self.modes[(sid, ticker)]
+            if sub_mode != mode or sub_fmt != fmt:
+                continue
+            if batched:
+                await self.send(sid, ticker, event, payload)
+            else:
+                direct = True
+        if direct:
+            await self.sio.emit(event, payload, namespace=self.namespace, room=self.room(ticker, mode, fmt))
+
+    async def flush(self, sid):
+        try:
+            await asyncio.sleep(self.batch_window)
+        finally:
+            self.flushers.pop(sid, None)
+        updates = self.outbox.pop(sid, [])
+        if updates:
+            await self.sio.emit('watchlist_update', {'updates': updates}, namespace=self.namespace, to=sid)
+
+    async def subscribe(self, sid, ticker, mode='full', fmt='rows', batched=False):
+        watchlist = self.watchlists.setdefault(sid, set())
+        if ticker not in watchlist and len(watchlist) >= self.max_tickers:
+            return False
+        subscribers = self.subscribers.setdefault(ticker, set())
+        previous = self.modes.get((sid, ticker))
+        if previous != (mode, fmt, batched):
+            if previous is not None and not previous[2]:
+                await self.sio.leave_room(sid, self.room(ticker, previous[0], previous[1]), namespace=self.namespace)
+            if not batched:
+                await self.sio.enter_room(sid, self.room(ticker, mode, fmt), namespace=self.namespace)
+        subscribers.add(sid)
+        watchlist.add(ticker)
+        self.modes[(sid, ticker)] = (mode, fmt, batched)
+        if mode == 'delta':
+            if ticker in self.frames:
+                await self.send(sid, ticker, 'ticker_snapshot', self.delta_snapshot(ticker, fmt))
+        elif ticker in self.snapshots:
+            await self.send(sid, ticker, 'ticker_data', self.full_payload(ticker, fmt))
+        if ticker not in self.producers:
+            self.producers[ticker] = asyncio.create_task(self.produce(ticker))
+        return True
+
+    async def resync(self, sid, ticker):
+        if sid in self.subscribers.get(ticker, ()) and ticker in self.frames:
+            mode, fmt, batched = self.modes[(sid, ticker)]
+            await self.send(sid, ticker, 'ticker_snapshot', self.delta_snapshot(ticker, fmt))
+
+    async def unsubscribe(self, sid, ticker):
+        subscribers = self.subscribers.get(ticker)
+        if subscribers is None or sid not in subscribers:
+            return
+        subscribers.discard(sid)
+        self.watchlists.get(sid, set()).discard(ticker)
+        mode, fmt, batched = self.modes.pop((sid, ticker))
+        if not batched:
+            await self.sio.leave_room(sid, self.room(ticker, mode, fmt), namespace=self.namespace)
+        if not subscribers:
+            del self.subscribers[ticker]
+            self.snapshots.pop(ticker, None)
+            self.frames.pop(ticker, None)
+            self.infos.pop(ticker, None)
+            self.seqs.pop(ticker, None)
+            task = self.producers.pop(ticker, None)
+            if task:
+                task.cancel()
+            await compute_pool.discard(ticker)
+            classification_index.discard(ticker)
+            await asyncio.get_running_loop().run_in_executor(executor, candle_store.discard, ticker)
+
+    async def drop(self, sid):
+        for ticker in list(self.watchlists.get(sid, ())):
+            await self.unsubscribe(sid, ticker)
+        self.watchlists.pop(sid, None)
+        self.outbox.pop(sid, None)
+        task = self.flushers.pop(sid, None)
+        if task:
+            task.cancel()
+
+    async def publish(self, ticker, frame, info, model_versions=None, encoded=None):
+        previous_versions = self.snapshots[ticker][2] if ticker in self.snapshots else None
+        self.snapshots[ticker] = (frame, info, model_versions or {}, dict(encoded or {}))
+        for fmt in self.groups(ticker, 'full'):
+            await self.deliver(ticker, 'full', fmt, 'ticker_data', self.full_payload(ticker, fmt))
+        if frame.empty:
+            return
+        previous = self.frames.get(ticker)
+        self.frames[ticker] = frame
+        if previous is None:
+            self.infos[ticker] = info
+            self.seqs[ticker] = 0
+            for fmt in self.groups(ticker, 'delta'):
+                await self.deliver(ticker, 'delta', fmt, 'ticker_snapshot', self.delta_snapshot(ticker, fmt))
+            return
+        upserts, removed = diff_frames(previous, frame)
+        info_changed = info != self.infos.get(ticker)
+        if upserts.empty and not removed and not info_changed and self.snapshots[ticker][2] == previous_versions:
+            return
+        self.seqs[ticker] += 1
+        if info_changed:
+            self.infos[ticker] = info
+        for fmt in self.groups(ticker, 'delta'):
+            delta = {
+                'ticker': ticker,
+                'seq': self.seqs[ticker],
+                'format': fmt,
+                'upsert': encode_frame(upserts, fmt),
+                'remove': removed,
+                'model_versions': self.snapshots[ticker][2]
+            }
+            if info_changed:
+                delta['ticker_info'] = info
+            await self.deliver(ticker, 'delta', fmt, 'ticker_delta', delta)
+
+    async def produce(self, ticker):
+        try:
+            while self.subscribers.get(ticker):
+                try:
+                    frame, info, model_versions, encoded = await fetch_ticker_data(ticker, formats=self.groups(ticker, 'full'))
+                    if self.subscribers.get(ticker):
+                        await self.publish(ticker, frame, info, model_versions, encoded)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # One failed tick must not stop updates for every watcher of this ticker
+                    logging.error(f"Error in producer for {ticker}: {e}")
+                await asyncio.sleep(fetch_scheduler.next_delay())
+        finally:
+            if self.producers.get(ticker) is asyncio.current_task():
+                del self.producers[ticker]
+
+    async def shutdown(self):
+        for task in list(self.producers.values()) + list(self.flushers.values()):
+            task.cancel()
+        self.producers.clear()
+        self.flushers.clear()
+        self.outbox.clear()
+        self.subscribers.clear()
+        self.snapshots.clear()
+        self.modes.clear()
+        self.watchlists.clear()
+        self.frames.clear()
+        self.infos.clear()
+        self.seqs.clear()
+
+hub = TickerHub(sio)
 
 @asynccontextmanager
 async def lifespan(app):
     try:
         yield
     finally:
-        for sid, task in client_tasks.items():
-            task.cancel()
-        client_tasks.clear()
+        await hub.shutdown()
+        await info_cache.shutdown()
+        await classification_index.shutdown()
+        await loop_monitor.shutdown()
+        await inference_service.shutdown()
+        compute_pool.shutdown()
         client_tickers.clear()
-        if db_pool:
-            for conn in db_pool._pool:
-                try:
-                    conn.close()
-                except:
-                    pass
+        client_watchlists.clear()
+        candle_store.close()
+        database.close()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["https://aktier.ddns.net"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+sio_app = socketio.ASGIApp(sio, app)
 
 @sio.on('connect', namespace='/data')
 async def connect(sid, environ):
+    loop_monitor.start()
+    compute_pool.warm()
     await sio.emit('data_status', {'status': 'connected'}, namespace='/data', to=sid)
 
 @sio.on('disconnect', namespace='/data')
 async def disconnect(sid):
-    if sid in client_tasks:
-        client_tasks[sid].cancel()
-        del client_tasks[sid]
-    if sid in client_tickers:
-        del client_tickers[sid]
+    client_tickers.pop(sid, None)
+    client_watchlists.pop(sid, None)
+    await hub.drop(sid)
+
+def subscription_options(data):
+    mode = 'delta' if data.get('protocol') == 'delta' else 'full'
+    fmt = data.get('format') if data.get('format') in FORMATS else 'rows'
+    return mode, fmt
 
 @sio.on('request_ticker_data', namespace='/data')
 async def request_ticker_data(sid, data):
@@ -393,15 +350,60 @@ async def request_ticker_data(sid, data):
         await sio.emit('ticker_data', {
             'tickers': [],
             'data': [],
-            'ticker_info': {}
+            'ticker_info': {},
+            'model_versions': {}
         }, namespace='/data', to=sid)
         return
-    if sid in client_tasks:
-        client_tasks[sid].cancel()
-        del client_tasks[sid]
-    client_tickers[sid] = ticker
-    task = asyncio.create_task(background_fetch(sid, ticker))
-    client_tasks[sid] = task
+    mode, fmt = subscription_options(data)
+    previous = client_tickers.get(sid)
+    if previous and previous != ticker and previous not in client_watchlists.get(sid, ()):
+        await hub.unsubscribe(sid, previous)
+    if await hub.subscribe(sid, ticker, mode, fmt):
+        client_tickers[sid] = ticker
+    else:
+        await sio.emit('watchlist_error', {'error': f'Watchlist limit of {MAX_WATCHLIST_SIZE} tickers reached', 'tickers': [ticker]}, namespace='/data', to=sid)
+
+@sio.on('watch_tickers', namespace='/data')
+async def watch_tickers(sid, data):
+    tickers = [str(ticker).strip().upper() for ticker in (data or {}).get('tickers', []) if str(ticker).strip()]
+    mode, fmt = subscription_options(data or {})
+    batched = bool((data or {}).get('batch'))
+    watched = client_watchlists.setdefault(sid, set())
+    rejected = []
+    for ticker in dict.fromkeys(tickers):
+        if await hub.subscribe(sid, ticker, mode, fmt, batched):
+            watched.add(ticker)
+        else:
+            rejected.append(ticker)
+    await sio.emit('watchlist', {'tickers': sorted(hub.watchlists.get(sid, ())), 'rejected': rejected, 'limit': MAX_WATCHLIST_SIZE}, namespace='/data', to=sid)
+
+@sio.on('unwatch_tickers', namespace='/data')
+async def unwatch_tickers(sid, data):
+    watched = client_watchlists.get(sid, set())
+    for ticker in (data or {}).get('tickers', []):
+        ticker = str(ticker).strip().upper()
+        watched.discard(ticker)
+        if ticker != client_tickers.get(sid):
+            await hub.unsubscribe(sid, ticker)
+    await sio.emit('watchlist', {'tickers': sorted(hub.watchlists.get(sid, ())), 'rejected': [], 'limit': MAX_WATCHLIST_SIZE}, namespace='/data', to=sid)
+
+@sio.on('request_cache_stats', namespace='/data')
+async def request_cache_stats(sid, data=None):
+    await sio.emit('cache_stats', candle_store.stats(), namespace='/data', to=sid)
+
+@sio.on('request_loop_stats', namespace='/data')
+async def request_loop_stats(sid, data=None):
+    await sio.emit('loop_stats', loop_monitor.stats(), namespace='/data', to=sid)
+
+@sio.on('request_inference_stats', namespace='/data')
+async def request_inference_stats(sid, data=None):
+    await sio.emit('inference_stats', inference_service.stats(), namespace='/data', to=sid)
+
+@sio.on('request_resync', namespace='/data')
+async def request_resync(sid, data):
+    ticker = (data or {}).get('ticker', '').strip().upper()
+    if ticker and ticker in hub.watchlists.get(sid, ()):
+        await hub.resync(sid, ticker)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,142 @@
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import pytz
+
+# US equity sessions in exchange time. train_from_windows.session_masks uses
+# the same boundaries expressed in CET wall-clock hours (10:00 / 15:30 / 22:00 / 02:00).
+EXCHANGE_TZ = pytz.timezone('America/New_York')
+SESSIONS = [
+    ('premarket', (4, 0), (9, 30)),
+    ('normal_hours', (9, 30), (16, 0)),
+    ('aftermarket', (16, 0), (20, 0))
+]
+EARLY_CLOSE_SESSIONS = [
+    ('premarket', (4, 0), (9, 30)),
+    ('normal_hours', (9, 30), (13, 0)),
+    ('aftermarket', (13, 0), (17, 0))
+]
+# Unscheduled full-day closures (national days of mourning etc.) on top of the rule-based holidays
+MARKET_CLOSURES = {'2018-12-05', '2025-01-09'}
+BAR_SECONDS = 300
+BAR_CLOSE_DELAY = 2.0
+FETCH_CADENCE = {
+    'premarket': 2.0,
+    'normal_hours': 1.0,
+    'aftermarket': 2.0,
+    'closed': 300.0
+}
+
+
+def nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+def last_weekday(year, month, weekday):
+    last = date(year, month + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def easter(year):
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    return date(year, month, (h + l - 7 * m + 114) % 31 + 1)
+
+def observed(day):
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=None)
+def market_holidays(year):
+    holidays = {
+        nth_weekday(year, 1, 0, 3),
+        nth_weekday(year, 2, 0, 3),
+        easter(year) - timedelta(days=2),
+        last_weekday(year, 5, 0),
+        observed(date(year, 7, 4)),
+        nth_weekday(year, 9, 0, 1),
+        nth_weekday(year, 11, 3, 4),
+        observed(date(year, 12, 25))
+    }
+    # NYSE does not move New Year's Day back into the previous year when it falls on a Saturday
+    if date(year, 1, 1).weekday() != 5:
+        holidays.add(observed(date(year, 1, 1)))
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))
+    holidays.update(day for day in map(date.fromisoformat, MARKET_CLOSURES) if day.year == year)
+    return frozenset(holidays)
+
+@lru_cache(maxsize=None)
+def early_closes(year):
+    closes = {nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        if day.weekday() < 4:
+            closes.add(day)
+    return frozenset(closes - market_holidays(year))
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in market_holidays(day.year)
+
+def trading_sessions(day):
+    if not is_trading_day(day):
+        return []
+    return EARLY_CLOSE_SESSIONS if day in early_closes(day.year) else SESSIONS
+
+def market_session(now=None):
+    local = datetime.fromtimestamp(now if now is not None else time.time(), EXCHANGE_TZ)
+    minutes = local.hour * 60 + local.minute
+    for name, start, end in trading_sessions(local.date()):
+        if start[0] * 60 + start[1] <= minutes < end[0] * 60 + end[1]:
+            return name
+    return 'closed'
+
+def session_labels(dates):
+    local = pd.DatetimeIndex(pd.to_datetime(dates)).tz_localize('UTC').tz_convert(EXCHANGE_TZ)
+    minutes = np.asarray(local.hour * 60 + local.minute)
+    days = np.asarray(local.date)
+    labels = np.full(len(local), 'closed', dtype=object)
+    for day in set(days):
+        rows = days == day
+        for name, start, end in trading_sessions(day):
+            labels[rows & (minutes >= start[0] * 60 + start[1]) & (minutes < end[0] * 60 + end[1])] = name
+    return labels
+
+def next_open(now):
+    day = datetime.fromtimestamp(now, EXCHANGE_TZ).date()
+    for offset in range(14):
+        candidate = day + timedelta(days=offset)
+        if not is_trading_day(candidate):
+            continue
+        open_at = EXCHANGE_TZ.localize(datetime(candidate.year, candidate.month, candidate.day, *SESSIONS[0][1])).timestamp()
+        if open_at > now:
+            return open_at
+    return None
+
+
+class FetchScheduler:
+    def __init__(self, cadence=None, bar_close_delay=BAR_CLOSE_DELAY):
+        self.cadence = dict(FETCH_CADENCE, **(cadence or {}))
+        self.bar_close_delay = bar_close_delay
+
+    def next_delay(self, now=None):
+        now = now if now is not None else time.time()
+        session = market_session(now)
+        cadence = self.cadence.get(session, self.cadence['closed'])
+        tick = (now // cadence + 1) * cadence
+        if session == 'closed':
+            opens = next_open(now)
+            return max(0.0, (tick if opens is None else min(tick, opens)) - now)
+        bar_close = (now // BAR_SECONDS) * BAR_SECONDS + self.bar_close_delay
+        if bar_close <= now:
+            bar_close += BAR_SECONDS
+        return max(0.0, min(tick, bar_close) - now)
@@ -0,0 +1,88 @@
+import argparse
+import logging
+import mysql.connector
+from pattern_store import PATTERN_BLOBS_TABLE_QUERY, PATTERN_SCHEMA_VERSION, UPSERT_PATTERN_BLOB_QUERY, legacy_values, pack_values
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("migrate_patterns")
+
+DB_CONFIG = {
+    'host': '192.168.1.6',
+    'user': 'bias76sql',
+    'password': 'TestPassword123',
+    'database': 'stocksocket'
+}
+MIGRATION_BATCH_SIZE = 500
+
+
+def migrate(conn, batch_size=MIGRATION_BATCH_SIZE):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(PATTERN_BLOBS_TABLE_QUERY)
+        conn.commit()
+        last_cid = 0
+        migrated = 0
+        while True:
+            cursor.execute("""
+                SELECT c.cid, c.pattern_length FROM classifications_tb c
+                LEFT JOIN pattern_blobs b ON b.cid = c.cid
+                WHERE c.cid > %s AND b.cid IS NULL
+                ORDER BY c.cid LIMIT %s
+            """, (last_cid, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_cid = rows[-1][0]
+            lengths = {cid: int(pattern_length) for cid, pattern_length in rows}
+            values = legacy_values(cursor, list(lengths))
+            blobs = [(cid, PATTERN_SCHEMA_VERSION, lengths[cid], pack_values(values[cid], lengths[cid])) for cid in lengths if cid in values]
+            if blobs:
+                cursor.executemany(UPSERT_PATTERN_BLOB_QUERY, blobs)
+            conn.commit()
+            migrated += len(blobs)
+            logger.info("Migrated %d patterns (last cid %d)", migrated, last_cid)
+        return migrated
+    finally:
+        cursor.close()
+
+def delete_legacy(conn, batch_size=MIGRATION_BATCH_SIZE):
+    cursor = conn.cursor()
+    try:
+        last_cid = 0
+        deleted = 0
+        while True:
+            cursor.execute("SELECT cid FROM pattern_blobs WHERE cid > %s ORDER BY cid LIMIT %s", (last_cid, batch_size))
+            cids = [row[0] for row in cursor.fetchall()]
+            if not cids:
+                break
+            last_cid = cids[-1]
+            cursor.execute(f"DELETE FROM patterns_tb WHERE cid IN ({','.join(['%s'] * len(cids))})", cids)
+            deleted += cursor.rowcount
+            conn.commit()
+        logger.info("Deleted %d legacy patterns_tb rows", deleted)
+        return deleted
+    finally:
+        cursor.close()
+
+def main(batch_size=MIGRATION_BATCH_SIZE, drop_legacy=False):
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        migrate(conn, batch_size)
+        if drop_legacy:
+            delete_legacy(conn, batch_size)
+    except mysql.connector.Error as e:
+        logger.error("Database error: %s", str(e))
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack patterns_tb rows into pattern_blobs.")
+    parser.add_argument('--batch_size', type=int, default=MIGRATION_BATCH_SIZE, help='Classifications per transaction (default: 500)')
+    parser.add_argument('--delete_legacy', action='store_true', help='Delete patterns_tb rows for migrated classifications')
+    args = parser.parse_args()
+    main(batch_size=args.batch_size, drop_legacy=args.delete_legacy)
@@ -0,0 +1,83 @@
+import logging
+import os
+import threading
+import time
+import joblib
+
+MODEL_SESSIONS = ('premarket', 'normal_hours', 'aftermarket')
+MODEL_CHECK_INTERVAL = 5.0
+
+
+class ModelRegistry:
+    def __init__(self, model_dir, fallback_paths=(), check_interval=MODEL_CHECK_INTERVAL):
+        self.model_dir = model_dir
+        self.fallback_paths = list(fallback_paths)
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.models = {}
+        self.routes = {}
+        self.checked = {}
+        self.targets = {}
+        self.loading = set()
+
+    def path(self, session):
+        candidates = list(self.fallback_paths)
+        if session in MODEL_SESSIONS:
+            candidates.insert(0, os.path.join(self.model_dir, f"delphi_stock_model_{session}.pkl"))
+        for path in candidates:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load(self, path, mtime):
+        try:
+            model_data = joblib.load(path)
+            name = os.path.splitext(os.path.basename(path))[0]
+            entry = {
+                'model': model_data['model'],
+                'scaler': model_data['scaler'],
+                'mtime': mtime,
+                'version': f"{name}@{model_data.get('timestamp') or int(mtime)}"
+            }
+            with self.lock:
+                self.models[path] = entry
+                for session, target in self.targets.items():
+                    if target == path:
+                        self.routes[session] = path
+            logging.info(f"Loaded model {entry['version']}")
+        except Exception as e:
+            logging.error(f"Error loading model from {path}: {e}")
+        finally:
+            with self.lock:
+                self.loading.discard(path)
+
+    def refresh(self, session):
+        # Never loads inline: callers on the event loop get the current route (or None) until the thread finishes
+        path = self.path(session)
+        if path is None:
+            return None
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return self.routes.get(session)
+        with self.lock:
+            self.targets[session] = path
+            entry = self.models.get(path)
+            if entry is not None:
+                self.routes[session] = path
+            if (entry is None or entry['mtime'] != mtime) and path not in self.loading:
+                self.loading.add(path)
+                threading.Thread(target=self._load, args=(path, mtime), daemon=True).start()
+            return self.routes.get(session)
+
+    def get(self, session):
+        now = time.time()
+        with self.lock:
+            due = now - self.checked.get(session, 0) >= self.check_interval
+            if due:
+                self.checked[session] = now
+            path = self.routes.get(session)
+        if due:
+            path = self.refresh(session)
+        with self.lock:
+            return self.models.get(path)
@@ -0,0 +1,83 @@
+import numpy as np
+
+# Column order of a packed pattern is fixed per schema version; add a new version instead of editing one.
+PATTERN_SCHEMAS = {
+    1: [
+        'open', 'high', 'low', 'close', 'volume', 'volume_adi', 'volume_obv', 'volume_cmf', 'volume_fi',
+        'volume_em', 'volume_sma_em', 'volume_vpt', 'volume_vwap', 'volume_mfi', 'volume_nvi',
+        'volatility_bbm', 'volatility_bbh', 'volatility_bbl', 'volatility_bbw', 'volatility_bbp',
+        'volatility_bbhi', 'volatility_bbli', 'volatility_kcc', 'volatility_kch', 'volatility_kcl',
+        'volatility_kcw', 'volatility_kcp', 'volatility_kchi', 'volatility_kcli', 'volatility_dcl',
+        'volatility_dch', 'volatility_dcm', 'volatility_dcw', 'volatility_dcp', 'volatility_atr',
+        'volatility_ui', 'trend_macd', 'trend_macd_signal', 'trend_macd_diff', 'trend_sma_fast',
+        'trend_sma_slow', 'trend_ema_fast', 'trend_ema_slow', 'trend_vortex_ind_pos',
+        'trend_vortex_ind_neg', 'trend_vortex_ind_diff', 'trend_trix', 'trend_mass_index',
+        'trend_dpo', 'trend_kst', 'trend_kst_sig', 'trend_kst_diff', 'trend_ichimoku_conv',
+        'trend_ichimoku_base', 'trend_ichimoku_a', 'trend_ichimoku_b', 'trend_stc', 'trend_adx',
+        'trend_adx_pos', 'trend_adx_neg', 'trend_cci', 'trend_visual_ichimoku_a',
+        'trend_visual_ichimoku_b', 'trend_aroon_up', 'trend_aroon_down', 'trend_aroon_ind',
+        'trend_psar_up', 'trend_psar_down', 'trend_psar_up_indicator', 'trend_psar_down_indicator',
+        'momentum_rsi', 'momentum_stoch_rsi', 'momentum_stoch_rsi_k', 'momentum_stoch_rsi_d',
+        'momentum_tsi', 'momentum_uo', 'momentum_stoch', 'momentum_stoch_signal', 'momentum_wr',
+        'momentum_ao', 'momentum_roc', 'momentum_ppo', 'momentum_ppo_signal', 'momentum_ppo_hist',
+        'momentum_pvo', 'momentum_pvo_signal', 'momentum_pvo_hist', 'momentum_kama', 'others_dr',
+        'others_dlr', 'others_cr', 'momentum_ppo_sm', 'momentum_ppo_deg'
+    ]
+}
+PATTERN_SCHEMA_VERSION = 1
+LOAD_BATCH_SIZE = 1000
+SCHEMA_INDEX = {version: {col: j for j, col in enumerate(columns)} for version, columns in PATTERN_SCHEMAS.items()}
+PATTERN_BLOBS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS pattern_blobs (
+        cid INT NOT NULL PRIMARY KEY,
+        schema_version SMALLINT NOT NULL,
+        candles SMALLINT NOT NULL,
+        features MEDIUMBLOB NOT NULL
+    )
+"""
+UPSERT_PATTERN_BLOB_QUERY = """
+    INSERT INTO pattern_blobs (cid, schema_version, candles, features) VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE schema_version = VALUES(schema_version), candles = VALUES(candles), features = VALUES(features)
+"""
+
+
+def pack_values(values, candles, schema_version=PATTERN_SCHEMA_VERSION):
+    index = SCHEMA_INDEX[schema_version]
+    features = np.full((candles, len(index)), np.nan, dtype=np.float32)
+    for i, col_name, col_value in values:
+        j = index.get(col_name)
+        if j is not None and 0 <= i < candles and col_value is not None:
+            features[i, j] = col_value
+    return features.tobytes()
+
+def unpack_features(blob, candles, schema_version, columns=None):
+    features = np.frombuffer(blob, dtype=np.float32).reshape(candles, -1)
+    schema = PATTERN_SCHEMAS[schema_version]
+    if columns is None or columns == schema:
+        return features
+    index = SCHEMA_INDEX[schema_version]
+    reordered = np.full((candles, len(columns)), np.nan, dtype=np.float32)
+    for j, col in enumerate(columns):
+        if col in index:
+            reordered[:, j] = features[:, index[col]]
+    return reordered
+
+def column_positions(schema_version, columns):
+    # Position of each requested column in the packed schema, -1 where the schema lacks it
+    index = SCHEMA_INDEX[schema_version]
+    return np.array([index.get(col, -1) for col in columns], dtype=np.intp)
+
+def candle_dicts(features, schema_version=PATTERN_SCHEMA_VERSION):
+    schema = PATTERN_SCHEMAS[schema_version]
+    return [{col: float(value) for col, value in zip(schema, row.tolist()) if value == value} for row in features]
+
+def legacy_values(cursor, cids):
+    values = {}
+    cids = list(cids)
+    for start in range(0, len(cids), LOAD_BATCH_SIZE):
+        batch = cids[start:start + LOAD_BATCH_SIZE]
+        cursor.execute(f"SELECT cid, candle_index, col_name, col_value FROM patterns_tb WHERE cid IN ({','.join(['%s'] * len(batch))})", batch)
+        for row in cursor.fetchall():
+            cid, candle_index, col_name, col_value = (row['cid'], row['candle_index'], row['col_name'], row['col_value']) if isinstance(row, dict) else row
+            values.setdefault(cid, []).append((int(candle_index), col_name, float(col_value) if col_value is not None else None))
+    return values
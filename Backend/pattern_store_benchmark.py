@@ -0,0 +1,81 @@
+import sqlite3
+import sys
+import time
+import numpy as np
+from pattern_store import LOAD_BATCH_SIZE, PATTERN_SCHEMAS, PATTERN_SCHEMA_VERSION, pack_values, unpack_features
+
+PATTERNS = 5000
+PATTERN_LENGTH = 5
+
+
+class Cursor:
+    # sqlite stand-in for the mysql.connector cursor used in production
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def execute(self, query, params=()):
+        self.cursor.execute(query.replace('%s', '?'), tuple(params))
+
+    def executemany(self, query, rows):
+        self.cursor.executemany(query.replace('%s', '?'), rows)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+def build(patterns, pattern_length):
+    rng = np.random.default_rng(0)
+    columns = PATTERN_SCHEMAS[PATTERN_SCHEMA_VERSION]
+    eav = sqlite3.connect(':memory:')
+    eav.execute("CREATE TABLE patterns_tb (pid INTEGER PRIMARY KEY, cid INT, candle_index INT, col_name VARCHAR(64), col_value DOUBLE)")
+    eav.execute("CREATE INDEX patterns_cid ON patterns_tb (cid)")
+    blobs = sqlite3.connect(':memory:')
+    blobs.execute("CREATE TABLE pattern_blobs (cid INTEGER PRIMARY KEY, schema_version SMALLINT, candles SMALLINT, features BLOB)")
+    for cid in range(1, patterns + 1):
+        values = [(i, col, float(value)) for i in range(pattern_length) for col, value in zip(columns, rng.normal(100, 20, len(columns)))]
+        eav.executemany("INSERT INTO patterns_tb (cid, candle_index, col_name, col_value) VALUES (?, ?, ?, ?)", [(cid,) + value for value in values])
+        blobs.execute("INSERT INTO pattern_blobs VALUES (?, ?, ?, ?)", (cid, PATTERN_SCHEMA_VERSION, pattern_length, pack_values(values, pattern_length)))
+    eav.commit()
+    blobs.commit()
+    return eav, blobs
+
+def size(conn):
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def load_eav(conn, pattern_length):
+    columns = PATTERN_SCHEMAS[PATTERN_SCHEMA_VERSION]
+    data = {}
+    for cid, candle_index, col_name, col_value in conn.execute("SELECT cid, candle_index, col_name, col_value FROM patterns_tb"):
+        if cid not in data:
+            data[cid] = [{} for _ in range(pattern_length)]
+        data[cid][candle_index][col_name] = col_value
+    return np.array([[candle.get(col, np.nan) for candle in pattern for col in columns] for pattern in data.values()], dtype=float)
+
+def load_blobs(conn, pattern_length):
+    cursor = Cursor(conn)
+    cids = [row[0] for row in conn.execute("SELECT cid FROM pattern_blobs")]
+    features = {}
+    for start in range(0, len(cids), LOAD_BATCH_SIZE):
+        batch = cids[start:start + LOAD_BATCH_SIZE]
+        cursor.execute(f"SELECT cid, schema_version, candles, features FROM pattern_blobs WHERE cid IN ({','.join(['%s'] * len(batch))})", batch)
+        for cid, schema_version, candles, blob in cursor.fetchall():
+            features[cid] = unpack_features(bytes(blob), candles, schema_version)
+    return np.stack([features[cid].ravel() for cid in cids])
+
+def run(patterns=PATTERNS, pattern_length=PATTERN_LENGTH):
+    eav, blobs = build(patterns, pattern_length)
+    print(f"patterns={patterns} pattern_length={pattern_length}")
+    print(f"patterns_tb   size={size(eav) / 1024 / 1024:8.2f}MiB")
+    print(f"pattern_blobs size={size(blobs) / 1024 / 1024:8.2f}MiB")
+    start = time.perf_counter()
+    X_eav = load_eav(eav, pattern_length)
+    eav_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    X_blobs = load_blobs(blobs, pattern_length)
+    blob_seconds = time.perf_counter() - start
+    print(f"patterns_tb   load={eav_seconds * 1000:8.1f}ms")
+    print(f"pattern_blobs load={blob_seconds * 1000:8.1f}ms")
+    print(f"max float32 error={np.max(np.abs(X_eav - X_blobs) / np.maximum(np.abs(X_eav), 1e-12)):.2e}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else PATTERNS)
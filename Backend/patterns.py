@@ -1,10 +1,15 @@
 import asyncio
+import base64
+import json
 import socketio
-import mysql.connector
-from mysql.connector import pooling
 import numpy as np
+import time
 from datetime import datetime
 import uvicorn
+from classification_index import VERSION_TABLE_QUERY, BUMP_VERSION_QUERY
+from classification_stats import apply_stats_deltas, ensure_stats_tables
+from db import Database
+from pattern_store import PATTERN_BLOBS_TABLE_QUERY, PATTERN_SCHEMA_VERSION, UPSERT_PATTERN_BLOB_QUERY, candle_dicts, legacy_values, pack_values, unpack_features
 
 # MySQL connection pool
 DB_CONFIG = {
@@ -14,10 +19,31 @@ DB_CONFIG = {
     "database": "stocksocket",
     "pool_size": 5
 }
-try:
-    db_pool = mysql.connector.pooling.MySQLConnectionPool(**DB_CONFIG)
-except Exception as e:
-    raise
+SAVE_CHUNK_SIZE = 100
+PROGRESS_INTERVAL = 0.5
+REPORT_PAGE_SIZE = 200
+REPORT_MAX_PAGE_SIZE = 1000
+database = Database(DB_CONFIG, name='train_db')
+if database.pool is None:
+    raise RuntimeError("Could not create the train database pool")
+
+def ensure_version_table():
+    connection = None
+    try:
+        connection = database.pool.get_connection()
+        cursor = connection.cursor()
+        cursor.execute(VERSION_TABLE_QUERY)
+        cursor.execute(PATTERN_BLOBS_TABLE_QUERY)
+        ensure_stats_tables(cursor)
+        connection.commit()
+        cursor.close()
+    except Exception as e:
+        print(f"Error creating classification_versions/pattern_blobs/stats tables: {str(e)}")
+    finally:
+        if connection:
+            connection.close()
+
+ensure_version_table()
 
 # Columns to save, matching frontend data
 ALLOWED_COLUMNS = [
@@ -47,120 +73,116 @@ class TrainManager:
     def __init__(self, sio):
         self.sio = sio
         self.cancel_flags = {}
+        self.report_stops = {}
 
-    async def save_signal_pattern(self, ticker, pattern_data, direction, timestamp, pattern_length, pattern_offset, sid, pattern_index, total_patterns):
-        if sid is not None and self.cancel_flags.get(sid, False):
-            return 0
-        connection = None
-        cursor = None
+    @staticmethod
+    def parse_timestamp(timestamp):
+        if isinstance(timestamp, datetime):
+            return timestamp.replace(second=0, microsecond=0)
+        if isinstance(timestamp, str):
+            try:
+                return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(microsecond=0)
+            except ValueError:
+                return datetime.now().replace(second=0, microsecond=0)
         try:
-            connection = db_pool.get_connection()
-            cursor = connection.cursor()
-            # Handle timestamp (either datetime or string)
-            if isinstance(timestamp, datetime):
-                datetimestamp = timestamp.replace(second=0, microsecond=0)
-            elif isinstance(timestamp, str):
-                try:
-                    datetimestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(microsecond=0)
-                except ValueError:
-                    datetimestamp = datetime.now().replace(second=0, microsecond=0)
-            else:
-                try:
-                    datetimestamp = datetime.fromtimestamp(timestamp / 1000.0).replace(second=0, microsecond=0)
-                except (ValueError, TypeError):
-                    datetimestamp = datetime.now().replace(second=0, microsecond=0)
-    
-            # Cast ints to python types for DB safety
-            direction = int(direction)
-            pattern_length = int(pattern_length)
-            pattern_offset = int(pattern_offset)
-    
-            # Check for existing classification
-            check_query = """
-                SELECT cid FROM classifications_tb 
-                WHERE ticker = %s AND datetimestamp = %s AND pattern_length = %s AND pattern_offset = %s
+            return datetime.fromtimestamp(timestamp / 1000.0).replace(second=0, microsecond=0)
+        except (ValueError, TypeError):
+            return datetime.now().replace(second=0, microsecond=0)
+
+    @staticmethod
+    def pattern_values(pattern_data, pattern_length):
+        if not isinstance(pattern_data, (list, tuple)) or len(pattern_data) != pattern_length:
+            return []
+        values = []
+        for i, candle in enumerate(pattern_data):
+            for feature_name, feature_value in candle.items():
+                if feature_name in ALLOWED_COLUMNS:
+                    try:
+                        col_value = float(feature_value) if feature_value is not None else None
+                        if col_value is not None and not np.isnan(col_value) and not np.isinf(col_value):
+                            values.append((int(i), feature_name, col_value))
+                    except (ValueError, TypeError):
+                        pass
+        return values
+
+    def save_chunk(self, connection, ticker, pattern_length, pattern_offset, records):
+        # records: {datetimestamp: (direction, values)}; one transaction per chunk, committed by database.run
+        cursor = connection.cursor()
+        try:
+            key = (ticker, pattern_length, pattern_offset)
+            placeholders = ','.join(['%s'] * len(records))
+            select_query = f"""
+                SELECT cid, datetimestamp, classification FROM classifications_tb
+                WHERE ticker = %s AND pattern_length = %s AND pattern_offset = %s AND datetimestamp IN ({placeholders})
             """
-            cursor.execute(check_query, (ticker, datetimestamp, pattern_length, pattern_offset))
-            result = cursor.fetchone()
-    
-            if result:
-                cid = int(result[0])  # Cast to python int
-                update_query = """
-                    UPDATE classifications_tb 
-                    SET classification = %s, has_training = 0
-                    WHERE cid = %s
-                """
-                cursor.execute(update_query, (direction, cid))
-                delete_patterns_query = """
-                    DELETE FROM patterns_tb WHERE cid = %s
-                """
-                cursor.execute(delete_patterns_query, (cid,))
-            else:
-                insert_query = """
-                    INSERT INTO classifications_tb (ticker, datetimestamp, classification, has_training, pattern_length, pattern_offset) 
-                    VALUES (%s, %s, %s, 0, %s, %s)
-                """
-                cursor.execute(insert_query, (ticker, datetimestamp, direction, pattern_length, pattern_offset))
-                cid = int(cursor.lastrowid)  # Cast to python int
-    
-            # Insert patterns with all allowed columns
-            if not isinstance(pattern_data, (list, tuple)) or len(pattern_data) != pattern_length:
-                return 0
-            skipped_features = set()
-            inserted_values = 0
-            for i, candle in enumerate(pattern_data):
-                i = int(i)  # Cast candle_index to python int
-                for feature_name, feature_value in candle.items():
-                    if feature_name in ALLOWED_COLUMNS:
-                        try:
-                            col_value = float(feature_value) if feature_value is not None else None
-                            if col_value is not None and not np.isnan(col_value) and not np.isinf(col_value):
-                                cursor.execute(
-                                    "INSERT INTO patterns_tb (cid, candle_index, col_name, col_value) "
-                                    "VALUES (%s, %s, %s, %s)",
-                                    (cid, i, feature_name, col_value)
-                                )
-                                inserted_values += 1
-                            else:
-                                skipped_features.add(feature_name)
-                        except (ValueError, TypeError):
-                            skipped_features.add(feature_name)
-            if inserted_values == 0:
-                connection.rollback()
-                return 0
-            connection.commit()
-            if sid is not None:
-                progress = ((pattern_index + 1) / total_patterns) * 100
-                await self.sio.emit('progress_update', {
-                    'progress': round(progress, 2),
-                    'message': f'Processed pattern {pattern_index + 1} of {total_patterns}',
-                    'total_patterns': total_patterns
-                }, namespace='/train', to=sid)
-            return 1
+            cursor.execute(select_query, key + tuple(records))
+            rows = cursor.fetchall()
+            existing = {datetimestamp: int(cid) for cid, datetimestamp, classification in rows}
+            previous = {datetimestamp: int(classification) for cid, datetimestamp, classification in rows}
+            if existing:
+                cids = list(existing.values())
+                cid_placeholders = ','.join(['%s'] * len(cids))
+                cursor.execute(
+                    f"UPDATE classifications_tb SET classification = CASE cid {' '.join(['WHEN %s THEN %s'] * len(cids))} END, has_training = 0 "
+                    f"WHERE cid IN ({cid_placeholders})",
+                    [value for datetimestamp, cid in existing.items() for value in (cid, records[datetimestamp][0])] + cids
+                )
+                cursor.execute(f"DELETE FROM patterns_tb WHERE cid IN ({cid_placeholders})", cids)
+            inserts = [(ticker, datetimestamp, direction, pattern_length, pattern_offset) for datetimestamp, (direction, values) in records.items() if datetimestamp not in existing]
+            if inserts:
+                cursor.executemany(
+                    "INSERT INTO classifications_tb (ticker, datetimestamp, classification, has_training, pattern_length, pattern_offset) "
+                    "VALUES (%s, %s, %s, 0, %s, %s)",
+                    inserts
+                )
+                cursor.execute(select_query, key + tuple(records))
+                existing = {datetimestamp: int(cid) for cid, datetimestamp, classification in cursor.fetchall()}
+            cursor.executemany(UPSERT_PATTERN_BLOB_QUERY, [
+                (existing[datetimestamp], PATTERN_SCHEMA_VERSION, pattern_length, pack_values(values, pattern_length))
+                for datetimestamp, (direction, values) in records.items()
+            ])
+            apply_stats_deltas(cursor, ticker, [(previous.get(datetimestamp), direction, datetimestamp) for datetimestamp, (direction, values) in records.items()])
+            cursor.execute(BUMP_VERSION_QUERY, (ticker,))
+            return len(records)
+        finally:
+            cursor.close()
+
+    async def save_records(self, ticker, pattern_length, pattern_offset, records):
+        try:
+            return await database.run(self.save_chunk, ticker, pattern_length, pattern_offset, records)
         except Exception as e:
-            print(f"Save error for {ticker} at pattern_index {pattern_index}: {str(e)}")
-            if connection:
-                connection.rollback()
+            print(f"Save error for {ticker} in chunk of {len(records)} patterns: {e!r}")
             return 0
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+
+    async def save_signal_pattern(self, ticker, pattern_data, direction, timestamp, pattern_length, pattern_offset, sid=None, pattern_index=0, total_patterns=1):
+        if sid is not None and self.cancel_flags.get(sid, False):
+            return 0
+        pattern_length = int(pattern_length)
+        values = self.pattern_values(pattern_data, pattern_length)
+        if not values:
+            return 0
+        records = {self.parse_timestamp(timestamp): (int(direction), values)}
+        saved = await self.save_records(ticker, pattern_length, int(pattern_offset), records)
+        if saved and sid is not None:
+            await self.emit_progress(sid, pattern_index + 1, total_patterns)
+        return saved
+
+    async def emit_progress(self, sid, processed, total_patterns):
+        await self.sio.emit('progress_update', {
+            'progress': round((processed / total_patterns) * 100, 2),
+            'message': f'Processed pattern {processed} of {total_patterns}',
+            'total_patterns': total_patterns
+        }, namespace='/train', to=sid)
 
     async def add_to_db(self, sid, data):
         self.cancel_flags[sid] = False
-        connection = None
-        cursor = None
         try:
-            connection = db_pool.get_connection()
-            cursor = connection.cursor()
             patterns = data.get('patterns', [])
             labels = data.get('labels', [])
             ticker = data.get('ticker', 'unknown')
             metadata = data.get('metadata', {})
-            pattern_length = metadata.get('pattern_length', 5)
-            pattern_offset = metadata.get('offset', 0)
+            pattern_length = int(metadata.get('pattern_length', 5))
+            pattern_offset = int(metadata.get('offset', 0))
             if not patterns:
                 await self.sio.emit('progress_update', {
                     'progress': 0,
@@ -182,6 +204,8 @@ class TrainManager:
             }, namespace='/train', to=sid)
 
             inserted_count = 0
+            last_progress = 0.0
+            records = {}
             for i, (pattern, label) in enumerate(zip(patterns, labels)):
                 if self.cancel_flags.get(sid, False):
                     break
@@ -190,20 +214,30 @@ class TrainManager:
                 direction = int(label) if label in [1, 2, 3] else 1
                 last_timestamp = pattern[-1].get('timestamp', None)
                 last_date = pattern[-1].get('Date', None)
+                last_datetime = None
                 if last_date:
                     try:
                         last_datetime = datetime.strptime(last_date, '%Y-%m-%d %H:%M:%S').replace(second=0, microsecond=0)
                     except (ValueError, TypeError):
                         last_datetime = None
                 if last_datetime is None and last_timestamp is not None:
-                    try:
-                        last_datetime = datetime.fromtimestamp(last_timestamp / 1000.0).replace(second=0, microsecond=0)
-                    except (ValueError, TypeError):
-                        last_datetime = datetime.now().replace(second=0, microsecond=0)
+                    last_datetime = self.parse_timestamp(last_timestamp)
                 elif last_datetime is None:
                     last_datetime = datetime.now().replace(second=0, microsecond=0)
 
-                inserted_count += await self.save_signal_pattern(ticker, pattern, direction, last_datetime, pattern_length, pattern_offset, sid, i, len(patterns))
+                values = self.pattern_values(pattern, pattern_length)
+                if values:
+                    records.pop(last_datetime, None)
+                    records[last_datetime] = (direction, values)
+                if len(records) >= SAVE_CHUNK_SIZE:
+                    inserted_count += await self.save_records(ticker, pattern_length, pattern_offset, records)
+                    records = {}
+                    if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                        last_progress = time.monotonic()
+                        await self.emit_progress(sid, i + 1, len(patterns))
+            if records:
+                inserted_count += await self.save_records(ticker, pattern_length, pattern_offset, records)
+            await self.emit_progress(sid, len(patterns), len(patterns))
 
             if inserted_count == 0:
                 await self.sio.emit('train_complete', {
@@ -212,96 +246,159 @@ class TrainManager:
                 }, namespace='/train', to=sid)
                 return 0
 
-            connection.commit()
             return inserted_count
         except Exception:
-            if connection:
-                connection.rollback()
             await self.sio.emit('train_complete', {
                 'status': 'failure',
                 'message': 'Database error'
             }, namespace='/train', to=sid)
             return 0
-        finally:
-            if cursor:
+
+    @staticmethod
+    def report_filters(data):
+        filters = {}
+        if data.get('ticker'):
+            filters['ticker'] = str(data['ticker']).strip().upper()
+        for key in ('start', 'end'):
+            if data.get(key):
+                value = str(data[key])
+                filters[key] = datetime.strptime(value, '%Y-%m-%d %H:%M:%S' if ' ' in value else '%Y-%m-%d')
+        if data.get('classification') is not None:
+            filters['classification'] = int(data['classification'])
+        return filters
+
+    @staticmethod
+    def encode_report_cursor(row):
+        return base64.urlsafe_b64encode(json.dumps([row[1], row[2].strftime('%Y-%m-%d %H:%M:%S'), row[0]]).encode()).decode()
+
+    @staticmethod
+    def decode_report_cursor(token):
+        ticker, datetimestamp, cid = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        return ticker, datetime.strptime(datetimestamp, '%Y-%m-%d %H:%M:%S'), int(cid)
+
+    @staticmethod
+    def report_query(filters, after=None, limit=None):
+        conditions = []
+        params = []
+        if 'ticker' in filters:
+            conditions.append("c.ticker = %s")
+            params.append(filters['ticker'])
+        if 'start' in filters:
+            conditions.append("c.datetimestamp >= %s")
+            params.append(filters['start'])
+        if 'end' in filters:
+            conditions.append("c.datetimestamp <= %s")
+            params.append(filters['end'])
+        if 'classification' in filters:
+            conditions.append("c.classification = %s")
+            params.append(filters['classification'])
+        if after:
+            conditions.append("(c.ticker, c.datetimestamp, c.cid) > (%s, %s, %s)")
+            params.extend(after)
+        query = f"""
+            SELECT c.cid, c.ticker, c.datetimestamp, c.classification, c.pattern_length, c.pattern_offset,
+                   b.schema_version, b.candles, b.features
+            FROM classifications_tb c
+            LEFT JOIN pattern_blobs b ON b.cid = c.cid
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY c.ticker, c.datetimestamp, c.cid
+        """
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, params
+
+    @staticmethod
+    def report_patterns(connection, rows):
+        legacy = {}
+        missing = [row[0] for row in rows if row[8] is None]
+        if missing:
+            cursor = connection.cursor()
+            try:
+                legacy = legacy_values(cursor, missing)
+            finally:
                 cursor.close()
-            if connection:
-                connection.close()
+        patterns = []
+        for cid, ticker, datetimestamp, classification, pattern_length, pattern_offset, schema_version, candles, blob in rows:
+            if blob is not None:
+                candlesticks = candle_dicts(unpack_features(bytes(blob), candles, schema_version), schema_version)
+            else:
+                candlesticks = candle_dicts(unpack_features(pack_values(legacy.get(cid, []), pattern_length), pattern_length, PATTERN_SCHEMA_VERSION))
+            patterns.append({
+                "cid": cid,
+                "ticker": ticker,
+                "datetimestamp": datetimestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                "classification": classification,
+                "pattern_length": pattern_length,
+                "pattern_offset": pattern_offset,
+                "candlesticks": [candle for candle in candlesticks if candle]
+            })
+        return patterns
 
-    async def get_full_report(self, sid):
-        connection = None
-        cursor = None
+    def report_page(self, connection, filters, after, page_size):
+        cursor = connection.cursor()
         try:
-            connection = db_pool.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            # Query classifications_tb for all classifications
-            classifications_query = """
-                SELECT cid, ticker, datetimestamp, classification, pattern_length, pattern_offset
-                FROM classifications_tb
-                ORDER BY ticker, datetimestamp
-            """
-            cursor.execute(classifications_query)
-            classifications = cursor.fetchall()
-
-            # Initialize report structure
-            report = {
-                "patterns": []
-            }
-
-            # For each classification, fetch associated patterns from patterns_tb
-            for cls in classifications:
-                patterns_query = """
-                    SELECT candle_index, col_name, col_value
-                    FROM patterns_tb
-                    WHERE cid = %s
-                    ORDER BY candle_index, col_name
-                """
-                cursor.execute(patterns_query, (cls['cid'],))
-                patterns_data = cursor.fetchall()
-
-                # Organize patterns by candle_index
-                candlesticks = {}
-                for pattern in patterns_data:
-                    candle_idx = pattern['candle_index']
-                    if candle_idx not in candlesticks:
-                        candlesticks[candle_idx] = {}
-                    candlesticks[candle_idx][pattern['col_name']] = float(pattern['col_value'])
-
-                # Convert candlesticks to list format
-                pattern_list = [
-                    candlesticks[i] for i in sorted(candlesticks.keys())
-                ]
-
-                # Add classification and pattern data to report
-                report["patterns"].append({
-                    "cid": cls['cid'],
-                    "ticker": cls['ticker'],
-                    "datetimestamp": cls['datetimestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                    "classification": cls['classification'],
-                    "pattern_length": cls['pattern_length'],
-                    "pattern_offset": cls['pattern_offset'],
-                    "candlesticks": pattern_list
-                })
-
-            # Emit report to frontend
+            query, params = self.report_query(filters, after, page_size)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return self.report_patterns(connection, rows), (self.encode_report_cursor(rows[-1]) if len(rows) == page_size else None)
+
+    async def emit_report_chunk(self, sid, patterns, cursor, sent):
+        await self.sio.emit('full_report', {
+            'status': 'success',
+            'data': {'patterns': patterns},
+            'cursor': cursor,
+            'done': cursor is None,
+            'sent': sent
+        }, namespace='/train', to=sid)
+
+    async def get_full_report(self, sid, data=None):
+        data = data or {}
+        try:
+            filters = self.report_filters(data)
+            after = self.decode_report_cursor(data['cursor']) if data.get('cursor') else None
+            page_size = max(1, min(int(data.get('page_size', REPORT_PAGE_SIZE)), REPORT_MAX_PAGE_SIZE))
+        except (ValueError, TypeError, KeyError):
             await self.sio.emit('full_report', {
-                'status': 'success',
-                'data': report
+                'status': 'failure',
+                'message': 'Invalid report filters or cursor'
             }, namespace='/train', to=sid)
-
-            return len(report["patterns"])
+            return -1
+        try:
+            if not data.get('stream'):
+                patterns, cursor = await database.run(self.report_page, filters, after, page_size)
+                if patterns or after:
+                    await self.emit_report_chunk(sid, patterns, cursor, len(patterns))
+                return len(patterns)
+            return await self.stream_full_report(sid, filters, after, page_size)
         except Exception:
             await self.sio.emit('full_report', {
                 'status': 'failure',
                 'message': 'Failed to generate report'
             }, namespace='/train', to=sid)
-            return 0
+            return -1
+
+    async def stream_full_report(self, sid, filters, after, page_size):
+        # One keyset page per transaction: every page gets the query timeout and hands its connection back
+        self.report_stops[sid] = False
+        sent = 0
+        try:
+            while not self.report_stops.get(sid):
+                patterns, cursor = await database.run(self.report_page, filters, after, page_size)
+                if not patterns:
+                    if sent or after:
+                        await self.emit_report_chunk(sid, [], None, sent)
+                    break
+                sent += len(patterns)
+                await self.emit_report_chunk(sid, patterns, cursor, sent)
+                if cursor is None:
+                    break
+                after = self.decode_report_cursor(cursor)
+            return sent
         finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+            self.report_stops.pop(sid, None)
 
 # Initialize Socket.IO server
 try:
@@ -326,6 +423,8 @@ async def connect(sid, environ):
 @sio.event(namespace='/train')
 async def disconnect(sid):
     train_manager.cancel_flags.pop(sid, None)
+    if sid in train_manager.report_stops:
+        train_manager.report_stops[sid] = True
 
 @sio.event(namespace='/train')
 async def save_patterns(sid, data):
@@ -354,13 +453,18 @@ async def save_patterns(sid, data):
 
 @sio.event(namespace='/train')
 async def get_full_report(sid, data):
-    inserted_count = await train_manager.get_full_report(sid)
-    if inserted_count == 0:
+    inserted_count = await train_manager.get_full_report(sid, data)
+    if inserted_count == 0 and not (data or {}).get('cursor'):
         await sio.emit('full_report', {
             'status': 'failure',
             'message': 'No patterns found in database'
         }, namespace='/train', to=sid)
 
+@sio.event(namespace='/train')
+async def stop_full_report(sid, data=None):
+    if sid in train_manager.report_stops:
+        train_manager.report_stops[sid] = True
+
 # Run the server
 if __name__ == '__main__':
     try:
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import tradingview_scraper
+from tradingview_scraper import GainersScraper
+
+MODES = ('normal', 'premarket', 'aftermarket')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'gainers')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Serves <pages>/<mode>.html with ETag/Last-Modified; server.fail_next forces 503s
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.connections.add(self.client_address)
+        time.sleep(server.delay)
+        if server.fail_next > 0:
+            server.fail_next -= 1
+            return self.reply(503, b'unavailable')
+        mode = self.path.strip('/')
+        if mode not in server.pages:
+            return self.reply(404, b'not found')
+        body, etag, modified = server.pages[mode]
+        if self.headers.get('If-None-Match') == etag:
+            server.not_modified += 1
+            return self.reply(304, b'', etag, modified)
+        self.reply(200, body, etag, modified)
+
+    def reply(self, status, body, etag=None, modified=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(pages_dir, delay):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.pages = {}
+    server.pages_path = {mode: os.path.join(pages_dir, f"{mode}.html") for mode in MODES}
+    for mode in MODES:
+        with open(server.pages_path[mode], 'rb') as f:
+            body = f.read()
+        server.pages[mode] = (body, '"' + hashlib.sha1(body).hexdigest() + '"', formatdate(usegmt=True))
+    server.delay = delay
+    server.fail_next = 0
+    server.requests = 0
+    server.not_modified = 0
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run_async(server, urls):
+    scraper = GainersScraper(urls, failure_threshold=2, backoff_base=0.5)
+    try:
+        start = time.perf_counter()
+        first = await scraper.fetch_all()
+        print(f"first fetch_all   {time.perf_counter() - start:6.3f}s rows={ {mode: len(rows) for mode, rows in first.items()} }")
+        start = time.perf_counter()
+        second = await scraper.fetch_all()
+        print(f"second fetch_all  {time.perf_counter() - start:6.3f}s not_modified={server.not_modified} same={second == first}")
+        server.fail_next = 2
+        for _ in range(2):
+            try:
+                await scraper.fetch('normal')
+            except Exception as e:
+                print(f"failure           {type(e).__name__}")
+        requests = server.requests
+        await scraper.fetch('normal')
+        print(f"backing off       requests_sent={server.requests - requests} skipped={scraper.stats['skipped']}")
+        await asyncio.sleep(0.6)
+        await scraper.fetch('normal')
+        print(f"recovered         requests_sent={server.requests - requests} failures={scraper.state['normal']['failures']}")
+    finally:
+        await scraper.close()
+
+def main(pages_dir, delay):
+    server = serve(pages_dir, delay)
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    urls = {mode: base + mode for mode in MODES}
+    try:
+        asyncio.run(run_async(server, urls))
+        tradingview_scraper.sync_scraper.urls.update(urls)
+        start = time.perf_counter()
+        rows = [len(tradingview_scraper.get_gainers(mode)) for mode in MODES]
+        print(f"sync get_gainers  {time.perf_counter() - start:6.3f}s rows={rows}")
+        print(f"stand-in served {server.requests} requests over {len(server.connections)} connections")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the gainers scraper against a local stand-in serving saved pages.")
+    parser.add_argument('pages', nargs='?', default=FIXTURES_DIR, help='Directory with normal.html, premarket.html and aftermarket.html (default: fixtures/gainers)')
+    parser.add_argument('--delay', type=float, default=0.2, help='Simulated server latency per request (default: 0.2)')
+    args = parser.parse_args()
+    main(args.pages, args.delay)
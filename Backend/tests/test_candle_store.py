@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from candle_store import BAR_SECONDS, CandleStore
+
+
+def raw_bars(n):
+    index = pd.date_range('2025-01-06 09:30', periods=n, freq='5min', name='Datetime')
+    close = 100 + np.arange(n, dtype=float)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000.0}, index=index)
+
+def test_discard_drops_only_the_cached_frame(tmp_path):
+    store = CandleStore(str(tmp_path / 'candles.sqlite'))
+    try:
+        store.merge('AAA', raw_bars(12), now=2e9)
+        store.merge('BBB', raw_bars(6), now=2e9)
+        cached = store.frames['AAA']
+        store.discard('AAA')
+        store.discard('CCC')
+        assert list(store.frames) == ['BBB']
+        reloaded = store.load('AAA')
+        assert reloaded is not cached
+        pd.testing.assert_frame_equal(reloaded, cached, check_names=False)
+        assert store.tail_start('AAA', now=reloaded.index[-1] + BAR_SECONDS) is not None
+    finally:
+        store.close()
@@ -0,0 +1,75 @@
+from datetime import date
+from classification_stats import ADD_DAY_STATS_QUERY, ADD_STATS_QUERY, ADD_TICKER_STATS_QUERY, SET_STATS_QUERY, reconcile_stats, stats_corrections
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = results
+        self.rows = []
+        self.writes = []
+
+    def execute(self, query, params=()):
+        for prefix, rows in self.results.items():
+            if prefix in ' '.join(query.split()):
+                self.rows = rows
+                return
+        self.rows = []
+        if 'CREATE TABLE' not in query:
+            self.writes.append((query, params))
+
+    def executemany(self, query, rows):
+        self.writes.append((query, list(rows)))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, results):
+        self.cursor_ = FakeCursor(results)
+        self.snapshots = 0
+
+    def cursor(self):
+        return self.cursor_
+
+    def start_transaction(self, consistent_snapshot=False, readonly=False):
+        assert consistent_snapshot
+        self.snapshots += 1
+
+    def commit(self):
+        pass
+
+
+def written(cursor, query):
+    return [params for q, params in cursor.writes if q == query]
+
+def test_corrections_cover_both_sides():
+    assert stats_corrections({'A': 3, 'B': 1}, {'A': 3, 'B': 2, 'C': 4}) == {'B': -1, 'C': -4}
+    assert stats_corrections({}, {}) == {}
+
+def test_reconcile_adds_only_the_differences():
+    day = date(2025, 1, 6)
+    conn = FakeConnection({
+        'SELECT ticker, COUNT(*) FROM classifications_tb GROUP BY ticker': [('AAA', 3), ('BBB', 2)],
+        'SELECT ticker, DATE(datetimestamp), COUNT(*)': [('AAA', day, 3), ('BBB', day, 2)],
+        'SELECT classification, COUNT(*)': [(1, 2), (2, 3)],
+        'SELECT ticker, total FROM classification_ticker_stats': [('AAA', 3), ('BBB', 1), ('CCC', 4)],
+        'SELECT ticker, day, total FROM classification_day_stats': [('AAA', day, 3), ('BBB', day, 1), ('CCC', day, 4)],
+        'SELECT name, value FROM classification_stats': [('total', 8), ('tickers', 3), ('class_1', 2), ('class_2', 6), ('size_bytes', 1), ('reconciled_at', 1)],
+        'information_schema.TABLES': [(4096,)]
+    })
+    reconcile_stats(conn, 'stocksocket')
+    cursor = conn.cursor()
+    assert conn.snapshots == 1
+    assert sorted(written(cursor, ADD_TICKER_STATS_QUERY)[0]) == [('BBB', 1), ('CCC', -4)]
+    assert sorted(written(cursor, ADD_DAY_STATS_QUERY)[0]) == [('BBB', day, 1), ('CCC', day, -4)]
+    assert sorted(written(cursor, ADD_STATS_QUERY)[0]) == [('class_2', -3), ('tickers', -1), ('total', -3)]
+    deletes = [params for query, params in cursor.writes if query.startswith('DELETE')]
+    assert deletes == [[('CCC',)], [('CCC', day)]]
+    assert written(cursor, SET_STATS_QUERY)[0] == ('size_bytes', 4096)
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+import pytest
+import compute
+from compute import ALLOWED_COLUMNS, PATTERN_LENGTH, pattern_windows
+
+
+class FakeScaler:
+    def transform(self, X):
+        return X
+
+
+class FakeModel:
+    def predict(self, X):
+        return (np.floor(np.abs(X).sum(axis=1)) % 3).astype(int) + 1
+
+    def predict_proba(self, X):
+        first = 1 / (1 + np.exp(-X[:, 3] / 100))
+        return np.column_stack((first, 1 - first))
+
+
+class FeatureEngine:
+    # Stands in for IndicatorEngine where ta cannot run on so few bars
+    def update(self, ticker, df):
+        features = feature_frame(len(df), seed=len(df))
+        for col in ALLOWED_COLUMNS:
+            if col not in df.columns:
+                df[col] = features[col].to_numpy()
+        df['cpp_smoothed'] = 0.0
+        return df
+
+
+def predict_patterns(df, model=FakeModel(), scaler=FakeScaler()):
+    # The per-row loop pattern_windows replaced
+    if len(df) < PATTERN_LENGTH:
+        df['prediction'] = 0
+        df['prediction_values'] = 0.0
+        return df
+    df['prediction'] = 0
+    df['prediction_values'] = 0.0
+    patterns = []
+    valid_indices = []
+    for i in range(PATTERN_LENGTH - 1, len(df)):
+        pattern = df.iloc[i - PATTERN_LENGTH + 1:i + 1][ALLOWED_COLUMNS].values
+        if pattern.shape == (PATTERN_LENGTH, len(ALLOWED_COLUMNS)):
+            patterns.append(pattern.flatten())
+            valid_indices.append(i)
+    if not patterns:
+        return df
+    X = np.array(patterns, dtype=float)
+    X = np.nan_to_num(X, nan=0.0, posinf=1e6, neginf=-1e6)
+    X = np.clip(X, -1e6, 1e6)
+    X_scaled = scaler.transform(X)
+    predictions = model.predict(X_scaled)
+    max_probs = np.max(model.predict_proba(X_scaled), axis=1)
+    for idx, pred, prob in zip(valid_indices, predictions, max_probs):
+        df.loc[df.index[idx], 'prediction'] = int(pred)
+        df.loc[df.index[idx], 'prediction_values'] = float(prob)
+    return df
+
+def feature_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 50, (n, len(ALLOWED_COLUMNS)))
+    if n:
+        values[rng.random((n, len(ALLOWED_COLUMNS))) < 0.02] = np.nan
+        values[0, 0] = np.inf
+        values[-1, 1] = -np.inf
+        values[n // 2, 2] = 5e7
+    df = pd.DataFrame(values, columns=ALLOWED_COLUMNS)
+    df.insert(0, 'date', pd.date_range('2025-01-06 14:30', periods=n, freq='5min').strftime('%Y-%m-%d %H:%M:%S'))
+    return df
+
+def raw_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    index = pd.date_range('2025-01-06 09:30', periods=n, freq='5min', name='Datetime')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * 1.001,
+        'Low': np.minimum(open_, close) * 0.999,
+        'Close': close,
+        'Volume': rng.integers(1000, 100000, n).astype(float)
+    }, index=index)
+
+@pytest.mark.parametrize('n', [0, 1, PATTERN_LENGTH - 1, PATTERN_LENGTH, PATTERN_LENGTH + 1, 200])
+def test_windows_match_row_loop(n):
+    df = feature_frame(n)
+    features, X, sessions = pattern_windows(df)
+    expected = [df.iloc[i - PATTERN_LENGTH + 1:i + 1][ALLOWED_COLUMNS].values.flatten() for i in range(PATTERN_LENGTH - 1, n)]
+    expected = np.clip(np.nan_to_num(np.array(expected, dtype=float).reshape(-1, PATTERN_LENGTH * len(ALLOWED_COLUMNS)), nan=0.0, posinf=1e6, neginf=-1e6), -1e6, 1e6)
+    assert X.shape == expected.shape
+    assert np.array_equal(X, expected)
+    assert len(sessions) == len(X)
+    assert features.shape == (n, len(ALLOWED_COLUMNS))
+
+def test_windows_are_views_of_features():
+    features, X, sessions = pattern_windows(feature_frame(50))
+    assert np.shares_memory(X, features)
+    assert not X.flags.writeable
+
+@pytest.mark.parametrize('n, engine', [
+    (1, FeatureEngine),
+    (PATTERN_LENGTH - 1, FeatureEngine),
+    (PATTERN_LENGTH, FeatureEngine),
+    (PATTERN_LENGTH + 1, FeatureEngine),
+    (300, None)
+])
+def test_write_back_matches_row_loop(n, engine, monkeypatch):
+    compute.init_worker()
+    if engine is not None:
+        monkeypatch.setattr(compute, 'indicator_engine', engine())
+    model, scaler = FakeModel(), FakeScaler()
+    versions = {session: 'v1' for session in ('premarket', 'normal_hours', 'aftermarket', 'closed')}
+    prepared = compute.prepare_ticker('TEST', raw_bars(n), {}, versions)
+    df = compute.pending['TEST']['df']
+    expected = predict_patterns(df.copy(), model, scaler)
+    X, sessions = prepared
+    X = scaler.transform(np.asarray(X))
+    if len(X):
+        prediction, prediction_values = model.predict(X), np.max(model.predict_proba(X), axis=1)
+    else:
+        prediction, prediction_values = np.zeros(0, dtype=int), np.zeros(0)
+    compute.finish_ticker('TEST', prediction, prediction_values, np.full(len(X), 'v1', dtype=object))
+    assert np.array_equal(df['prediction'].to_numpy(), expected['prediction'].to_numpy())
+    assert np.allclose(df['prediction_values'].to_numpy(), expected['prediction_values'].to_numpy())
+
+def test_pool_restarts_broken_shard_without_fork():
+    async def run():
+        pool = compute.ComputePool(workers=1)
+        try:
+            assert pool.shards == [None]
+            assert pool.context.get_start_method() == 'forkserver'
+            pid = await pool.run('TEST', os.getpid)
+            os.kill(pid, signal.SIGKILL)
+            with pytest.raises(BrokenProcessPool):
+                await pool.run('TEST', time.sleep, 0.5)
+            restarted = await pool.run('TEST', os.getpid)
+            assert restarted != pid
+        finally:
+            pool.shutdown()
+    asyncio.run(run())
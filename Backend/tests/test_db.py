@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+import pytest
+
+pytest.importorskip('mysql.connector')
+from mysql.connector import Error
+from db import Database
+
+
+class FakeConnection:
+    # Stands in for a pooled session: statements block until the session is killed or released
+    def __init__(self, server, connection_id):
+        self.server = server
+        self.connection_id = connection_id
+        self.killed = threading.Event()
+
+    def execute(self, seconds):
+        if self.killed.wait(seconds):
+            raise Error("Query execution was interrupted")
+
+    def commit(self):
+        if self.killed.is_set():
+            raise Error("Lost connection to MySQL server")
+        self.server.committed.append(self.connection_id)
+
+    def rollback(self):
+        self.server.rolled_back.append(self.connection_id)
+
+    def close(self):
+        self.server.idle.append(self)
+
+
+class FakeServer:
+    def __init__(self):
+        self.sessions = {}
+        self.committed = []
+        self.rolled_back = []
+        self.killed = []
+        self.idle = []
+
+    def get_connection(self):
+        # Like the real pool, a returned session is handed out again under the same id, reconnected if it died
+        if self.idle:
+            conn = self.idle.pop()
+            conn.killed = threading.Event()
+            return conn
+        conn = FakeConnection(self, len(self.sessions) + 1)
+        self.sessions[conn.connection_id] = conn
+        return conn
+
+    def kill(self, connection_id):
+        self.killed.append(connection_id)
+        self.sessions[connection_id].killed.set()
+
+
+@pytest.fixture
+def database():
+    database = Database({'host': '127.0.0.1', 'port': 1, 'pool_size': 2}, timeout=0.2, name='test_db')
+    server = FakeServer()
+    database.pool = server
+    database.kill = server.kill
+    yield database, server
+    database.close()
+
+def test_run_commits_within_timeout(database):
+    database, server = database
+    assert asyncio.run(database.run(lambda conn: conn.execute(0.01) or 'ok')) == 'ok'
+    assert server.committed == [1] and not server.killed
+
+def test_timeout_kills_the_session_and_rolls_back(database):
+    database, server = database
+    start = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(database.run(lambda conn: conn.execute(5)))
+    assert time.perf_counter() - start < 2
+    assert server.killed == [1]
+    assert server.committed == []
+    assert server.rolled_back == [1]
+
+def test_timeout_reports_a_commit_that_won_the_race(database):
+    database, server = database
+    server.kill = lambda connection_id: (time.sleep(0.3), server.killed.append(connection_id))
+    database.kill = server.kill
+    assert asyncio.run(database.run(lambda conn: conn.execute(0.3) or 'saved')) == 'saved'
+    assert server.committed == [1]
+
+def test_timeout_before_start_never_runs(database):
+    database, server = database
+    ran = []
+    async def run():
+        blockers = [asyncio.create_task(database.run(lambda conn: conn.execute(5), timeout=5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await database.run(lambda conn: ran.append(conn), timeout=0.1)
+        for conn in server.sessions.values():
+            conn.killed.set()
+        await asyncio.gather(*blockers, return_exceptions=True)
+    asyncio.run(run())
+    time.sleep(0.05)
+    assert ran == []
+
+def test_kill_never_reaches_a_reused_session(database):
+    database, server = database
+    kill = server.kill
+    server.kill = lambda connection_id: (time.sleep(0.3), kill(connection_id))
+    database.kill = server.kill
+    async def run():
+        first = asyncio.create_task(database.run(lambda conn: conn.execute(0.25) or 'saved'))
+        await asyncio.sleep(0.35)
+        second = await database.run(lambda conn: conn.execute(0.4) or conn.connection_id, timeout=5)
+        return await first, second
+    first, second = asyncio.run(run())
+    assert first == 'saved'
+    assert second != 1
+    assert server.killed == [1]
+    assert server.committed == [1, second]
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import pandas as pd
+import download_batcher
+from download_batcher import DownloadBatcher
+
+
+def batch_frame(tickers):
+    columns = pd.MultiIndex.from_product([tickers, ['Close']])
+    return pd.DataFrame([[float(i) for i in range(len(tickers))]], columns=columns)
+
+def fetch_all(batcher, tickers):
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.fetch(ticker) for ticker in tickers), return_exceptions=True), 5)
+    return asyncio.run(run())
+
+def test_batches_and_splits():
+    calls = []
+    def download(tickers, start):
+        calls.append(list(tickers))
+        return batch_frame(tickers)
+    results = fetch_all(DownloadBatcher(download, batch_size=2, window=0.01), ['A', 'B', 'C'])
+    assert calls == [['A', 'B'], ['C']]
+    assert [frame['Close'].tolist() for frame in results] == [[0.0], [1.0], [0.0]]
+
+def test_failed_download_resolves_every_caller():
+    def download(tickers, start):
+        raise RuntimeError('rate limited')
+    results = fetch_all(DownloadBatcher(download, window=0.01), ['A', 'B'])
+    assert all(isinstance(frame, pd.DataFrame) and frame.empty for frame in results)
+
+def test_failed_split_resolves_every_caller(monkeypatch):
+    split = download_batcher.split_download
+    def split_download(raw, ticker):
+        if ticker == 'A':
+            raise KeyError(ticker)
+        return split(raw, ticker)
+    monkeypatch.setattr(download_batcher, 'split_download', split_download)
+    results = fetch_all(DownloadBatcher(lambda tickers, start: batch_frame(tickers), window=0.01), ['A', 'B'])
+    assert results[0].empty
+    assert results[1]['Close'].tolist() == [1.0]
+
+def test_cancelled_flush_fails_waiting_callers():
+    release = threading.Event()
+    def download(tickers, start):
+        release.wait(5)
+        return batch_frame(tickers)
+
+    async def run():
+        batcher = DownloadBatcher(download, window=0.01)
+        fetches = [asyncio.create_task(batcher.fetch(ticker)) for ticker in ('A', 'B')]
+        await asyncio.sleep(0)
+        flusher = batcher.flusher
+        await asyncio.sleep(0.05)
+        flusher.cancel()
+        try:
+            return await asyncio.wait_for(asyncio.gather(*fetches, return_exceptions=True), 1)
+        finally:
+            release.set()
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import MIN_BARS, OUTPUT_COLUMNS, IndicatorEngine, add_indicators
+
+HEAD_COLUMNS = [
+    'trend_vortex_ind_pos', 'trend_vortex_ind_neg', 'trend_vortex_ind_diff', 'trend_trix',
+    'trend_dpo', 'trend_kst', 'trend_kst_sig', 'trend_kst_diff', 'momentum_kama'
+]
+
+
+def bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        'date': pd.date_range('2025-01-06 04:00', periods=n, freq='5min').strftime('%Y-%m-%d %H:%M:%S'),
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, n)),
+        'low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, n)),
+        'close': close,
+        'volume': rng.integers(1000, 100000, n).astype(float)
+    })
+
+def rewrite_forming_bar(df, factor=1.01, volume=250000.0):
+    df = df.copy()
+    i = len(df) - 1
+    close = df.at[i, 'close'] * factor
+    df.loc[i, ['close', 'high', 'volume']] = [close, max(df.at[i, 'high'], close), volume]
+    return df
+
+def assert_parity(actual, df, rows=None):
+    expected = add_indicators(df.copy())
+    for col in OUTPUT_COLUMNS:
+        e = expected[col].to_numpy(dtype=float)
+        r = actual[col].to_numpy(dtype=float)
+        if rows is not None:
+            e, r = e[rows], r[rows]
+        close = np.isclose(r, e, rtol=1e-6, atol=1e-6, equal_nan=True)
+        assert close.all(), f"{col} differs from add_indicators at row {int(np.argmin(close))}"
+
+def test_seed_matches_batch():
+    df = bars(600)
+    assert_parity(IndicatorEngine().update('T', df.copy()), df)
+
+def test_forming_bar_rewrite_matches_batch():
+    df = bars(600, seed=1)
+    engine = IndicatorEngine()
+    engine.update('T', df.copy())
+    for step in range(3):
+        df = rewrite_forming_bar(df, factor=1.0 + 0.01 * (step + 1))
+        assert_parity(engine.update('T', df.copy()), df)
+
+def test_forming_bar_rewrite_refreshes_head_rows():
+    # vortex, trix, dpo, kst and kama pad with whole-series statistics, so a forming-bar
+    # change moves their first rows too; those rows must follow the batch path
+    df = bars(600, seed=2)
+    engine = IndicatorEngine()
+    before = engine.update('T', df.copy())
+    rewritten = rewrite_forming_bar(df)
+    after = engine.update('T', rewritten.copy())
+    head = np.arange(len(df)) < len(df) - 1
+    changed = 0
+    for col in HEAD_COLUMNS:
+        moved = ~np.isclose(before[col].to_numpy(dtype=float)[head], after[col].to_numpy(dtype=float)[head], equal_nan=True)
+        changed += int(moved.sum())
+    assert changed > 200
+    assert_parity(after, rewritten, rows=head)
+
+def test_appended_bars_match_batch():
+    df = bars(640, seed=3)
+    engine = IndicatorEngine()
+    engine.update('T', df.iloc[:600].copy())
+    for end in (601, 602, 610, 640):
+        part = df.iloc[:end].reset_index(drop=True)
+        assert_parity(engine.update('T', part.copy()), part)
+
+def test_appended_bar_after_forming_rewrite():
+    df = bars(620, seed=4)
+    engine = IndicatorEngine()
+    engine.update('T', df.iloc[:600].copy())
+    forming = rewrite_forming_bar(df.iloc[:600].reset_index(drop=True))
+    engine.update('T', forming.copy())
+    part = pd.concat([forming, df.iloc[600:602]], ignore_index=True)
+    assert_parity(engine.update('T', part.copy()), part)
+
+def test_window_slide_recomputes_from_start():
+    df = bars(640, seed=5)
+    engine = IndicatorEngine()
+    engine.update('T', df.iloc[:600].copy())
+    part = df.iloc[20:620].reset_index(drop=True)
+    assert_parity(engine.update('T', part.copy()), part)
+
+@pytest.mark.parametrize('n', [30, MIN_BARS - 1])
+def test_short_history_uses_batch_path(n):
+    df = bars(n, seed=6)
+    actual = IndicatorEngine().update('T', df.copy())
+    expected = add_indicators(df.copy())
+    for col in OUTPUT_COLUMNS:
+        assert np.allclose(actual[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float), equal_nan=True), col
+
+def flat_bars(n, start, price=100.0):
+    return pd.DataFrame({
+        'date': pd.date_range(start, periods=n, freq='5min').strftime('%Y-%m-%d %H:%M:%S'),
+        'open': price,
+        'high': price,
+        'low': price,
+        'close': price,
+        'volume': 0.0
+    })
+
+def test_flat_zero_volume_bars_match_batch():
+    df = bars(600, seed=7)
+    full = pd.concat([df, flat_bars(30, '2025-01-08 04:00')], ignore_index=True)
+    engine = IndicatorEngine()
+    engine.update('T', df.copy())
+    for end in (601, 620, 630):
+        part = full.iloc[:end].reset_index(drop=True)
+        assert_parity(engine.update('T', part.copy()), part)
+    flat = flat_bars(MIN_BARS + 20, '2025-01-06 04:00')
+    assert_parity(IndicatorEngine().update('T', flat.copy()), flat)
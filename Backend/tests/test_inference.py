@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+
+joblib = pytest.importorskip('joblib')
+from inference import InferenceService
+from model_registry import ModelRegistry
+
+
+class ConstantModel:
+    classes_ = np.array([1, 2])
+
+    def predict_proba(self, X):
+        return np.tile([0.25, 0.75], (len(X), 1))
+
+
+class FeatureModel:
+    classes_ = np.array([1, 2, 3])
+
+    def __init__(self, weight):
+        self.weight = weight
+
+    def predict_proba(self, X):
+        scores = np.exp(self.weight * X[:, :3])
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+class IdentityScaler:
+    def transform(self, X):
+        return X
+
+
+def save_model(path, timestamp, model=None):
+    joblib.dump({'model': model or ConstantModel(), 'scaler': IdentityScaler(), 'timestamp': timestamp}, path)
+
+def wait_loaded(registry, sessions):
+    for _ in range(100):
+        if all(registry.get(session) is not None for session in sessions):
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"models for {sessions} never loaded")
+
+def test_registry_loads_in_background(tmp_path, monkeypatch):
+    save_model(tmp_path / 'delphi_stock_model_premarket.pkl', 'a')
+    release = threading.Event()
+    load = joblib.load
+    def slow_load(path):
+        release.wait(5)
+        return load(path)
+    monkeypatch.setattr('model_registry.joblib.load', slow_load)
+    registry = ModelRegistry(str(tmp_path), check_interval=0)
+    start = time.perf_counter()
+    assert registry.get('premarket') is None
+    assert time.perf_counter() - start < 1
+    release.set()
+    for _ in range(100):
+        entry = registry.get('premarket')
+        if entry is not None:
+            break
+        time.sleep(0.01)
+    assert entry['version'] == 'delphi_stock_model_premarket@a'
+
+def test_shutdown_cancels_batch_in_flight(tmp_path):
+    save_model(tmp_path / 'delphi_stock_model_premarket.pkl', 'a')
+    release = threading.Event()
+
+    class SlowService(InferenceService):
+        def run(self, X, sessions):
+            release.wait(5)
+            return super().run(X, sessions)
+
+    async def run():
+        service = SlowService(ModelRegistry(str(tmp_path)), window=0.01)
+        request = asyncio.create_task(service.predict(np.zeros((3, 4)), np.array(['premarket'] * 3, dtype=object)))
+        await asyncio.sleep(0.05)
+        assert not service.pending
+        await service.shutdown()
+        try:
+            await asyncio.wait_for(asyncio.gather(request, return_exceptions=True), 1)
+        finally:
+            release.set()
+        return request
+
+    request = asyncio.run(run())
+    assert request.cancelled()
+
+def test_shared_batch_routes_results_to_each_ticker(tmp_path):
+    weights = {'premarket': 1.0, 'normal_hours': -2.0}
+    for session, weight in weights.items():
+        save_model(tmp_path / f"delphi_stock_model_{session}.pkl", 'a', FeatureModel(weight))
+    registry = ModelRegistry(str(tmp_path))
+    wait_loaded(registry, weights)
+    rng = np.random.default_rng(0)
+    requests = {}
+    for i, ticker in enumerate(('AAA', 'BBB', 'CCC', 'DDD')):
+        n = 3 + 2 * i
+        sessions = np.array(['premarket', 'normal_hours'] * n, dtype=object)[i:i + n]
+        requests[ticker] = (rng.normal(i, 1, (n, 4)), sessions)
+
+    async def run():
+        service = InferenceService(registry, window=0.05)
+        results = await asyncio.gather(*(service.predict(X, sessions) for X, sessions in requests.values()))
+        return dict(zip(requests, results)), service.stats()
+
+    results, stats = asyncio.run(run())
+    assert stats['batches'] == 1 and stats['mean_tickers'] == len(requests)
+    for ticker, (X, sessions) in requests.items():
+        prediction, prediction_values, versions = results[ticker]
+        for row, session in enumerate(sessions):
+            probabilities = FeatureModel(weights[session]).predict_proba(X[row:row + 1])[0]
+            assert prediction[row] == FeatureModel.classes_[np.argmax(probabilities)]
+            assert prediction_values[row] == pytest.approx(probabilities.max())
+            assert versions[row] == f"delphi_stock_model_{session}@a"
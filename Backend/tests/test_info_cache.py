@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from info_cache import TickerInfoCache
+
+GROUPS = {
+    'static': (['sector', 'longName'], 60, 'info'),
+    'quote': (['dayHigh', 'dayLow'], 0.05, 'fast_info')
+}
+
+
+class FakeSource:
+    def __init__(self, values, release=None):
+        self.values = values
+        self.release = release
+        self.calls = []
+
+    def __call__(self, ticker, keys):
+        self.calls.append((ticker, list(keys)))
+        if self.release is not None:
+            self.release.wait(5)
+        return {key: f"{ticker}:{self.values[key]}:{len(self.calls)}" for key in keys if key in self.values}
+
+
+def sources(release=None):
+    return {
+        'info': FakeSource({'sector': 'tech', 'longName': 'name', 'dayHigh': 'stale'}, release),
+        'fast_info': FakeSource({'dayHigh': 'high', 'dayLow': 'low'}, release)
+    }
+
+async def settle(cache):
+    await asyncio.gather(*list(cache.inflight.values()))
+
+def test_refresh_is_single_flight():
+    release = threading.Event()
+    fetchers = sources(release)
+
+    async def run():
+        cache = TickerInfoCache(fetchers, groups=GROUPS)
+        assert cache.get('AAA') == {}
+        await asyncio.sleep(0.01)
+        first = cache.inflight['AAA']
+        for _ in range(5):
+            cache.get('AAA')
+            assert cache.inflight['AAA'] is first
+        release.set()
+        await settle(cache)
+        return cache.get('AAA')
+
+    values = asyncio.run(run())
+    assert len(fetchers['info'].calls) == 1 and len(fetchers['fast_info'].calls) == 1
+    assert values == {'sector': 'AAA:tech:1', 'longName': 'AAA:name:1', 'dayHigh': 'AAA:high:1', 'dayLow': 'AAA:low:1'}
+
+def test_evicts_least_recently_used():
+    async def run():
+        cache = TickerInfoCache(sources(), groups=GROUPS, max_size=2)
+        for ticker in ('AAA', 'BBB', 'AAA', 'CCC'):
+            cache.get(ticker)
+            await settle(cache)
+        return cache
+
+    cache = asyncio.run(run())
+    assert list(cache.entries) == ['AAA', 'CCC']
+
+def test_only_expired_groups_are_refetched():
+    fetchers = sources()
+
+    async def run():
+        cache = TickerInfoCache(fetchers, groups=GROUPS)
+        cache.get('AAA')
+        await settle(cache)
+        await asyncio.sleep(0.06)
+        cache.get('AAA')
+        await settle(cache)
+        return cache.get('AAA')
+
+    values = asyncio.run(run())
+    assert fetchers['info'].calls == [('AAA', ['sector', 'longName'])]
+    assert fetchers['fast_info'].calls == [('AAA', ['dayHigh', 'dayLow'])] * 2
+    assert values['sector'] == 'AAA:tech:1'
+    assert values['dayHigh'] == 'AAA:high:2'
@@ -0,0 +1,52 @@
+from datetime import datetime
+import pytest
+import pytz
+from market_calendar import EXCHANGE_TZ, early_closes, market_holidays, market_session, next_open, session_labels
+
+NYSE_HOLIDAYS = {
+    2021: ['2021-01-01', '2021-01-18', '2021-02-15', '2021-04-02', '2021-05-31', '2021-07-05', '2021-09-06', '2021-11-25', '2021-12-24'],
+    2022: ['2022-01-17', '2022-02-21', '2022-04-15', '2022-05-30', '2022-06-20', '2022-07-04', '2022-09-05', '2022-11-24', '2022-12-26'],
+    2023: ['2023-01-02', '2023-01-16', '2023-02-20', '2023-04-07', '2023-05-29', '2023-06-19', '2023-07-04', '2023-09-04', '2023-11-23', '2023-12-25'],
+    2024: ['2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29', '2024-05-27', '2024-06-19', '2024-07-04', '2024-09-02', '2024-11-28', '2024-12-25'],
+    2025: ['2025-01-01', '2025-01-09', '2025-01-20', '2025-02-17', '2025-04-18', '2025-05-26', '2025-06-19', '2025-07-04', '2025-09-01', '2025-11-27', '2025-12-25'],
+    2026: ['2026-01-01', '2026-01-19', '2026-02-16', '2026-04-03', '2026-05-25', '2026-06-19', '2026-07-03', '2026-09-07', '2026-11-26', '2026-12-25'],
+    2027: ['2027-01-01', '2027-01-18', '2027-02-15', '2027-03-26', '2027-05-31', '2027-06-18', '2027-07-05', '2027-09-06', '2027-11-25', '2027-12-24']
+}
+NYSE_EARLY_CLOSES = {
+    2021: ['2021-11-26'],
+    2022: ['2022-11-25'],
+    2023: ['2023-07-03', '2023-11-24'],
+    2024: ['2024-07-03', '2024-11-29', '2024-12-24'],
+    2025: ['2025-07-03', '2025-11-28', '2025-12-24'],
+    2026: ['2026-11-27', '2026-12-24'],
+    2027: ['2027-11-26']
+}
+
+
+def timestamp(text):
+    return EXCHANGE_TZ.localize(datetime.fromisoformat(text)).timestamp()
+
+@pytest.mark.parametrize('year', sorted(NYSE_HOLIDAYS))
+def test_holidays_match_nyse(year):
+    assert sorted(day.isoformat() for day in market_holidays(year)) == NYSE_HOLIDAYS[year]
+
+@pytest.mark.parametrize('year', sorted(NYSE_EARLY_CLOSES))
+def test_early_closes_match_nyse(year):
+    assert sorted(day.isoformat() for day in early_closes(year)) == NYSE_EARLY_CLOSES[year]
+
+def test_market_session_on_holiday_and_early_close():
+    assert market_session(timestamp('2025-07-04 11:00')) == 'closed'
+    assert market_session(timestamp('2025-11-28 12:59')) == 'normal_hours'
+    assert market_session(timestamp('2025-11-28 13:00')) == 'aftermarket'
+    assert market_session(timestamp('2025-11-28 17:00')) == 'closed'
+    assert market_session(timestamp('2025-12-01 16:30')) == 'aftermarket'
+
+def test_session_labels_match_market_session():
+    local = ['2025-11-26 15:55', '2025-11-27 10:00', '2025-11-28 09:25', '2025-11-28 12:55', '2025-11-28 13:05', '2025-11-28 17:30', '2025-11-29 10:00']
+    utc = [EXCHANGE_TZ.localize(datetime.fromisoformat(text)).astimezone(pytz.utc).strftime('%Y-%m-%d %H:%M:%S') for text in local]
+    assert list(session_labels(utc)) == [market_session(timestamp(text)) for text in local]
+    assert list(session_labels(utc)) == ['normal_hours', 'closed', 'premarket', 'normal_hours', 'aftermarket', 'closed', 'closed']
+
+def test_next_open_skips_holidays():
+    assert next_open(timestamp('2025-12-24 20:00')) == timestamp('2025-12-26 04:00')
+    assert next_open(timestamp('2026-04-02 21:00')) == timestamp('2026-04-06 04:00')
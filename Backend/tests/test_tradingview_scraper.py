@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+import pytest
+
+httpx = pytest.importorskip('httpx')
+from scraper_standin import FIXTURES_DIR, MODES, serve
+from tradingview_scraper import (SCRAPER_MAX_CONNECTIONS, GainersScraper, lxml_html, parse_gainers, parse_gainers_fragment,
+                                  parse_gainers_lxml, parse_gainers_soup, table_fragment)
+
+PAGES = [(mode, mode) for mode in MODES] + [('script_tbody', 'normal')]
+
+
+def expected_gainers(server, mode):
+    with open(server.pages_path[mode], encoding='utf-8') as f:
+        return parse_gainers(f.read(), mode)
+
+@pytest.fixture
+def standin():
+    server = serve(FIXTURES_DIR, 0.0)
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield server, {mode: base + mode for mode in MODES}
+    server.shutdown()
+    server.server_close()
+
+def test_revalidates_with_etag(standin):
+    server, urls = standin
+
+    async def run():
+        scraper = GainersScraper(urls)
+        try:
+            first = await scraper.fetch_all()
+            second = await scraper.fetch_all()
+            return first, second, dict(scraper.stats)
+        finally:
+            await scraper.close()
+
+    first, second, stats = asyncio.run(run())
+    for mode in MODES:
+        assert first[mode] == expected_gainers(server, mode)
+        assert len(first[mode]) > 0
+    assert second == first
+    assert server.not_modified == len(MODES)
+    assert stats['not_modified'] == len(MODES)
+    assert server.requests == 2 * len(MODES)
+    assert len(server.connections) <= SCRAPER_MAX_CONNECTIONS
+
+def test_backs_off_and_recovers(standin):
+    server, urls = standin
+
+    async def run():
+        scraper = GainersScraper(urls, failure_threshold=2, backoff_base=0.3)
+        try:
+            first = await scraper.fetch('normal')
+            server.fail_next = 2
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await scraper.fetch('normal')
+            assert scraper.state['normal']['retry_at'] > time.monotonic()
+            requests = server.requests
+            assert await scraper.fetch('normal') == first
+            assert server.requests == requests
+            assert scraper.stats['skipped'] == 1
+            await asyncio.sleep(0.35)
+            assert await scraper.fetch('normal') == first
+            assert server.requests == requests + 1
+            assert server.not_modified == 1
+            assert scraper.state['normal']['failures'] == 0
+            assert scraper.state['normal']['retry_at'] <= time.monotonic()
+        finally:
+            await scraper.close()
+
+    asyncio.run(run())
+
+@pytest.mark.parametrize('page, mode', PAGES)
+def test_parsers_match_whole_page_soup(page, mode):
+    with open(os.path.join(FIXTURES_DIR, f"{page}.html"), encoding='utf-8') as f:
+        html = f.read()
+    expected = parse_gainers_soup(html, mode)
+    assert expected
+    assert parse_gainers_fragment(html, mode) == expected
+    if lxml_html is not None:
+        assert parse_gainers_lxml(html, mode) == expected
+
+def test_table_fragment_skips_scripts_and_comments():
+    html = ('<script>var t = "<tbody><tr>script</tr></tbody>";</script><!-- <tbody> -->'
+            '<STYLE>tbody{}</STYLE><table><TBODY class="x"><tr><td>a</td></tr>'
+            '<script>"</tbody>"</script><!-- </tbody> --><tr><td>b</td></tr></tbody></table><tbody>late</tbody>')
+    fragment = table_fragment(html)
+    assert fragment.startswith('<table><TBODY class="x">')
+    assert '<td>b</td>' in fragment and 'late' not in fragment
+    assert table_fragment('<script><tbody></script><!-- <tbody> -->') is None
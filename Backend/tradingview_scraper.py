@@ -1,5 +1,35 @@
-import requests
+import asyncio
+import logging
+import re
+import threading
+import time
+import httpx
 from bs4 import BeautifulSoup
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+GAINERS_URLS = {
+    'normal': "https://www.tradingview.com/markets/stocks-usa/market-movers-gainers/",
+    'premarket': "https://www.tradingview.com/markets/stocks-usa/market-movers-pre-market-gainers/",
+    'aftermarket': "https://www.tradingview.com/markets/stocks-usa/market-movers-after-hours-gainers/"
+}
+GAINERS_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://www.google.com/",
+    "Connection": "keep-alive"
+}
+SCRAPER_CONNECT_TIMEOUT = 3.0
+SCRAPER_READ_TIMEOUT = 10.0
+SCRAPER_MAX_CONNECTIONS = 3
+SCRAPER_FAILURE_THRESHOLD = 3
+SCRAPER_BACKOFF_BASE = 30.0
+SCRAPER_BACKOFF_MAX = 600.0
+# Comments and script/style bodies are raw text to html.parser, so a <tbody inside them must not count
+TBODY_MARKUP = re.compile(r'<!--.*?(?:-->|\Z)|<(script|style)\b.*?(?:</\1\s*>|\Z)|<(/?)tbody[\s>]', re.IGNORECASE | re.DOTALL)
 
 def parse_number(text):
     if text == '—':
@@ -38,29 +68,9 @@ def parse_price(text):
     except ValueError:
         return None
 
-def get_gainers(mode='normal'):
-    urls = {
-        'normal': "https://www.tradingview.com/markets/stocks-usa/market-movers-gainers/",
-        'premarket': "https://www.tradingview.com/markets/stocks-usa/market-movers-pre-market-gainers/",
-        'aftermarket': "https://www.tradingview.com/markets/stocks-usa/market-movers-after-hours-gainers/"
-    }
-    
-    url = urls.get(mode)
-    if not url:
-        return []
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://www.google.com/",
-        "Connection": "keep-alive"
-    }
-    
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
+def parse_gainers_soup(html, mode='normal'):
+    # Reference parser: the whole page through BeautifulSoup's html.parser
+    soup = BeautifulSoup(html, 'html.parser')
     
     gainers = []
     
@@ -132,4 +142,179 @@ def get_gainers(mode='normal'):
             
             gainers.append(gainer)
     
-    return gainers
\ No newline at end of file
+    return gainers
+
+
+def table_fragment(html):
+    # Only the first tbody is read, so slice it out instead of building a tree for the whole page
+    start = None
+    for match in TBODY_MARKUP.finditer(html):
+        if match.group(2) is None:
+            continue
+        if start is None:
+            if not match.group(2):
+                start = match.start()
+        elif match.group(2):
+            return '<table>' + html[start:match.start()] + '</tbody></table>'
+    return '<table>' + html[start:] + '</tbody></table>' if start is not None else None
+
+def has_class(element, name):
+    return name in (element.get('class') or '').split()
+
+def gainer_record(mode, ticker, name, cells):
+    gainer = {
+        'ticker': ticker,
+        'name': name
+    }
+    if mode == 'normal':
+        if len(cells) < 12:
+            return None
+        gainer['change_percentage'] = parse_percentage(cells[1])
+        gainer['price'] = parse_price(cells[2].replace(' USD', ''))
+        gainer['volume'] = parse_number(cells[3])
+        gainer['rel_volume'] = parse_number(cells[4])
+        gainer['market_cap'] = parse_number(cells[5].replace(' USD', ''))
+        gainer['pe_ratio'] = parse_number(cells[6])
+        gainer['eps'] = parse_price(cells[7].replace(' USD', ''))
+        gainer['yearly_change'] = parse_percentage(cells[8])
+        gainer['dividend_yield'] = parse_percentage(cells[9])
+        gainer['sector'] = cells[10] if cells[10] != '—' else None
+        gainer['rating'] = cells[11] if cells[11] != '—' else None
+    elif mode == 'premarket':
+        if len(cells) < 10:
+            return None
+        gainer['change_percentage'] = parse_percentage(cells[1])
+        gainer['price'] = parse_price(cells[2].replace(' USD', ''))
+        gainer['change_amount'] = parse_price(cells[3].replace(' USD', ''))
+        gainer['volume'] = parse_number(cells[4])
+        gainer['gap_percent'] = parse_percentage(cells[5])
+        gainer['last_close'] = parse_price(cells[6].replace(' USD', ''))
+        gainer['regular_change_percent'] = parse_percentage(cells[7])
+        gainer['avg_volume'] = parse_number(cells[8])
+        gainer['market_cap'] = parse_number(cells[9].replace(' USD', ''))
+        if len(cells) > 10:
+            gainer['perf_ytd'] = parse_percentage(cells[10])
+    elif mode == 'aftermarket':
+        if len(cells) < 9:
+            return None
+        gainer['change_percentage'] = parse_percentage(cells[1])
+        gainer['price'] = parse_price(cells[2].replace(' USD', ''))
+        gainer['change_amount'] = parse_price(cells[3].replace(' USD', ''))
+        gainer['volume'] = parse_number(cells[4])
+        gainer['last_close'] = parse_price(cells[5].replace(' USD', ''))
+        gainer['perf_1d'] = parse_percentage(cells[6])
+        gainer['avg_volume'] = parse_number(cells[7])
+        gainer['market_cap'] = parse_number(cells[8].replace(' USD', ''))
+        if len(cells) > 9:
+            gainer['perf_ytd'] = parse_percentage(cells[9])
+    return gainer
+
+def parse_gainers_lxml(html, mode='normal'):
+    fragment = table_fragment(html)
+    if fragment is None:
+        return []
+    table = lxml_html.fromstring(fragment)
+    gainers = []
+    for row in table.iter('tr'):
+        if not has_class(row, 'row-RdUXZpkv'):
+            continue
+        data_rowkey = row.get('data-rowkey', '')
+        ticker = data_rowkey.split(':')[-1] if ':' in data_rowkey else 'Unknown'
+        sup = next((sup for sup in row.iter('sup') if has_class(sup, 'tickerDescription-GrtoTeat')), None)
+        name = sup.get('title', 'Unknown') if sup is not None else 'Unknown'
+        cells = [td.text_content().strip() for td in row.iter('td') if has_class(td, 'cell-RLhfr_y4')]
+        gainer = gainer_record(mode, ticker, name, cells)
+        if gainer is not None:
+            gainers.append(gainer)
+    return gainers
+
+def parse_gainers_fragment(html, mode='normal'):
+    fragment = table_fragment(html)
+    return parse_gainers_soup(fragment, mode) if fragment is not None else []
+
+parse_gainers = parse_gainers_lxml if lxml_html is not None else parse_gainers_fragment
+
+
+class GainersScraper:
+    # Pooled keep-alive client shared by all modes; the client is bound to the loop that first uses it
+    def __init__(self, urls=GAINERS_URLS, connect_timeout=SCRAPER_CONNECT_TIMEOUT, read_timeout=SCRAPER_READ_TIMEOUT,
+                 max_connections=SCRAPER_MAX_CONNECTIONS, failure_threshold=SCRAPER_FAILURE_THRESHOLD,
+                 backoff_base=SCRAPER_BACKOFF_BASE, backoff_max=SCRAPER_BACKOFF_MAX):
+        self.urls = dict(urls)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http = None
+        self.state = {mode: {'etag': None, 'last_modified': None, 'gainers': [], 'failures': 0, 'retry_at': 0.0} for mode in self.urls}
+        self.stats = {'requests': 0, 'not_modified': 0, 'failures': 0, 'skipped': 0}
+
+    def client(self):
+        if self.http is None:
+            self.http = httpx.AsyncClient(headers=GAINERS_HEADERS, timeout=self.timeout, limits=self.limits, follow_redirects=True)
+        return self.http
+
+    def backoff(self, state):
+        state['failures'] += 1
+        self.stats['failures'] += 1
+        if state['failures'] >= self.failure_threshold:
+            delay = min(self.backoff_base * 2 ** (state['failures'] - self.failure_threshold), self.backoff_max)
+            state['retry_at'] = time.monotonic() + delay
+            logging.error(f"Gainers scraper backing off {delay:.0f}s after {state['failures']} failures")
+
+    async def fetch(self, mode='normal'):
+        url = self.urls.get(mode)
+        if not url:
+            return []
+        state = self.state[mode]
+        if time.monotonic() < state['retry_at']:
+            self.stats['skipped'] += 1
+            return state['gainers']
+        headers = {}
+        if state['etag']:
+            headers['If-None-Match'] = state['etag']
+        if state['last_modified']:
+            headers['If-Modified-Since'] = state['last_modified']
+        self.stats['requests'] += 1
+        try:
+            response = await self.client().get(url, headers=headers)
+            if response.status_code == 304:
+                self.stats['not_modified'] += 1
+                state['failures'] = 0
+                return state['gainers']
+            response.raise_for_status()
+            loop = asyncio.get_running_loop()
+            gainers = await loop.run_in_executor(None, parse_gainers, response.text, mode)
+        except Exception:
+            self.backoff(state)
+            raise
+        state.update(etag=response.headers.get('etag'), last_modified=response.headers.get('last-modified'),
+                     gainers=gainers, failures=0, retry_at=0.0)
+        return gainers
+
+    async def fetch_all(self, modes=None):
+        modes = list(modes or self.urls)
+        results = await asyncio.gather(*(self.fetch(mode) for mode in modes), return_exceptions=True)
+        return dict(zip(modes, results))
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+
+sync_scraper = GainersScraper()
+sync_loop = None
+sync_lock = threading.Lock()
+
+def get_sync_loop():
+    global sync_loop
+    with sync_lock:
+        if sync_loop is None:
+            sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=sync_loop.run_forever, name='gainers-scraper', daemon=True).start()
+    return sync_loop
+
+def get_gainers(mode='normal'):
+    return asyncio.run_coroutine_threadsafe(sync_scraper.fetch(mode), get_sync_loop()).result()
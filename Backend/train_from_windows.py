@@ -22,6 +22,7 @@ import time
 from collections import Counter
 import matplotlib.pyplot as plt
 import seaborn as sns
+from pattern_store import LOAD_BATCH_SIZE, PATTERN_SCHEMAS, column_positions
 
 # Configure logging
 logging.basicConfig(
@@ -51,78 +52,119 @@ ALLOWED_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'volume_adi', 'volu
                    'momentum_pvo_hist', 'momentum_kama', 'others_dr', 'others_dlr', 'others_cr',
                    'momentum_ppo_sm', 'momentum_ppo_deg']
 
+COLUMN_INDEX = {col: j for j, col in enumerate(ALLOWED_COLUMNS)}
+
 DEFAULT_PATTERN_LENGTH = 5
 DEFAULT_OFFSET = 0
 MODEL_DIR = "Z:\\delphi\\models"
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-def load_data_from_db(pattern_length, offset, db_config):
+def load_training_set(pattern_length, offset, db_config, batch_size=LOAD_BATCH_SIZE):
+    # Streams classifications joined to their packed features straight into one preallocated array
+    conn = None
+    cursor = None
     try:
         conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT p.cid, p.candle_index, p.col_name, p.col_value, c.classification, c.datetimestamp
-            FROM patterns_tb p
-            JOIN classifications_tb c ON p.cid = c.cid
-            WHERE c.pattern_length = %s AND c.pattern_offset = %s
-        """
-        cursor.execute(query, (pattern_length, offset))
-        records = cursor.fetchall()
-        if not records:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM classifications_tb WHERE pattern_length = %s AND pattern_offset = %s",
+            (pattern_length, offset)
+        )
+        capacity = cursor.fetchone()[0]
+        cursor.close()
+        if not capacity:
             logger.error("No data found for pattern_length=%d, offset=%d", pattern_length, offset)
             return None
-        data = {}
-        for record in records:
-            cid = record['cid']
-            if cid not in data:
-                data[cid] = {'pattern': [{} for _ in range(pattern_length)], 'classification': record['classification'], 'datetimestamp': record['datetimestamp']}
-            if record['candle_index'] < pattern_length and record['col_name'] in ALLOWED_COLUMNS:
-                data[cid]['pattern'][record['candle_index']][record['col_name']] = record['col_value']
-        return data
+        X = np.full((capacity, pattern_length, len(ALLOWED_COLUMNS)), np.nan, dtype=np.float32)
+        y = np.zeros(capacity, dtype=np.int8)
+        timestamps = np.zeros(capacity, dtype='datetime64[s]')
+        positions = {}
+        legacy = {}
+        n = 0
+        cursor = conn.cursor(buffered=False)
+        cursor.execute("""
+            SELECT c.cid, c.classification, c.datetimestamp, b.schema_version, b.candles, b.features
+            FROM classifications_tb c
+            LEFT JOIN pattern_blobs b ON b.cid = c.cid
+            WHERE c.pattern_length = %s AND c.pattern_offset = %s
+        """, (pattern_length, offset))
+        while n < capacity:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for cid, classification, datetimestamp, schema_version, candles, blob in rows[:capacity - n]:
+                y[n] = classification
+                timestamps[n] = datetimestamp
+                if blob is None:
+                    legacy[cid] = n
+                else:
+                    if schema_version not in positions:
+                        columns = column_positions(schema_version, ALLOWED_COLUMNS)
+                        identity = len(columns) == len(PATTERN_SCHEMAS[schema_version]) and (columns == np.arange(len(columns))).all()
+                        positions[schema_version] = (None if identity else columns[columns >= 0], columns >= 0)
+                    sources, present = positions[schema_version]
+                    take = min(candles, pattern_length)
+                    features = np.frombuffer(blob, dtype=np.float32).reshape(candles, -1)
+                    if sources is None:
+                        X[n, :take] = features[:take]
+                    else:
+                        candles_view = X[n, :take]
+                        candles_view[:, present] = features[:take, sources]
+                n += 1
+        cursor.fetchall()
+        cursor.close()
+        cursor = None
+        if legacy:
+            fill_legacy_features(conn, X, legacy, pattern_length, batch_size)
+        X, y, timestamps = X[:n], y[:n], timestamps[:n]
+        valid = ~np.isnan(X).all(axis=2).any(axis=1)
+        if not valid.any():
+            logger.error("No pattern features found for pattern_length=%d, offset=%d", pattern_length, offset)
+            return None
+        logger.info("Loaded %d patterns (%d from patterns_tb, %d dropped with empty candles)", valid.sum(), len(legacy), n - valid.sum())
+        return X[valid], y[valid], timestamps[valid]
     except mysql.connector.Error as e:
         logger.error("Database error: %s", str(e))
         return None
     finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-def filter_by_session(data):
-    premarket = {}
-    normal = {}
-    aftermarket = {}
-    for cid, item in data.items():
-        dt = item['datetimestamp']
-        hour = dt.hour
-        minute = dt.minute
-        if (hour == 10 and minute >= 0) or (10 < hour < 15) or (hour == 15 and minute <= 25):
-            premarket[cid] = item
-        elif (hour == 15 and minute >= 30) or (15 < hour < 22):
-            normal[cid] = item
-        elif (hour >= 22) or (hour < 2) or (hour == 2 and minute == 0):
-            aftermarket[cid] = item
-    return premarket, normal, aftermarket
+def fill_legacy_features(conn, X, slots, pattern_length, batch_size=LOAD_BATCH_SIZE):
+    # Classifications not yet migrated to pattern_blobs: scatter their patterns_tb rows into X
+    cids = list(slots)
+    cursor = conn.cursor(buffered=False)
+    try:
+        for start in range(0, len(cids), batch_size):
+            batch = cids[start:start + batch_size]
+            cursor.execute(
+                f"SELECT cid, candle_index, col_name, col_value FROM patterns_tb WHERE cid IN ({','.join(['%s'] * len(batch))})",
+                batch
+            )
+            for cid, candle_index, col_name, col_value in cursor:
+                j = COLUMN_INDEX.get(col_name)
+                if j is not None and col_value is not None and 0 <= candle_index < pattern_length:
+                    X[slots[cid], candle_index, j] = col_value
+    finally:
+        cursor.close()
 
-def process_session_data(session_data, pattern_length):
-    if not session_data:
-        return None, None
-    X = []
-    y = []
-    for cid, item in session_data.items():
-        pattern = item['pattern']
-        if len(pattern) == pattern_length and all(len(c) > 0 for c in pattern):
-            flattened = [candle.get(col, np.nan) for candle in pattern for col in ALLOWED_COLUMNS]
-            X.append(flattened)
-            y.append(item['classification'])
-    if not X:
-        return None, None
-    return np.array(X, dtype=float), np.array(y, dtype=int)
+def session_masks(timestamps):
+    # Same CET wall-clock boundaries as before: 10:00-15:25, 15:30-21:59, 22:00-02:00
+    minutes = (timestamps - timestamps.astype('datetime64[D]')).astype(np.int64) // 60
+    return {
+        'premarket': (minutes >= 10 * 60) & (minutes <= 15 * 60 + 25),
+        'normal_hours': (minutes >= 15 * 60 + 30) & (minutes < 22 * 60),
+        'aftermarket': (minutes >= 22 * 60) | (minutes <= 2 * 60)
+    }
 
 def preprocess_data(X, y):
     if X.size == 0 or y.size == 0:
         logger.error("Empty dataset after loading")
         return None, None, None
-    X = np.nan_to_num(X, nan=0.0, posinf=1e6, neginf=-1e6)
-    X = np.clip(X, -1e6, 1e6)
+    X = np.nan_to_num(X, nan=0.0, posinf=1e6, neginf=-1e6, copy=False)
+    X = np.clip(X, -1e6, 1e6, out=X)
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
     unique_classes = np.unique(y)
@@ -233,15 +275,18 @@ def save_report_to_db(report, db_config):
 def save_model(model, scaler, pattern_length, offset, session_name):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     model_path = os.path.join(MODEL_DIR, f"delphi_stock_model_{session_name}.pkl")
-    joblib.dump({"model": model, "scaler": scaler, "timestamp": timestamp}, model_path)
+    tmp_path = f"{model_path}.tmp"
+    joblib.dump({"model": model, "scaler": scaler, "timestamp": timestamp}, tmp_path)
+    os.replace(tmp_path, model_path)
     logger.info("Model for %s saved to: %s", session_name, model_path)
     return model_path
 
-def train_session(session_data, session_name, pattern_length, offset, db_config):
-    X, y = process_session_data(session_data, pattern_length)
-    if X is None or y is None:
+def train_session(X, y, session_name, pattern_length, offset, db_config):
+    if len(y) == 0:
         logger.warning("No data for %s session", session_name)
         return None
+    X = X.reshape(len(X), -1)
+    y = y.astype(int)
     logger.info("Preprocessing %s data", session_name)
     X_processed, y_processed, scaler = preprocess_data(X, y)
     if X_processed is None:
@@ -291,13 +336,13 @@ def main(pattern_length=DEFAULT_PATTERN_LENGTH, offset=DEFAULT_OFFSET):
         'database': 'stocksocket'
     }
     logger.info("Loading data with pattern_length=%d, offset=%d", pattern_length, offset)
-    data = load_data_from_db(pattern_length, offset, db_config)
+    data = load_training_set(pattern_length, offset, db_config)
     if data is None:
         return
-    premarket, normal, aftermarket = filter_by_session(data)
-    for session_data, session_name in [(premarket, 'premarket'), (normal, 'normal_hours'), (aftermarket, 'aftermarket')]:
+    X, y, timestamps = data
+    for session_name, mask in session_masks(timestamps).items():
         logger.info("Training %s model", session_name)
-        train_session(session_data, session_name, pattern_length, offset, db_config)
+        train_session(X[mask], y[mask], session_name, pattern_length, offset, db_config)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Advanced training script for stock signal classification.")
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+FORMATS = ('rows', 'columns', 'binary')
+ROW_COLUMNS = [
+    ('open', float), ('high', float), ('low', float), ('close', float), ('volume', 'int64'),
+    ('classified', 'int64'), ('classification', 'int64'), ('prediction', 'int64'), ('prediction_values', float),
+    ('signals', 'int64'), ('signal_change_percentage', float), ('safe_buy', 'int64'), ('cpp_smoothed', float)
+]
+WIDE_COLUMNS = ['timestamp', 'volume']
+
+
+def build_frame(df, feature_columns):
+    if df.empty:
+        return pd.DataFrame()
+    dates = pd.to_datetime(df['date'])
+    columns = {
+        'timestamp': ((dates - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)).astype('int64').to_numpy(),
+        'Date': df['date'].to_numpy()
+    }
+    for col, dtype in ROW_COLUMNS:
+        values = df[col].fillna(0.0) if col == 'signal_change_percentage' else df[col]
+        columns[col] = values.astype(dtype).to_numpy()
+    features = df[feature_columns].astype(float).fillna(0.0)
+    for col in feature_columns:
+        columns[col] = features[col].to_numpy()
+    return pd.DataFrame(columns)
+
+def encode_frame(frame, fmt='rows'):
+    if fmt == 'columns':
+        return {col: frame[col].tolist() for col in frame.columns}
+    if fmt == 'binary':
+        numeric = [col for col in frame.columns if col != 'Date']
+        wide = [col for col in numeric if col in WIDE_COLUMNS]
+        narrow = [col for col in numeric if col not in WIDE_COLUMNS]
+        header = []
+        offset = 0
+        for cols, dtype, size in ((wide, 'f8', 8), (narrow, 'f4', 4)):
+            for col in cols:
+                header.append({'name': col, 'dtype': dtype, 'offset': offset})
+                offset += size * len(frame)
+        buffer = np.ascontiguousarray(frame[wide].to_numpy(dtype=np.float64).T).tobytes()
+        buffer += np.ascontiguousarray(frame[narrow].to_numpy(dtype=np.float32).T).tobytes()
+        return {
+            'length': len(frame),
+            'columns': header,
+            'Date': frame['Date'].tolist() if 'Date' in frame.columns else [],
+            'buffer': buffer
+        }
+    return frame.to_dict('records')
+
+def diff_frames(previous, frame):
+    old = previous.set_index('timestamp')
+    new = frame.set_index('timestamp')
+    removed = old.index.difference(new.index).tolist()
+    aligned = old.reindex(index=new.index, columns=new.columns)
+    same = ((aligned == new) | (aligned.isna() & new.isna())).all(axis=1)
+    return frame[~same.to_numpy()], removed
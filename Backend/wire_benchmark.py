@@ -0,0 +1,48 @@
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from indicators import INPUT_COLUMNS, OUTPUT_COLUMNS
+from wire import FORMATS, build_frame, encode_frame
+
+ROWS = 800
+REPEATS = 20
+
+
+def sample_frame(rows):
+    rng = np.random.default_rng(0)
+    features = INPUT_COLUMNS + [col for col in OUTPUT_COLUMNS if col not in ('avg_volume', 'volume_ratio', 'ppo_positive', 'cpp', 'cpp_smoothed', 'momentum_ppo_deg')]
+    df = pd.DataFrame(rng.normal(100, 5, size=(rows, len(features))), columns=features)
+    df['volume'] = rng.integers(0, 5000000, rows)
+    df['date'] = pd.date_range('2025-01-06 09:00', periods=rows, freq='5min').strftime('%Y-%m-%d %H:%M:%S')
+    for col in ['classified', 'classification', 'prediction', 'signals', 'safe_buy']:
+        df[col] = rng.integers(0, 3, rows)
+    for col in ['prediction_values', 'signal_change_percentage', 'cpp_smoothed']:
+        df[col] = rng.random(rows)
+    return df, features
+
+def payload_size(payload):
+    if isinstance(payload, dict) and 'buffer' in payload:
+        header = {key: value for key, value in payload.items() if key != 'buffer'}
+        return len(json.dumps(header)) + len(payload['buffer'])
+    return len(json.dumps(payload))
+
+def run(rows=ROWS, repeats=REPEATS):
+    df, features = sample_frame(rows)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        frame = build_frame(df, features)
+    build_ms = (time.perf_counter() - start) / repeats * 1000
+    print(f"rows={rows} columns={len(frame.columns)} build_frame={build_ms:.2f}ms")
+    for fmt in FORMATS:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            payload = encode_frame(frame, fmt)
+            if fmt != 'binary':
+                json.dumps(payload)
+        encode_ms = (time.perf_counter() - start) / repeats * 1000
+        print(f"{fmt:8s} encode={encode_ms:8.2f}ms size={payload_size(payload) / 1024:8.1f}KiB")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else ROWS)
@@ -223,7 +223,8 @@ header('Content-Type: text/html; charset=UTF-8');
         <div class="modal-content" style="height: 100%; position: relative; padding: 0;">
             <i class="fas fa-times close-panel" style="position: absolute; top: 10px; right: 10px; cursor: pointer; color: #e0e0e0; z-index: 1002;"></i>
             <div id="tickersLoader" class="loader-spinner" style="position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); display: none;"></div>
-            <div id="uniqueTickersList" style="height: 100%; overflow-y: auto; padding: 20px; box-sizing: border-box;">
+            <input type="text" id="uniqueTickersSearch" placeholder="Search ticker..." autocomplete="off">
+            <div id="uniqueTickersList" style="height: calc(100% - 50px); overflow-y: auto; padding: 20px; box-sizing: border-box;">
                 <!-- List will be populated here -->
             </div>
         </div>
@@ -242,7 +242,7 @@ function exitPatternSelectionMode() {
                 isRelayoutInProgress = false;
                 if (currentTicker) {
                     console.log(getTimestamp(), 'Requesting updated ticker data after exiting pattern selection:', currentTicker);
-                    socket.emit('request_ticker_data', { ticker: currentTicker });
+                    socket.emit('request_ticker_data', { ticker: currentTicker, protocol: dataProtocol, format: dataFormat });
                     startDataTimeout(currentTicker);
                 }
             }).catch(err => {
@@ -252,7 +252,7 @@ function exitPatternSelectionMode() {
             });
         } else if (currentTicker) {
             console.log(getTimestamp(), 'Requesting ticker data for:', currentTicker);
-            socket.emit('request_ticker_data', { ticker: currentTicker });
+            socket.emit('request_ticker_data', { ticker: currentTicker, protocol: dataProtocol, format: dataFormat });
             startDataTimeout(currentTicker);
         }
     } catch (err) {
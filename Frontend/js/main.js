@@ -21,9 +21,15 @@ let isDataLoaded = false;
 let showSignals = true;
 let showSessions = true;
 let dataStatus = 'disconnected';
+const UNIQUE_TICKERS_PAGE_SIZE = 100;
+let uniqueTickersPrefix = '';
+let uniqueTickersSearchTimer = null;
 let trainStatus = 'disconnected';
 let miscStatus = 'disconnected';
 let currentChain = []; // New: Store active trade chain
+const dataProtocol = 'delta';
+const dataFormat = 'columns';
+let deltaState = { ticker: null, seq: null, rows: new Map(), info: {} };
 
 const TA_FEATURES = [
     'open', 'high', 'low', 'close', 'volume', 'volume_adi', 'volume_obv', 'volume_cmf', 'volume_fi',
@@ -198,7 +204,7 @@ $(document).ready(() => {
         updateConnectionStatus('data', 'connected');
         if (currentTicker && !pauseChartUpdates) {
             console.log(getTimestamp(), 'Requesting ticker data on connect:', currentTicker);
-            socket.emit('request_ticker_data', { ticker: currentTicker });
+            socket.emit('request_ticker_data', { ticker: currentTicker, protocol: dataProtocol, format: dataFormat });
             startDataTimeout(currentTicker);
         }
     });
@@ -218,12 +224,12 @@ $(document).ready(() => {
         updateConnectionStatus('data', 'connected');
         if (currentTicker && !pauseChartUpdates) {
             console.log(getTimestamp(), 'Re-requesting ticker data after reconnect:', currentTicker);
-            socket.emit('request_ticker_data', { ticker: currentTicker });
+            socket.emit('request_ticker_data', { ticker: currentTicker, protocol: dataProtocol, format: dataFormat });
             startDataTimeout(currentTicker);
         }
     });
 
-    socket.on('ticker_data', (data) => {
+    function handleTickerData(data) {
         console.log(getTimestamp(), 'Received ticker_data, sample:',
             data.data ? data.data.slice(0, 5).map(item => ({
                 Date: item.Date,
@@ -292,6 +298,76 @@ $(document).ready(() => {
             isDataLoaded = false;
             updateToolbarState();
         }
+    }
+
+    function decodeFrame(data, format) {
+        if (format === 'columns') {
+            const names = Object.keys(data || {});
+            const length = names.length ? data[names[0]].length : 0;
+            const rows = new Array(length);
+            for (let i = 0; i < length; i++) {
+                const row = {};
+                names.forEach(name => { row[name] = data[name][i]; });
+                rows[i] = row;
+            }
+            return rows;
+        }
+        if (format === 'binary') {
+            const rows = Array.from({ length: data.length }, (_, i) => ({ Date: data.Date[i] }));
+            data.columns.forEach(column => {
+                const values = column.dtype === 'f8'
+                    ? new Float64Array(data.buffer, column.offset, data.length)
+                    : new Float32Array(data.buffer, column.offset, data.length);
+                values.forEach((value, i) => { rows[i][column.name] = value; });
+            });
+            return rows;
+        }
+        return data || [];
+    }
+
+    function emitTickerDelta() {
+        const rows = Array.from(deltaState.rows.values()).sort((a, b) => a.timestamp - b.timestamp);
+        handleTickerData({
+            tickers: [deltaState.ticker],
+            data: rows,
+            ticker_info: { [deltaState.ticker]: deltaState.info }
+        });
+    }
+
+    socket.on('ticker_data', (data) => {
+        if (data && data.format) {
+            data = { ...data, data: decodeFrame(data.data, data.format) };
+        }
+        handleTickerData(data);
+    });
+
+    socket.on('ticker_snapshot', (snapshot) => {
+        deltaState = {
+            ticker: snapshot.ticker,
+            seq: snapshot.seq,
+            rows: new Map(decodeFrame(snapshot.data, snapshot.format).map(row => [row.timestamp, row])),
+            info: snapshot.ticker_info || {}
+        };
+        emitTickerDelta();
+    });
+
+    socket.on('ticker_delta', (delta) => {
+        if (delta.ticker !== deltaState.ticker) {
+            return;
+        }
+        if (deltaState.seq === null || delta.seq !== deltaState.seq + 1) {
+            console.warn(getTimestamp(), 'Delta sequence gap for', delta.ticker, '- requesting resync');
+            deltaState.seq = null;
+            socket.emit('request_resync', { ticker: delta.ticker });
+            return;
+        }
+        (delta.remove || []).forEach(timestamp => deltaState.rows.delete(timestamp));
+        decodeFrame(delta.upsert, delta.format).forEach(row => deltaState.rows.set(row.timestamp, row));
+        if (delta.ticker_info) {
+            deltaState.info = delta.ticker_info;
+        }
+        deltaState.seq = delta.seq;
+        emitTickerDelta();
     });
 
     socket.on('ticker_info', (data) => {
@@ -367,7 +443,7 @@ $(document).ready(() => {
                 resetModalAndUI();
                 if (currentTicker) {
                     console.log(getTimestamp(), 'Requesting updated ticker data:', currentTicker);
-                    socket.emit('request_ticker_data', { ticker: currentTicker });
+                    socket.emit('request_ticker_data', { ticker: currentTicker, protocol: dataProtocol, format: dataFormat });
                     startDataTimeout(currentTicker);
                 }
             }, 500);
@@ -578,14 +654,22 @@ $(document).ready(() => {
     });
 
     miscSocket.on('unique_tickers_list', function(data) {
+        if ((data.prefix || '') !== uniqueTickersPrefix) {
+            return;
+        }
         $('#tickersLoader').hide();
+        $('#uniqueTickersMore').remove();
+        if (!data.after) {
+            $('#uniqueTickersList').empty();
+        }
         if (data.error) {
             $('#uniqueTickersList').html(`<p style="text-align: center; color: #ff5555;">Error: ${data.error}</p>`);
             return;
         }
         const tickersData = data.tickers || [];
-        if (tickersData.length === 0) {
-            $('#uniqueTickersList').html('<p style="text-align: center; color: #aaaaaa;">No unique tickers found. Classify some patterns!</p>');
+        if (tickersData.length === 0 && !data.after) {
+            const message = uniqueTickersPrefix ? `No tickers matching "${$('<div>').text(uniqueTickersPrefix).html()}"` : 'No unique tickers found. Classify some patterns!';
+            $('#uniqueTickersList').html(`<p style="text-align: center; color: #aaaaaa;">${message}</p>`);
             return;
         }
         tickersData.forEach(item => {
@@ -602,8 +686,20 @@ $(document).ready(() => {
             section.append(header, ul);
             $('#uniqueTickersList').append(section);
         });
+        if (data.next) {
+            const more = $('<button id="uniqueTickersMore">').text('Load more');
+            more.on('click', () => {
+                more.prop('disabled', true).text('Loading...');
+                requestUniqueTickers(data.next);
+            });
+            $('#uniqueTickersList').append(more);
+        }
     });
 
+    function requestUniqueTickers(after) {
+        miscSocket.emit('request_unique_tickers', { prefix: uniqueTickersPrefix, after: after || null, limit: UNIQUE_TICKERS_PAGE_SIZE });
+    }
+
     function populateGainersTable(tabId, gainers) {
         const tbody = $(`#${tabId}-body`);
         tbody.empty();
@@ -649,7 +745,7 @@ $(document).ready(() => {
         updateTickerInfo('Loading...', [], {});
         $('#trade-tracker').html('<span style="color: #aaaaaa; font-size: 12px;">No active buy</span>');
         currentTicker = ticker;
-        socket.emit('request_ticker_data', { ticker: ticker });
+        socket.emit('request_ticker_data', { ticker: ticker, protocol: dataProtocol, format: dataFormat });
         startDataTimeout(ticker);
     }
 
@@ -676,7 +772,18 @@ $(document).ready(() => {
         $('#uniqueTickersModal').show();
         $('#tickersLoader').show();
         $('#uniqueTickersList').empty();
-        miscSocket.emit('request_unique_tickers', {});
+        $('#uniqueTickersSearch').val('');
+        uniqueTickersPrefix = '';
+        requestUniqueTickers(null);
+    });
+
+    $(document).on('input', '#uniqueTickersSearch', function() {
+        clearTimeout(uniqueTickersSearchTimer);
+        uniqueTickersSearchTimer = setTimeout(() => {
+            uniqueTickersPrefix = $('#uniqueTickersSearch').val().trim().toUpperCase();
+            $('#tickersLoader').show();
+            requestUniqueTickers(null);
+        }, 250);
     });
 
     $(document).on('click', '#uniqueTickersModal .close-panel', function() {
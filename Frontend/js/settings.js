@@ -87,6 +87,8 @@ function applySettings() {
         if (currentTicker && socket) {
             socket.emit('request_ticker_data', { 
                 ticker: currentTicker, 
+                protocol: dataProtocol,
+                format: dataFormat,
                 settings: { 
                     safeBuyThreshold: appSettings.safeBuyThreshold,
                     probThreshold: appSettings.signalOptions.probThreshold,